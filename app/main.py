@@ -31,6 +31,12 @@ def main():
     # github_username = user_selector(contributors)
 
     github_username = st.text_input("Username для ревью", placeholder="Введите логин пользователя GitHub")
+    authored_only = st.checkbox(
+        "Только изменения, автором которых является пользователь",
+        value=False,
+        help="Быстрая выборка через поиск GitHub: загружаются только PR и merge-коммиты этого автора. "
+             "PR, которые пользователь только слил, и коммиты, которые он только закоммитил, в анализ не попадут.",
+    )
 
     branch_for_merge_history = st.text_input("Ветка для анализа коммитов",
                                              placeholder="master/main ")
@@ -71,6 +77,7 @@ def main():
                     branch_for_merge_history=branch_for_merge_history,
                     analysis_start_date_str=start_date,
                     analysis_end_date_str=end_date,
+                    authored_only=authored_only,
                 )
         else:
             st.warning("Пожалуйста заполните данные")
@@ -1,23 +1,80 @@
 import requests
 import os
+import asyncio
 from .prompt import typical_prompt
+from .http_client import get_session, get_http_timeout, send_request
+from .http_cache import get_http_cache
+from .rate_limit import get_request_scheduler
+from .token_pool import get_token_pool, rate_limit_resource
 import logging
 
 logger = logging.getLogger(__name__)
 
+GITHUB_API_VERSION = '2022-11-28'
+# Base URL of the REST API; point it at GitHub Enterprise or a local stand-in such as mock_github.
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+
+
+def _build_headers(headers):
+    """Returns a copy of the caller's headers with the API version set; the caller's dict is never mutated."""
+    request_headers = dict(headers) if headers else {}
+    request_headers['X-GitHub-Api-Version'] = GITHUB_API_VERSION
+    return request_headers
+
+
+def _with_pooled_token(send, request_headers, url):
+    """
+    With a token pool configured, wraps send so that every attempt (retries included) goes out with the pool's
+    token with the most headroom and reports the response's rate-limit headers back to the pool.
+    """
+    token_pool = get_token_pool()
+    if token_pool is None:
+        return send
+    resource = rate_limit_resource(url)
+
+    def send_with_token():
+        token = token_pool.acquire(resource)
+        request_headers['Authorization'] = f"token {token}"
+        response = send()
+        token_pool.update(token, response.headers)
+        return response
+
+    return send_with_token
+
 
 def make_api_request(
         url,
         headers,
         params=None,
-        timeout=100):
-    """Helper function for making GET requests to the GitHub API."""
+        timeout=None):
+    """
+    Helper function for making GET requests to the GitHub API.
+    Goes through the shared client from http_client (pooled requests session, or the HTTP/2 httpx backend with
+    GITHUB_HTTP_BACKEND=httpx), so connections are kept alive between calls.
+    When the on-disk HTTP cache is enabled, stored responses are revalidated with If-None-Match /
+    If-Modified-Since and served from the cache on 304.
+    Requests are paced and retried by the shared RequestScheduler (rate-limit headers, Retry-After, backoff).
+    """
 
-    headers['X-GitHub-Api-Version'] = '2022-11-28'
+    request_headers = _build_headers(headers)
+
+    cache = get_http_cache()
+    cache_key = cache.make_key(url, params, request_headers) if cache else None
+    cached_entry = cache.lookup(cache_key) if cache else None
+    if cached_entry:
+        request_headers.update(cache.conditional_headers(cached_entry))
 
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=timeout)
+        response = get_request_scheduler().execute(_with_pooled_token(
+            lambda: send_request('GET', url, headers=request_headers, params=params,
+                                 timeout=get_http_timeout(timeout)),
+            request_headers, url), url=url)
+        if cached_entry and response.status_code == 304:
+            return cache.build_response(cached_entry, response)
         response.raise_for_status()
+        if cache:
+            cache.record_miss()
+            cache.store(cache_key, response)
         return response
 
     except requests.exceptions.Timeout:
@@ -35,3 +92,82 @@ def make_api_request(
     except Exception as e:
         logger.warning(f"An unexpected error occurred during API request to {url}: {e}")
         return None
+
+
+async def async_make_api_request(
+        url,
+        headers,
+        params=None,
+        timeout=None):
+    """
+    Async counterpart of make_api_request for callers running on asyncio.
+    Runs make_api_request in a worker thread, so the request is paced by the RequestScheduler, revalidated against
+    the HTTP cache and sent with a pooled token; set GITHUB_HTTP_BACKEND=httpx to send it over HTTP/2.
+    """
+    return await asyncio.to_thread(make_api_request, url, headers, params=params, timeout=timeout)
+
+
+def make_graphql_request(
+        url,
+        query,
+        variables,
+        headers,
+        timeout=None):
+    """
+    Helper function for POSTing a query to the GitHub GraphQL API through the same shared client and scheduler.
+    Returns the decoded payload ({'data': ..., 'errors': ...}) or None on transport/HTTP errors.
+    GraphQL reports query errors with status 200, so callers must check payload.get('errors').
+    """
+
+    request_headers = _build_headers(headers)
+
+    try:
+        response = get_request_scheduler().execute(_with_pooled_token(
+            lambda: send_request('POST', url, headers=request_headers, json={'query': query, 'variables': variables},
+                                 timeout=get_http_timeout(timeout)),
+            request_headers, url), url=url)
+        response.raise_for_status()
+        payload = response.json()
+        if not isinstance(payload, dict):
+            logger.warning(f"Unexpected GraphQL response from {url}: {type(payload).__name__}")
+            return None
+        return payload
+
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Error making GraphQL request to {url}: {e}")
+        return None
+
+    except ValueError as e:
+        logger.warning(f"Error decoding GraphQL response from {url}: {e}")
+        return None
+
+
+def open_api_stream(
+        url,
+        headers,
+        params=None,
+        timeout=None):
+    """
+    Helper function for large GitHub downloads (e.g. tarballs) that must not be buffered in memory.
+    Sends a streaming GET through the pooled requests session (on either backend) and the scheduler, bypassing
+    the HTTP cache, and returns the open response (redirects followed) or None on errors.
+    The caller must close() the response.
+    """
+
+    request_headers = _build_headers(headers)
+
+    try:
+        session = get_session()
+        response = get_request_scheduler().execute(_with_pooled_token(
+            lambda: session.get(url, headers=request_headers, params=params, stream=True,
+                                timeout=get_http_timeout(timeout)),
+            request_headers, url), url=url)
+        if response.status_code != 200:
+            logger.warning(f"Streaming request to {url} failed with status {response.status_code}")
+            response.close()
+            return None
+        return response
+
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Error opening streaming request to {url}: {e}")
+        return None
@@ -0,0 +1,167 @@
+import os
+import queue
+import atexit
+import threading
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Writer threads that take file writes off the fetching threads; 0 writes inline on the caller's thread.
+GITHUB_ARTIFACT_WRITERS = int(os.environ.get('GITHUB_ARTIFACT_WRITERS', 4))
+# Writes waiting for a writer; when the queue is full, fetching threads wait instead of piling up contents.
+GITHUB_ARTIFACT_QUEUE_SIZE = int(os.environ.get('GITHUB_ARTIFACT_QUEUE_SIZE', 256))
+
+_created_dirs = set()
+_created_dirs_lock = threading.Lock()
+
+
+def ensure_dir(path):
+    """Creates a directory (and its parents) once per process; later calls for it are a set lookup."""
+    if not path or path in _created_dirs:
+        return
+    os.makedirs(path, exist_ok=True)
+    with _created_dirs_lock:
+        _created_dirs.add(path)
+
+
+def _write_file(path, data):
+    if isinstance(data, str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(data)
+    else:
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+def write_atomic(path, data):
+    """
+    Writes data (str or bytes) to path under a temporary name and renames it into place, so readers see either
+    the previous file or the complete new one, never a partial write. Raises OSError on failure.
+    """
+    directory = os.path.dirname(path)
+    ensure_dir(directory)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            _write_file(tmp_path, data)
+        except FileNotFoundError:  # The directory was removed after it was created
+            with _created_dirs_lock:
+                _created_dirs.discard(directory)
+            ensure_dir(directory)
+            _write_file(tmp_path, data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ArtifactWriter:
+    """
+    A bounded queue feeding a pool of writer threads. Fetching threads submit writes and carry on with their
+    next requests while the writers do the disk I/O; jobs are started in submission order.
+    """
+
+    def __init__(self, workers=GITHUB_ARTIFACT_WRITERS, queue_size=GITHUB_ARTIFACT_QUEUE_SIZE):
+        self.workers = max(0, workers)
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._threads = []
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'failed': 0}
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"artifact-writer-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            future, fn, args = self._queue.get()
+            try:
+                self._execute(future, fn, args)
+            finally:
+                self._queue.task_done()
+
+    def _execute(self, future, fn, args):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            with self._lock:
+                self.stats['failed'] += 1
+            future.set_exception(e)
+
+    def submit(self, fn, *args):
+        """Queues fn(*args) for a writer thread (blocking while the queue is full) and returns its Future."""
+        future = Future()
+        with self._lock:
+            self.stats['submitted'] += 1
+        if self.workers == 0:
+            self._execute(future, fn, args)
+            return future
+        if not self._threads:
+            self._start()
+        self._queue.put((future, fn, args))
+        return future
+
+    def write(self, path, data):
+        """Queues an atomic write of data (see write_atomic) and returns its Future."""
+        return self.submit(write_atomic, path, data)
+
+    def flush(self):
+        """Waits until every write submitted so far has finished."""
+        if self.workers:
+            self._queue.join()
+
+
+class WriteBatch:
+    """
+    The writes of one change. wait() blocks until they are done and runs the on_error callback of each failed
+    one on the calling thread, so the change's manifest can be corrected before its metadata.json is written.
+    """
+
+    def __init__(self, writer=None):
+        self.writer = writer or get_artifact_writer()
+        self._pending = []  # (future, description, on_error)
+
+    def submit(self, fn, *args, description=None, on_error=None):
+        self._pending.append((self.writer.submit(fn, *args), description or getattr(fn, '__name__', 'write'),
+                              on_error))
+
+    def write(self, path, data, on_error=None):
+        self._pending.append((self.writer.write(path, data), path, on_error))
+
+    def wait(self):
+        """Waits for the batch's writes and returns how many of them failed."""
+        failed = 0
+        pending, self._pending = self._pending, []
+        for future, description, on_error in pending:
+            error = future.exception()
+            if error is None:
+                continue
+            failed += 1
+            logger.warning(f"Could not write {description}: {error}")
+            if on_error is not None:
+                on_error(error)
+        return failed
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_artifact_writer():
+    """Returns the process-wide ArtifactWriter; pending writes are flushed when the interpreter exits."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ArtifactWriter()
+                atexit.register(_writer.flush)
+    return _writer
@@ -0,0 +1,120 @@
+"""
+End-to-end benchmark of fetch_github_data against the local mock GitHub server (see mock_github).
+
+Runs completely offline:
+
+    python -m llm_logic.benchmark --prs 200 --files 5 --latency 0.02 --content-mode archive --runs 2
+
+All runs share one working directory, so the first run is cold and later runs show the effect of the
+HTTP cache and blob store. For every run the wall time, the requests and bytes the server handled,
+requests per second and the per-endpoint request counts are reported.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import contextlib
+from io import StringIO
+
+BENCHMARK_OWNER = 'acme'
+BENCHMARK_REPO = 'widgets'
+
+
+def _free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark fetch_github_data against a local mock GitHub API.")
+    parser.add_argument('--prs', type=int, default=50, help="Number of synthetic PRs")
+    parser.add_argument('--files', type=int, default=3, help="Changed files per PR")
+    parser.add_argument('--lines', type=int, default=40, help="Lines per file")
+    parser.add_argument('--latency', type=float, default=0.01, help="Seconds added to every mock response")
+    parser.add_argument('--rate-limit', type=int, default=None,
+                        help="Core requests per hour the mock allows before answering 403 (default: unlimited)")
+    parser.add_argument('--rate-limit-window', type=int, default=None,
+                        help="Length of the mock's rate-limit window in seconds (default: one hour)")
+    parser.add_argument('--tokens', type=int, default=1,
+                        help="Number of tokens in the credential pool (each has its own --rate-limit budget)")
+    parser.add_argument('--secondary-limit-every', type=int, default=None,
+                        help="Answer every Nth request with 429 and Retry-After")
+    parser.add_argument('--backend', choices=('rest', 'graphql'), default='rest')
+    parser.add_argument('--content-mode', choices=('contents', 'archive', 'blobs', 'auto'), default='auto')
+    parser.add_argument('--workers', type=int, default=None, help="PR enrichment workers")
+    parser.add_argument('--file-workers', type=int, default=None, help="File workers per PR")
+    parser.add_argument('--max-rate', type=float, default=1000.0,
+                        help="Client-side request rate cap (GITHUB_MAX_REQUESTS_PER_SECOND)")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the on-disk HTTP cache")
+    parser.add_argument('--runs', type=int, default=1, help="Consecutive runs in the same working directory")
+    parser.add_argument('--verbose', action='store_true', help="Show the fetcher's own output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    host = '127.0.0.1'
+    port = _free_port(host)
+    workdir = tempfile.mkdtemp(prefix='github_benchmark_')
+
+    # The fetchers read their configuration at import time, so it has to be in place before llm_logic is imported.
+    os.environ['GITHUB_API_URL'] = f"http://{host}:{port}"
+    os.environ['GITHUB_GRAPHQL_URL'] = f"http://{host}:{port}/graphql"
+    os.environ['GITHUB_BOT_ACCESS_TOKEN'] = 'mock-token'
+    if args.tokens > 1:
+        os.environ['GITHUB_BOT_ACCESS_TOKENS'] = ",".join(f"mock-token-{i}" for i in range(1, args.tokens))
+    os.environ['GITHUB_MAX_REQUESTS_PER_SECOND'] = str(args.max_rate)
+    os.environ['GITHUB_HTTP_CACHE'] = '0' if args.no_cache else '1'
+    os.environ['GITHUB_HTTP_CACHE_DIR'] = os.path.join(workdir, '.github_http_cache')
+    os.environ['GITHUB_GIT_MIRROR_DIR'] = os.path.join(workdir, '.git_mirrors')
+    os.chdir(workdir)
+
+    from .mock_github import SyntheticRepo, MockGitHubServer, MOCK_RATE_LIMIT_WINDOW
+    from .rate_limit import get_request_scheduler
+    from .token_pool import get_token_pool
+    from . import core
+
+    repo_model = SyntheticRepo(BENCHMARK_OWNER, BENCHMARK_REPO, pr_count=args.prs, files_per_pr=args.files,
+                               lines_per_file=args.lines)
+    fetch_kwargs = {'pr_state': 'closed', 'backend': args.backend, 'content_mode': args.content_mode}
+    if args.workers:
+        fetch_kwargs['max_workers'] = args.workers
+    if args.file_workers:
+        fetch_kwargs['file_workers'] = args.file_workers
+
+    print(f"Benchmark: {args.prs} PRs x {args.files} files, latency {args.latency * 1000:.0f} ms, "
+          f"backend={args.backend}, content_mode={args.content_mode}, workdir={workdir}")
+    server = MockGitHubServer(repo_model, host=host, port=port, latency=args.latency,
+                              rate_limit=args.rate_limit or sys.maxsize,
+                              rate_limit_window=args.rate_limit_window or MOCK_RATE_LIMIT_WINDOW,
+                              secondary_limit_every=args.secondary_limit_every)
+    with server:
+        for run in range(1, args.runs + 1):
+            requests_before, bytes_before = server.request_count, server.bytes_sent
+            routes_before = dict(server.route_counts)
+            started = time.perf_counter()
+            with contextlib.ExitStack() as quiet:
+                if not args.verbose:  # The fetcher's prints and progress bars would swamp the report
+                    quiet.enter_context(contextlib.redirect_stdout(StringIO()))
+                    quiet.enter_context(contextlib.redirect_stderr(StringIO()))
+                prs, merge_commits = core.fetch_github_data(BENCHMARK_OWNER, BENCHMARK_REPO, **fetch_kwargs)
+            elapsed = time.perf_counter() - started
+
+            request_count = server.request_count - requests_before
+            routes = {route: count - routes_before.get(route, 0) for route, count in server.route_counts.items()
+                      if count - routes_before.get(route, 0)}
+            print(f"\nRun {run}: {len(prs)} PRs and {len(merge_commits)} merge commits in {elapsed:.2f} s")
+            print(f"  requests: {request_count} ({request_count / elapsed:.1f}/s), "
+                  f"received: {(server.bytes_sent - bytes_before) / 1024:.1f} KiB")
+            print("  per endpoint: " + ", ".join(f"{route}={count}" for route, count in sorted(routes.items())))
+    print(f"\nScheduler: {get_request_scheduler().stats}")
+    token_pool = get_token_pool()
+    if token_pool:
+        print(f"Requests per token: {token_pool.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import os
+import hashlib
+import threading
+import logging
+
+from .artifact_writer import write_atomic
+
+logger = logging.getLogger(__name__)
+
+GITHUB_BLOB_STORE_ENABLED = os.environ.get('GITHUB_BLOB_STORE', '1') != '0'
+BLOB_STORE_DIRNAME = 'blobs'  # Inside the data directory, next to the pr_N / commit_XXXXXXX directories
+
+
+def git_blob_sha(content):
+    """The SHA git (and GitHub) uses for a blob with this content."""
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed store of file contents keyed by git blob SHA, laid out like git's loose objects
+    (blobs/ab/cdef...). A file that is unchanged between changes (e.g. the after side of one PR and the
+    before side of the next) is fetched and written once; change manifests refer to it by SHA. Reusing a blob
+    refreshes its modification time, which keeps it from being collected by the data quota (see data_workspace)
+    while the metadata.json referring to it is still being written.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._pending = set()  # SHAs queued on an artifact writer but not on disk yet
+        self.stats = {'reused': 0, 'written': 0}
+
+    def _path(self, sha):
+        return os.path.join(self.root, sha[:2], sha[2:])
+
+    def has(self, sha):
+        return bool(sha) and (sha in self._pending or os.path.exists(self._path(sha)))
+
+    def _count_reuse(self, sha):
+        try:
+            os.utime(self._path(sha))
+        except OSError:  # Still queued on a writer
+            pass
+        with self._lock:
+            self.stats['reused'] += 1
+
+    def reuse(self, sha):
+        """Returns sha if that blob is already stored (counting it as reused), otherwise None."""
+        if not self.has(sha):
+            return None
+        self._count_reuse(sha)
+        return sha
+
+    def get(self, sha):
+        """Returns the stored content, or None if the blob is not in the store."""
+        if not sha:
+            return None
+        try:
+            with open(self._path(sha), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except (IOError, UnicodeDecodeError) as e:
+            logger.warning(f"Could not read blob {sha}: {e}")
+            return None
+
+    def put(self, content, sha=None, write_batch=None, on_error=None):
+        """
+        Stores content under sha (GitHub's blob SHA when known, otherwise computed from the content) and returns
+        the SHA, or None for empty content or on write errors. Writes are atomic, so concurrent writers of the
+        same blob are harmless. With write_batch (see artifact_writer.WriteBatch) the write is queued there and
+        the blob counts as stored meanwhile; if the write fails, the batch calls on_error when it is waited on.
+        """
+        if content is None or content == "":
+            return None
+        sha = sha or git_blob_sha(content)
+        path = self._path(sha)
+        if self.has(sha):
+            self._count_reuse(sha)
+            return sha
+        if write_batch is not None:
+            with self._lock:
+                self._pending.add(sha)
+            write_batch.submit(self._write, sha, path, content, description=f"blob {sha}",
+                               on_error=on_error)
+            return sha
+        try:
+            self._write(sha, path, content)
+        except IOError as e:
+            logger.warning(f"Could not write blob {sha}: {e}")
+            return None
+        return sha
+
+    def _write(self, sha, path, content):
+        try:
+            write_atomic(path, content)
+        finally:
+            with self._lock:
+                self._pending.discard(sha)
+        with self._lock:
+            self.stats['written'] += 1
+
+
+_blob_stores = {}
+_blob_stores_lock = threading.Lock()
+
+
+def get_blob_store(data_dir):
+    """Returns the BlobStore of a data directory, or None when GITHUB_BLOB_STORE=0."""
+    if not GITHUB_BLOB_STORE_ENABLED:
+        return None
+    root = os.path.join(data_dir, BLOB_STORE_DIRNAME)
+    with _blob_stores_lock:
+        if root not in _blob_stores:
+            _blob_stores[root] = BlobStore(root)
+        return _blob_stores[root]
@@ -0,0 +1,163 @@
+import os
+import json
+import mmap
+import zlib
+import struct
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # Listed in requirements.txt; without it members are deflate-compressed instead
+    zstandard = None
+
+GITHUB_CHANGE_ARCHIVE_ENABLED = os.environ.get('GITHUB_CHANGE_ARCHIVE', '1') == '1'
+CHANGE_ARCHIVE_FILE = "change.pack"  # Inside a pr_N / commit_XXXXXXX directory
+CHANGE_ARCHIVE_ZSTD_LEVEL = int(os.environ.get('GITHUB_CHANGE_ARCHIVE_ZSTD_LEVEL', 6))
+CHANGE_ARCHIVE_MAGIC = b'LLMPACK1'
+# The trailer at the very end points at the index: index offset, index length, magic.
+CHANGE_ARCHIVE_TRAILER = struct.Struct('<QQ8s')
+CHANGE_ARCHIVE_CACHE_SIZE = 64  # Open archives kept mapped by get_change_archive
+
+CODEC_RAW, CODEC_ZSTD, CODEC_ZLIB = 'raw', 'zstd', 'zlib'
+MIN_COMPRESS_BYTES = 64  # Smaller members are stored as is
+
+
+def patch_member(filename):
+    return f"changed_files/{filename}.patch"
+
+
+def content_member(dir_name, filename):
+    """Member name of a file's content; dir_name is 'before_merge' or 'after_merge', as in the loose layout."""
+    return f"{dir_name}/{filename}"
+
+
+def _compress(data):
+    if len(data) < MIN_COMPRESS_BYTES:
+        return CODEC_RAW, data
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=CHANGE_ARCHIVE_ZSTD_LEVEL).compress(data)
+    return CODEC_ZLIB, zlib.compress(data, 6)
+
+
+def _decompress(codec, data, size):
+    if codec == CODEC_RAW:
+        return bytes(data)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Reading this change archive requires the 'zstandard' package.")
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown change archive codec '{codec}'")
+
+
+def write_change_archive(path, members):
+    """
+    Writes members ({name: text}) as one archive at path and returns the number of members written.
+
+    Every member is compressed on its own, so it can be read without touching the others, and the data is
+    followed by a JSON index ({name: [offset, stored length, size, codec]}) and a fixed-size trailer locating it.
+    The archive is written under a temporary name and renamed, so readers see either the old or the new one.
+    """
+    index = {}
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(CHANGE_ARCHIVE_MAGIC)
+        offset = len(CHANGE_ARCHIVE_MAGIC)
+        for name, content in members.items():
+            if content is None or content == "":
+                continue
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            codec, stored = _compress(data)
+            f.write(stored)
+            index[name] = [offset, len(stored), len(data), codec]
+            offset += len(stored)
+        index_data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        f.write(index_data)
+        f.write(CHANGE_ARCHIVE_TRAILER.pack(offset, len(index_data), CHANGE_ARCHIVE_MAGIC))
+    os.replace(tmp_path, path)
+    return len(index)
+
+
+class ChangeArchive:
+    """
+    Read side of a change archive (see write_change_archive). The file is memory-mapped and its index read
+    once; get() decompresses only the requested member.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < len(CHANGE_ARCHIVE_MAGIC) + CHANGE_ARCHIVE_TRAILER.size:
+            self.close()
+            raise ValueError(f"{path} is too short to be a change archive")
+        index_offset, index_length, magic = CHANGE_ARCHIVE_TRAILER.unpack(
+            self._map[-CHANGE_ARCHIVE_TRAILER.size:])
+        if magic != CHANGE_ARCHIVE_MAGIC or self._map[:len(CHANGE_ARCHIVE_MAGIC)] != CHANGE_ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a change archive")
+        self.index = json.loads(self._map[index_offset:index_offset + index_length])
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        return list(self.index)
+
+    def get(self, name):
+        """Returns the member's text, or None if the archive has no such member."""
+        entry = self.index.get(name)
+        if entry is None:
+            return None
+        offset, length, size, codec = entry
+        return _decompress(codec, self._map[offset:offset + length], size).decode('utf-8', errors='replace')
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_open_archives = OrderedDict()  # path -> (stat signature, ChangeArchive); least recently used first
+_open_archives_lock = threading.Lock()
+
+
+def get_change_archive(change_dir):
+    """
+    Returns the ChangeArchive of a change directory, or None if it has none (data written with
+    GITHUB_CHANGE_ARCHIVE=0 or before archives existed, which keeps loose files). Recently used archives stay
+    mapped; an archive rewritten since it was opened is opened again.
+    """
+    path = os.path.join(change_dir, CHANGE_ARCHIVE_FILE)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    with _open_archives_lock:
+        cached = _open_archives.get(path)
+        if cached is not None and cached[0] == signature:
+            _open_archives.move_to_end(path)
+            return cached[1]
+        try:
+            archive = ChangeArchive(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not open change archive {path}: {e}")
+            return None
+        _open_archives[path] = (signature, archive)
+        _open_archives.move_to_end(path)
+        while len(_open_archives) > CHANGE_ARCHIVE_CACHE_SIZE:
+            # Not closed here: another thread may still be reading it. The map is released with the object.
+            _open_archives.popitem(last=False)
+        return archive
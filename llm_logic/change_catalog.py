@@ -0,0 +1,375 @@
+import os
+import sqlite3
+import threading
+import logging
+from dataclasses import fields
+from datetime import datetime, date, timezone
+
+from dateutil.parser import isoparse
+
+from .change_record import ChangeRecord, ChangeSummary, split_metadata, dumps, loads
+
+logger = logging.getLogger(__name__)
+
+CHANGE_CATALOG_ENABLED = os.environ.get('GITHUB_CHANGE_CATALOG', '1') == '1'
+CHANGE_CATALOG_DB_FILE = "catalog.sqlite3"  # In the data directory, next to the pr_N / commit_XXXXXXX directories
+CHANGE_CATALOG_VERSION = 2  # 2: header holds the summary only, other scalar fields moved to change_details
+
+# metadata key -> (child table, columns extracted for querying). Every child row also keeps the item as JSON,
+# so a change's metadata dict can be rebuilt exactly from its header row and its child rows.
+CHILD_SECTIONS = {
+    'changed_files_manifest': ('change_files', lambda f: {
+        'filename': f.get('filename'), 'status': f.get('status'), 'additions': f.get('additions'),
+        'deletions': f.get('deletions'), 'skipped': f.get('skipped')}),
+    'reviews': ('change_reviews', lambda r: {
+        'user_login': r.get('user'), 'state': r.get('state'), 'created_at': r.get('submitted_at')}),
+    'review_comments': ('change_comments', lambda c: {
+        'user_login': c.get('user'), 'path': c.get('path'), 'created_at': c.get('created_at')}),
+    'issue_comments': ('change_comments', lambda c: {
+        'user_login': c.get('user'), 'path': None, 'created_at': c.get('created_at')}),
+    'commits_list': ('change_commits', lambda c: {
+        'sha': c.get('sha'), 'author_login': c.get('api_author_login'),
+        'created_at': (c.get('author') or {}).get('date')}),
+    'check_runs': ('change_checks', lambda c: {
+        'name': c.get('name'), 'state': c.get('status'), 'conclusion': c.get('conclusion')}),
+    'statuses': ('change_checks', lambda s: {
+        'name': s.get('context'), 'state': s.get('state'), 'conclusion': None}),
+}
+CHILD_TABLES = {
+    'change_files': "filename TEXT, status TEXT, additions INTEGER, deletions INTEGER, skipped TEXT",
+    'change_reviews': "user_login TEXT, state TEXT, created_at TEXT",
+    'change_comments': "user_login TEXT, path TEXT, created_at TEXT",
+    'change_commits': "sha TEXT, author_login TEXT, created_at TEXT",
+    'change_checks': "name TEXT, state TEXT, conclusion TEXT",
+}
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS changes_author ON changes (author_login)",
+    "CREATE INDEX IF NOT EXISTS changes_committer ON changes (committer_login)",
+    "CREATE INDEX IF NOT EXISTS changes_merged_by ON changes (merged_by_login)",
+    "CREATE INDEX IF NOT EXISTS changes_date ON changes (change_date)",
+    "CREATE INDEX IF NOT EXISTS changes_type ON changes (change_type)",
+    "CREATE INDEX IF NOT EXISTS changes_repo ON changes (repo, change_date)",
+    "CREATE INDEX IF NOT EXISTS change_files_filename ON change_files (filename)",
+    "CREATE INDEX IF NOT EXISTS change_reviews_user ON change_reviews (user_login)",
+    "CREATE INDEX IF NOT EXISTS change_comments_user ON change_comments (user_login)",
+    "CREATE INDEX IF NOT EXISTS change_commits_author ON change_commits (author_login)",
+)
+LOGIN_ROLES = {'author': 'author_login', 'committer': 'committer_login', 'merged_by': 'merged_by_login'}
+SUMMARY_COLUMNS = tuple(field.name for field in fields(ChangeSummary))  # Column names of the changes table
+
+
+def normalize_change_date(value, end_of_day=False):
+    """
+    Returns value (ISO string, date or datetime) as a UTC 'YYYY-MM-DDTHH:MM:SSZ' string, which sorts and compares
+    correctly as text; None for missing or unparsable values. Plain dates and date-only strings mean the start
+    of that day, or its last second with end_of_day=True.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, datetime):
+            parsed = value
+        elif isinstance(value, date):
+            parsed = datetime.combine(value, datetime.max.time() if end_of_day else datetime.min.time())
+        else:
+            parsed = isoparse(str(value))
+            if end_of_day and len(str(value).strip()) == 10:  # YYYY-MM-DD
+                parsed = datetime.combine(parsed.date(), datetime.max.time())
+    except (ValueError, OverflowError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def change_directory_name(metadata):
+    """The directory a change's files are stored in: pr_<number> or commit_<short sha>."""
+    if metadata.get('request_type') == 'pr':
+        return f"pr_{metadata.get('request_id')}"
+    return f"commit_{str(metadata.get('sha') or metadata.get('request_id'))[:7]}"
+
+
+def _header_columns(metadata):
+    if metadata.get('request_type') == 'pr':
+        change_date = metadata.get('merged_at') or metadata.get('closed_at') or metadata.get('updated_at')
+        author, committer = metadata.get('author_login'), None
+    else:
+        change_date = metadata.get('committer_date') or metadata.get('author_date')
+        author, committer = metadata.get('api_author_login'), metadata.get('api_committer_login')
+    return {
+        'author_login': author,
+        'committer_login': committer,
+        'merged_by_login': metadata.get('merged_by_login'),
+        'state': metadata.get('state'),
+        'title': metadata.get('title') or (metadata.get('message') or '').split('\n', 1)[0],
+        'change_date': normalize_change_date(change_date),
+        'updated_at': metadata.get('updated_at'),
+        'commits_count': metadata.get('commits_count', 1),
+        'changed_files_count': metadata.get('changed_files_count', 0),
+        'total_additions': metadata.get('total_additions', 0),
+        'total_deletions': metadata.get('total_deletions', 0),
+    }
+
+
+class ChangeCatalog:
+    """
+    SQLite catalog of fetched changes: one row per PR or merge commit with the columns the analysis filters on
+    (repository, type, author/committer/merger logins, change date) and child tables for its files, reviews,
+    comments, commits and CI results, indexed by login, date, type and repository.
+
+    Each change is split into hot and cold parts (see change_record): the changes row carries the compact
+    summary, while the bulky scalar fields (PR body, commit message, ...) live in change_details and the lists
+    in the child tables. put_change() replaces a change in one transaction, so readers never see half of it.
+    get_change() and query_changes() return ChangeRecords that read only the summary and load their details
+    when one is accessed. A catalog written with another CHANGE_CATALOG_VERSION is rebuilt from the
+    metadata.json files of the changes it listed when it is opened.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = self._connection()
+        stale = self._drop_stale_schema(conn)
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS changes (
+                    repo TEXT NOT NULL,
+                    change_type TEXT NOT NULL,
+                    change_id TEXT NOT NULL,
+                    directory TEXT NOT NULL,
+                    author_login TEXT,
+                    committer_login TEXT,
+                    merged_by_login TEXT,
+                    state TEXT,
+                    title TEXT,
+                    change_date TEXT,
+                    updated_at TEXT,
+                    commits_count INTEGER,
+                    changed_files_count INTEGER,
+                    total_additions INTEGER,
+                    total_deletions INTEGER,
+                    header TEXT NOT NULL,
+                    PRIMARY KEY (repo, change_type, change_id)
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS changes_directory ON changes (directory)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS change_details (
+                    repo TEXT NOT NULL,
+                    change_type TEXT NOT NULL,
+                    change_id TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (repo, change_type, change_id)
+                )""")
+            for table, columns in CHILD_TABLES.items():
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        repo TEXT NOT NULL,
+                        change_type TEXT NOT NULL,
+                        change_id TEXT NOT NULL,
+                        section TEXT NOT NULL,
+                        position INTEGER NOT NULL,
+                        {columns},
+                        data TEXT NOT NULL,
+                        PRIMARY KEY (repo, change_type, change_id, section, position)
+                    )""")
+            for statement in INDEXES:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {CHANGE_CATALOG_VERSION}")
+        if stale:
+            self._reimport(stale)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _drop_stale_schema(self, conn):
+        """
+        Drops the tables of a catalog written with another CHANGE_CATALOG_VERSION and returns the (repo, directory)
+        pairs it listed, so they can be stored again from their metadata.json files in the current layout.
+        """
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        has_changes = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'changes'").fetchone() is not None
+        if version == CHANGE_CATALOG_VERSION or not has_changes:
+            return []
+        try:
+            stored = conn.execute("SELECT repo, directory FROM changes").fetchall()
+        except sqlite3.Error:
+            stored = []
+        logger.warning(f"Change catalog {self.db_path} has version {version}, expected {CHANGE_CATALOG_VERSION}; "
+                       f"rebuilding it from the metadata.json files of its {len(stored)} changes.")
+        with conn:
+            for table in ('changes', 'change_details', *CHILD_TABLES):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+        return stored
+
+    def _reimport(self, stored):
+        data_dir = os.path.dirname(self.db_path)
+        reimported = 0
+        for repo, directory in stored:
+            metadata_path = os.path.join(data_dir, directory, "metadata.json")
+            try:
+                with open(metadata_path, 'rb') as f:
+                    self.put_change(repo, loads(f.read()))
+                reimported += 1
+            except (OSError, ValueError) as e:
+                logger.warning(f"Not restoring {directory} in the change catalog: could not read {metadata_path}: {e}")
+        logger.info(f"Change catalog {self.db_path}: restored {reimported} of {len(stored)} changes.")
+
+    # --- Writing ---
+
+    def put_change(self, repo, metadata):
+        """Stores (or replaces) one change's metadata dict, header and child rows in a single transaction."""
+        change_type, change_id = metadata.get('request_type'), str(metadata.get('request_id'))
+        key = (repo, change_type, change_id)
+        header, details = split_metadata({k: v for k, v in metadata.items() if k not in CHILD_SECTIONS})
+        header['_sections'] = [section for section in CHILD_SECTIONS if section in metadata]
+        header['_details'] = list(details)
+        columns = _header_columns(metadata)
+
+        conn = self._connection()
+        with self._write_lock, conn:
+            for table in CHILD_TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE repo = ? AND change_type = ? AND change_id = ?", key)
+            conn.execute(
+                f"INSERT OR REPLACE INTO changes (repo, change_type, change_id, directory, {', '.join(columns)}, "
+                f"header) VALUES (?, ?, ?, ?, {', '.join('?' * len(columns))}, ?)",
+                (*key, change_directory_name(metadata), *columns.values(), dumps(header)))
+            conn.execute("INSERT OR REPLACE INTO change_details (repo, change_type, change_id, data) "
+                         "VALUES (?, ?, ?, ?)", (*key, dumps(details)))
+            for section, (table, extract) in CHILD_SECTIONS.items():
+                items = metadata.get(section) or []
+                rows = []
+                for position, item in enumerate(items):
+                    values = extract(item) if isinstance(item, dict) else {}
+                    rows.append((*key, section, position, *values.values(), dumps(item)))
+                if rows:
+                    column_names = CHILD_TABLES[table].replace(' TEXT', '').replace(' INTEGER', '')
+                    conn.executemany(
+                        f"INSERT INTO {table} (repo, change_type, change_id, section, position, {column_names}, data) "
+                        f"VALUES ({', '.join('?' * len(rows[0]))})", rows)
+
+    def delete_change(self, repo, change_type, change_id):
+        key = (repo, change_type, str(change_id))
+        conn = self._connection()
+        with self._write_lock, conn:
+            for table in (*CHILD_TABLES, 'change_details', 'changes'):
+                conn.execute(f"DELETE FROM {table} WHERE repo = ? AND change_type = ? AND change_id = ?", key)
+
+    # --- Reading ---
+
+    def _load_details(self, repo, change_type, change_id, sections):
+        """The cold part of a change: its detail fields and child sections."""
+        conn = self._connection()
+        key = (repo, change_type, change_id)
+        row = conn.execute("SELECT data FROM change_details WHERE repo = ? AND change_type = ? AND change_id = ?",
+                           key).fetchone()
+        details = loads(row[0]) if row else {}
+        for section in sections:
+            details[section] = []
+        for table in CHILD_TABLES:
+            for section, data in conn.execute(
+                    f"SELECT section, data FROM {table} WHERE repo = ? AND change_type = ? AND change_id = ? "
+                    f"ORDER BY section, position", key):
+                if section in details:
+                    details[section].append(loads(data))
+        return details
+
+    def _record(self, row):
+        summary = ChangeSummary(*row[:-1])
+        header = loads(row[-1])
+        sections = header.pop('_sections', [])
+        detail_keys = [*header.pop('_details', []), *sections]
+        return ChangeRecord(summary, header, detail_keys, lambda: self._load_details(
+            summary.repo, summary.change_type, summary.change_id, sections))
+
+    def _select(self, where, params, suffix=""):
+        query = f"SELECT {', '.join(SUMMARY_COLUMNS)}, header FROM changes"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        return [self._record(row) for row in self._connection().execute(query + suffix, params).fetchall()]
+
+    def get_change(self, change_type, change_id, repo=None):
+        """
+        Returns the ChangeRecord of a change (the most recently stored one if repo is None), or None. It reads
+        the same as the metadata dict; the details are loaded when first accessed.
+        """
+        where, params = ["change_type = ?", "change_id = ?"], [change_type, str(change_id)]
+        if repo is not None:
+            where.append("repo = ?")
+            params.append(repo)
+        records = self._select(where, params, " ORDER BY rowid DESC LIMIT 1")
+        return records[0] if records else None
+
+    def get_change_by_directory(self, directory, repo=None):
+        """Returns the ChangeRecord stored for a change directory name (pr_N / commit_XXXXXXX), or None."""
+        where, params = ["directory = ?"], [directory]
+        if repo is not None:
+            where.append("repo = ?")
+            params.append(repo)
+        records = self._select(where, params, " ORDER BY rowid DESC LIMIT 1")
+        return records[0] if records else None
+
+    def query_changes(self, repo=None, change_type=None, since=None, until=None, logins=None,
+                      roles=tuple(LOGIN_ROLES)):
+        """
+        Returns ChangeRecords of the changes matching every given filter, newest first: repository
+        ('owner/repo'), change type ('pr' / 'merge_commit'), change date within [since, until] (merged, closed or
+        updated date for PRs, committer or author date for merge commits; a date-only until includes that whole
+        day) and, for logins, changes in which any of those logins had one of roles ('author', 'committer',
+        'merged_by'). Only the summaries are read; a record loads its details (files, reviews, comments,
+        commits, checks, body) when one of them is accessed.
+        """
+        where, params = [], []
+        if repo is not None:
+            where.append("repo = ?")
+            params.append(repo)
+        if change_type is not None:
+            where.append("change_type = ?")
+            params.append(change_type)
+        if since is not None:
+            where.append("change_date >= ?")
+            params.append(normalize_change_date(since))
+        if until is not None:
+            where.append("change_date <= ?")
+            params.append(normalize_change_date(until, end_of_day=True))
+        if logins:
+            logins = [logins] if isinstance(logins, str) else list(logins)
+            placeholders = ', '.join('?' * len(logins))
+            where.append("(" + " OR ".join(f"{LOGIN_ROLES[role]} IN ({placeholders})" for role in roles) + ")")
+            params.extend(logins * len(roles))
+        return self._select(where, params, " ORDER BY change_date DESC")
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+_failed_paths = set()
+
+
+def get_change_catalog(data_dir):
+    """Returns the ChangeCatalog of a data directory, or None when it is disabled (GITHUB_CHANGE_CATALOG=0)."""
+    if not CHANGE_CATALOG_ENABLED:
+        return None
+    db_path = os.path.join(data_dir, CHANGE_CATALOG_DB_FILE)
+    with _catalogs_lock:
+        if db_path in _failed_paths:
+            return None
+        if db_path not in _catalogs:
+            try:
+                _catalogs[db_path] = ChangeCatalog(db_path)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not open change catalog {db_path}: {e}. Reading metadata.json files instead.")
+                _failed_paths.add(db_path)
+                return None
+        return _catalogs[db_path]
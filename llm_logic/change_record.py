@@ -0,0 +1,121 @@
+import json
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # Listed in requirements.txt; the standard json module produces the same documents
+    orjson = None
+
+# Top-level metadata keys every listing and filter needs; everything else (PR body, commit message, files,
+# reviews, comments, commits, CI results) is detail that is only loaded when a change is actually analysed.
+SUMMARY_KEYS = frozenset({
+    'platform', 'request_type', 'request_id', 'sha', 'title', 'state', 'html_url', 'commit_url',
+    'author_login', 'author_association', 'merged_by_login', 'api_author_login', 'api_committer_login',
+    'author_name', 'author_email', 'committer_name', 'committer_email',
+    'created_at', 'updated_at', 'closed_at', 'merged_at', 'author_date', 'committer_date',
+    'base_branch', 'head_branch', 'parent_shas', 'linked_issues_parsed',
+    'commits_count', 'changed_files_count', 'total_additions', 'total_deletions', 'total_changes',
+})
+
+
+def dumps(obj, indent=False):
+    """Serialises obj to JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None,
+                      separators=None if indent else (',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """Parses JSON bytes or text, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def split_metadata(metadata):
+    """Splits a change's metadata dict into its (summary, details) dicts."""
+    summary, details = {}, {}
+    for key, value in metadata.items():
+        (summary if key in SUMMARY_KEYS else details)[key] = value
+    return summary, details
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeSummary:
+    """The typed, always-loaded part of a change: identity, people, the date it counts for and its size."""
+    repo: str
+    change_type: str
+    change_id: str
+    directory: str
+    title: Optional[str] = None
+    state: Optional[str] = None
+    author_login: Optional[str] = None
+    committer_login: Optional[str] = None
+    merged_by_login: Optional[str] = None
+    change_date: Optional[str] = None  # UTC 'YYYY-MM-DDTHH:MM:SSZ'
+    updated_at: Optional[str] = None
+    commits_count: int = 1
+    changed_files_count: int = 0
+    total_additions: int = 0
+    total_deletions: int = 0
+
+
+class ChangeRecord(Mapping):
+    """
+    A change as a read-only mapping with the same keys as its metadata.json.
+
+    Summary keys are served from memory; the first access to any other key (body, message,
+    changed_files_manifest, reviews, ...) calls load_details once and keeps the result, so code that only
+    lists and filters changes never reads their bulky sections. The typed summary is available as .summary.
+    """
+
+    __slots__ = ('summary', '_fields', '_detail_keys', '_load_details', '_details', '_lock')
+
+    def __init__(self, summary: ChangeSummary, fields: dict, detail_keys, load_details: Callable[[], dict]):
+        self.summary = summary
+        self._fields = fields
+        self._detail_keys = frozenset(detail_keys) - fields.keys()
+        self._load_details = load_details
+        self._details = None
+        self._lock = threading.Lock()
+
+    @property
+    def details_loaded(self):
+        return self._details is not None
+
+    def _ensure_details(self):
+        if self._details is None:
+            with self._lock:
+                if self._details is None:
+                    self._details = self._load_details()
+        return self._details
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return self._fields[key]
+        if key not in self._detail_keys:
+            raise KeyError(key)
+        return self._ensure_details()[key]
+
+    def __contains__(self, key):
+        return key in self._fields or key in self._detail_keys
+
+    def __iter__(self):
+        yield from self._fields
+        yield from self._detail_keys
+
+    def __len__(self):
+        return len(self._fields) + len(self._detail_keys)
+
+    def to_dict(self):
+        """The complete metadata dict, loading the details if needed."""
+        details = self._ensure_details()
+        return {**self._fields, **{key: details[key] for key in self._detail_keys if key in details}}
+
+    def __repr__(self):
+        return f"ChangeRecord({self.summary.change_type} {self.summary.change_id}, " \
+               f"details {'loaded' if self.details_loaded else 'not loaded'})"
@@ -0,0 +1,140 @@
+import os
+import logging
+from collections.abc import Mapping
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from .change_record import ChangeRecord
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PARQUET_FILE = "github_changes_summary.parquet"  # Next to github_changes_summary.csv
+LOGIN_COLUMNS = ('author_login', 'committer_login', 'merged_by_login')
+STRING_COLUMNS = ('change_id', 'directory', 'title', 'author_name', 'author_email') + LOGIN_COLUMNS
+COUNT_COLUMNS = ('commits_count', 'changed_files_count', 'total_additions', 'total_deletions')
+SUMMARY_COLUMNS = ('repo', 'change_type', 'change_id', 'directory', 'title', 'author_login', 'author_name',
+                   'author_email', 'committer_login', 'merged_by_login', 'change_date') + COUNT_COLUMNS
+
+
+def change_author_email(change):
+    """
+    The author email of a change; for a PR, that of its first commit. PRs stored with it as author_email are
+    answered from that summary key, so a ChangeRecord does not load its commits for it.
+    """
+    if 'author_email' in change or change.get('request_type') != 'pr':
+        return change.get('author_email')
+    first_commit = (change.get('commits_list') or [{}])[0]
+    return ((first_commit if isinstance(first_commit, dict) else {}).get('author') or {}).get('email')
+
+
+def _summary_row(repo, change):
+    """The summary columns of one change's metadata dict, with its date still as the ISO string."""
+    if change.get('request_type') == 'pr':
+        return (repo, 'pr', str(change.get('request_id')), f"pr_{change.get('request_id')}", change.get('title'),
+                change.get('author_login'), change.get('author_login'), change_author_email(change), None,
+                change.get('merged_by_login'),
+                change.get('merged_at') or change.get('closed_at') or change.get('updated_at'),
+                change.get('commits_count', 1), change.get('changed_files_count', 0),
+                change.get('total_additions', 0), change.get('total_deletions', 0))
+    sha = str(change.get('sha') or change.get('request_id'))
+    # A ChangeRecord has the message's first line in its summary; the message itself is a detail.
+    title = change.summary.title if isinstance(change, ChangeRecord) else \
+        (change.get('message') or '').split('\n', 1)[0]
+    return (repo, change.get('request_type', 'merge_commit'), sha, f"commit_{sha[:7]}", title,
+            change.get('api_author_login'),
+            change.get('author_name'), change.get('author_email'), change.get('api_committer_login'), None,
+            change.get('committer_date') or change.get('author_date'),
+            1, change.get('changed_files_count', 0), change.get('total_additions', 0),
+            change.get('total_deletions', 0))
+
+
+def build_change_summary(changes, repo=None):
+    """
+    Returns a typed DataFrame with one row per change (PR or merge commit metadata dicts, or ChangeRecords whose
+    details stay unloaded): categorical repo and type, string ids and logins, integer stats and change_date as a
+    UTC timestamp (merged/closed/updated date for PRs, committer/author date for merge commits). All dates are
+    parsed in one vectorised call.
+    """
+    frame = pd.DataFrame([_summary_row(repo, change) for change in changes if isinstance(change, Mapping)],
+                         columns=list(SUMMARY_COLUMNS))
+    frame['repo'] = frame['repo'].astype('category')
+    frame['change_type'] = frame['change_type'].astype('category')
+    for column in STRING_COLUMNS:
+        frame[column] = frame[column].astype('string')
+    for column in COUNT_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').fillna(0).astype('int64')
+    frame['change_date'] = pd.to_datetime(frame['change_date'], utc=True, errors='coerce', format='ISO8601')
+    return frame
+
+
+def write_change_summary(path, frame):
+    """
+    Writes the summary as Parquet (written to a temporary file, then renamed). Returns True on success; on
+    failure the summary of an earlier run is removed, so load_change_summary() never returns an outdated one.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return True
+    except ImportError as e:  # Neither pyarrow nor fastparquet is installed
+        logger.warning(f"Not writing {path}: {e}")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not write change summary {path}: {e}")
+    for stale_path in (tmp_path, path):
+        try:
+            os.remove(stale_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove {stale_path}: {e}")
+    return False
+
+
+def load_change_summary(path):
+    """Returns the summary DataFrame stored at path, or None if it is missing or cannot be read."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"Could not read change summary {path}: {e}")
+        return None
+
+
+def _utc_timestamp(value, end_of_day=False):
+    """
+    value (ISO string, date or datetime) as a UTC Timestamp. Plain dates and date-only strings mean the start of
+    that day, or its last instant with end_of_day=True, as in core.parse_github_datetime.
+    """
+    timestamp = pd.Timestamp(value)
+    date_only = (isinstance(value, date) and not isinstance(value, datetime)) or \
+        (isinstance(value, str) and len(value.strip()) == 10)  # YYYY-MM-DD
+    if end_of_day and date_only:
+        timestamp = timestamp.normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+
+
+def filter_changes(frame, logins=None, since=None, until=None, repo=None, change_types=None):
+    """
+    Selects the rows of a change summary in one vectorised pass: changes in repo (when given) of change_types,
+    with change_date in [since, until] (either bound may be None; a date-only until includes that whole day) in
+    which any of logins was the author, committer or merger. A single login may be passed as a string. Rows
+    without a date never match a date bound.
+    """
+    mask = np.ones(len(frame), dtype=bool)
+    if repo is not None:
+        mask &= (frame['repo'] == repo).to_numpy(dtype=bool, na_value=False)
+    if change_types is not None:
+        mask &= frame['change_type'].isin([change_types] if isinstance(change_types, str) else change_types) \
+            .to_numpy(dtype=bool)
+    if since is not None:
+        mask &= (frame['change_date'] >= _utc_timestamp(since)).to_numpy(dtype=bool, na_value=False)
+    if until is not None:
+        mask &= (frame['change_date'] <= _utc_timestamp(until, end_of_day=True)).to_numpy(dtype=bool, na_value=False)
+    if logins:
+        logins = [logins] if isinstance(logins, str) else list(logins)
+        mask &= frame[list(LOGIN_COLUMNS)].isin(logins).any(axis=1).to_numpy(dtype=bool)
+    return frame[mask]
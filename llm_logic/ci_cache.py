@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+
+from .http_cache import HTTP_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+CI_CACHE_ENABLED = os.environ.get('GITHUB_CI_CACHE', '1') == '1'
+CI_CACHE_DB_FILE = "ci_results.sqlite3"  # Next to the HTTP cache database
+# Results that can still change (queued/in-progress checks, pending or missing statuses) are reused for this
+# many seconds only, so a rerun shortly after a fetch does not ask again but later runs pick up the outcome.
+CI_CACHE_PENDING_TTL = int(os.environ.get('GITHUB_CI_CACHE_PENDING_TTL', 600))
+FINAL_STATUS_STATES = ('success', 'failure', 'error')
+
+
+def check_runs_final(check_runs):
+    """True when every check run of a commit has completed, so its results can no longer change."""
+    return bool(check_runs) and all(run.get('status') == 'completed' for run in check_runs)
+
+
+def statuses_final(statuses):
+    """True when no status context of a commit is still pending."""
+    return bool(statuses) and all(status.get('state') in FINAL_STATUS_STATES for status in statuses)
+
+
+class CIResultCache:
+    """
+    Persistent cache of CI results (check runs and commit statuses) per commit SHA.
+
+    The same SHAs come up again and again: a merge commit's second parent is usually the head of a PR that was
+    just enriched, and every rerun asks for the same heads. Once all checks of a SHA have completed the result
+    is stored for good; unfinished results are kept for CI_CACHE_PENDING_TTL seconds. Concurrent lookups of the
+    same SHA within the process wait for the first one instead of fetching it twice.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, pending_ttl=CI_CACHE_PENDING_TTL):
+        self.cache_dir = cache_dir
+        self.pending_ttl = pending_ttl
+        self.db_path = os.path.join(cache_dir, CI_CACHE_DB_FILE)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS ci_results (
+                owner TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                data TEXT NOT NULL,
+                final INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (owner, repo, sha, kind)
+            )""")
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, owner, repo, sha, kind):
+        """Returns the stored list for (sha, kind) if it is final or still fresh, otherwise None."""
+        row = self._connection().execute(
+            "SELECT data, final, fetched_at FROM ci_results WHERE owner = ? AND repo = ? AND sha = ? AND kind = ?",
+            (owner, repo, sha, kind)).fetchone()
+        if row is None or (not row[1] and time.time() - row[2] > self.pending_ttl):
+            return None
+        return json.loads(row[0])
+
+    def put(self, owner, repo, sha, kind, data, final):
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO ci_results (owner, repo, sha, kind, data, final, fetched_at) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (owner, repo, sha, kind, json.dumps(data), int(bool(final)), time.time()))
+        conn.commit()
+
+    def get_or_fetch(self, owner, repo, sha, kind, fetch, is_final):
+        """
+        Returns the cached list for (sha, kind), calling fetch() and storing its result on a miss.
+        fetch returns (data, ok); results of failed requests (ok False) are returned but not stored.
+        """
+        key = (owner, repo, sha, kind)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                cached = self.get(owner, repo, sha, kind)
+                with self._lock:
+                    self.stats['hits' if cached is not None else 'misses'] += 1
+                if cached is not None:
+                    return cached
+                data, ok = fetch()
+                if ok:
+                    self.put(owner, repo, sha, kind, data, is_final(data))
+                return data
+            finally:
+                # Once the entry is written later lookups hit it without waiting, so the lock is no longer needed;
+                # dropping it keeps the dict from growing with every SHA of a long fetch.
+                with self._lock:
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+
+
+_ci_cache = None
+_ci_cache_failed = False
+_ci_cache_lock = threading.Lock()
+
+
+def get_ci_cache():
+    """Returns the shared CIResultCache, or None when it is disabled (GITHUB_CI_CACHE=0)."""
+    global _ci_cache, _ci_cache_failed
+    if not CI_CACHE_ENABLED or _ci_cache_failed:
+        return None
+    if _ci_cache is None:
+        with _ci_cache_lock:
+            if _ci_cache is None:
+                try:
+                    _ci_cache = CIResultCache()
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"Could not open CI result cache in {HTTP_CACHE_DIR}: {e}. Caching disabled.")
+                    _ci_cache_failed = True
+                    return None
+    return _ci_cache
@@ -1,16 +1,18 @@
 import os
 import time
+import sqlite3
 import streamlit as st
 from datetime import datetime
-from dateutil.parser import isoparse  # Import for parsing ISO 8601 dates
 import logging
-from .core import fetch_github_data, CodeChangeRAG
+from .core import fetch_github_data, repo_data_dir, CodeChangeRAG
+from .change_summary import SUMMARY_PARQUET_FILE, build_change_summary, filter_changes, load_change_summary
+from .change_catalog import get_change_catalog
 from datetime import datetime, timezone
 logger = logging.getLogger(__name__)
 
-OUTPUT_DIR_BASE = "github_data_structured"
 CODER_ANALYSIS_OUTPUT_DIR = "coder_analysis"  # New directory for saving coder analysis results
 pr_state_to_fetch = 'closed'  # Fetch closed PRs for analysis
+incremental_sync = True  # Reuse PRs already stored by a previous run instead of re-fetching them
 
 
 def code_review(
@@ -19,8 +21,15 @@ def code_review(
         coder_to_analyze_login,
         branch_for_merge_history='master',
         analysis_start_date_str="2025-01-01T00:00:00Z",
-        analysis_end_date_str="2025-04-18T23:59:59Z"
+        analysis_end_date_str="2025-04-18T23:59:59Z",
+        authored_only=False
 ):
+    """
+    Fetches github_owner/github_repo and analyses coder_to_analyze_login's changes in the date range.
+    By default the analysis covers every change the coder authored, committed or merged, so the whole repository
+    is listed within the range. authored_only=True analyses only the changes they authored and fetches just those
+    through the search API (fetch_github_data's author_login), which makes far fewer API calls on busy repositories.
+    """
     # --- Date Range for Filtering Changes for Analysis ---
     # Set the start and end dates for filtering changes for coder analysis
     # The format should be ISO 8601:YYYY-MM-DDTHH:MM:SSZ
@@ -38,6 +47,7 @@ def code_review(
     #     analysis_end_date = None
 
     # --- Data Fetching ---
+    data_dir = repo_data_dir(github_owner, github_repo)  # Where fetch_github_data stores this repository
 
     # Выводим информацию в виде markdown в Streamlit
     st.markdown(f"""
@@ -52,16 +62,21 @@ def code_review(
     - Может потребоваться значительное место на диске и API-запросы  
     """)
 
-    # Pass the date range to fetch_github_data for filtering merge commits during fetch
-    # Note: PR fetching is NOT filtered by date here, only merge history is.
-    # PRs will be filtered by date AFTER fetching.
+    # Pass the date range to fetch_github_data: merge history is fetched for the range only, and PR listing
+    # stops at the start of the range so PRs outside it are never enriched.
     fetched_pr_data, fetched_merge_history = fetch_github_data(
         github_owner,
         github_repo,
         pr_state=pr_state_to_fetch,
         branch_for_merge_history=branch_for_merge_history,
         merge_history_since=analysis_start_date_str,  # Use analysis date range for fetching merge commits
-        merge_history_until=analysis_end_date_str  # Use analysis date range for fetching merge commits
+        merge_history_until=analysis_end_date_str,  # Use analysis date range for fetching merge commits
+        incremental=incremental_sync,
+        pr_since=analysis_start_date_str,
+        pr_until=analysis_end_date_str,
+        # Without authored_only the analysis also covers PRs the coder merged and merge commits they only
+        # committed, which an author-scoped fetch would never list; the date window still bounds the listing.
+        author_login=coder_to_analyze_login if authored_only else None
     )
 
     start_time = time.time()
@@ -82,7 +97,7 @@ def code_review(
         st.info(f"**Время выполнения:** {execution_time:.2f} секунд")
 
         with st.expander("Детали сохранения"):
-            st.write(f"📁 **Папка с данными:** `{OUTPUT_DIR_BASE}`")
+            st.write(f"📁 **Папка с данными:** `{data_dir}`")
             st.write(f"⏱ **Начало:** `{datetime.fromtimestamp(start_time)}`")
             st.write(f"⏱ **Окончание:** `{datetime.fromtimestamp(end_time)}`")
 
@@ -102,40 +117,29 @@ def code_review(
 
     logging.info(
         f"\nFiltering fetched changes by date ({analysis_start_date_str} to {analysis_end_date_str}) and coder ({coder_to_analyze_login}) for analysis...")
+    # The selection reads change summaries only, filtered in one vectorised pass: the catalog's summary listing,
+    # else the columnar summary fetch_github_data wrote. Changes reused from the catalog load their details
+    # (files, reviews, comments, ...) only when the analysis below reads them, i.e. for the selected ones.
+    repo_full_name = f"{github_owner}/{github_repo}"
+    change_summary = None
+    catalog = get_change_catalog(data_dir)
+    if catalog is not None:
+        try:
+            change_summary = build_change_summary(catalog.query_changes(repo=repo_full_name), repo_full_name)
+        except sqlite3.Error as e:
+            logging.warning(f"Could not query the change catalog of {repo_full_name}: {e}")
+    if change_summary is None:
+        change_summary = load_change_summary(os.path.join(data_dir, SUMMARY_PARQUET_FILE))
+    if change_summary is None:  # Neither is available (e.g. no Parquet engine installed)
+        change_summary = build_change_summary(all_fetched_changes, repo_full_name)
+    selected = filter_changes(change_summary, logins=coder_to_analyze_login, since=analysis_start_date_str,
+                              until=analysis_end_date_str, repo=repo_full_name)
+    selected_keys = set(zip(selected['change_type'].astype(str), selected['change_id'].astype(str)))
     for change in all_fetched_changes:
-        change_type = change.get('request_type')
-        change_id = change.get('request_id')
-        change_date_str = None
-        author_login = None
-        committer_login = None
-        merged_by_login = None
-
-        # Determine the relevant date and author/committer based on change type
-        if change_type == 'pr':
-            change_date_str = change.get('merged_at') or change.get('closed_at') or change.get('updated_at')
-            author_login = change.get('author_login')
-            merged_by_login = change.get('merged_by_login')
-        elif change_type == 'merge_commit':
-            change_date_str = change.get('committer_date') or change.get('author_date')
-            author_login = change.get('api_author_login')
-            committer_login = change.get('api_committer_login')
-
-        if change_date_str:
-            try:
-                start_date = datetime.fromisoformat(analysis_start_date_str).replace(tzinfo=timezone.utc)
-                end_date = datetime.fromisoformat(analysis_end_date_str).replace(tzinfo=timezone.utc)
-                change_date = isoparse(change_date_str).astimezone(timezone.utc)  # Convert to UTC
-
-                # Check if the change is within the date range AND the coder is the author, committer, or merger
-                if start_date <= change_date <= end_date:
-                    if author_login in coder_to_analyze_login or \
-                            committer_login in coder_to_analyze_login or \
-                            merged_by_login in coder_to_analyze_login:
-                        changes_for_coder_analysis.append(change)
-            except ValueError:
-                logging.warning(
-                    f"Warning: Could not parse date '{change_date_str}' for {change_type.upper()} {change_id}. Skipping filtering for this change.")
-                pass  # Skip if date parsing fails
+        change_id = change.get('request_id') if change.get('request_type') == 'pr' else \
+            change.get('sha') or change.get('request_id')
+        if (change.get('request_type'), str(change_id)) in selected_keys:
+            changes_for_coder_analysis.append(change)
     logging.info(
         f"Found {len(changes_for_coder_analysis)} changes (PRs and Merge Commits) by {coder_to_analyze_login} within the specified date range for analysis.")
 
@@ -144,7 +148,7 @@ def code_review(
         print(f"No changes found for coder {coder_to_analyze_login} within the specified date range.")
     else:
         # Initialize RAG system
-        rag_system = CodeChangeRAG(data_path=OUTPUT_DIR_BASE)
+        rag_system = CodeChangeRAG(data_path=data_dir)
         rag_system.initialize_llm()  # Initialize the LLM once
 
         if rag_system.llm is None:
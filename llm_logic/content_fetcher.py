@@ -0,0 +1,258 @@
+import os
+import json
+import base64
+import tarfile
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .api_request import make_api_request, open_api_stream, GITHUB_API_URL
+
+logger = logging.getLogger(__name__)
+
+GITHUB_REQUEST_TIMEOUT = 100
+GITHUB_ARCHIVE_TIMEOUT = 600  # Seconds; whole-repository tarballs can take a while
+CONTENT_MODES = ('contents', 'archive', 'blobs', 'auto')
+GITHUB_CONTENT_MODE = os.environ.get('GITHUB_CONTENT_MODE', 'auto')
+# In 'auto' mode a commit whose changed files need at least this many content requests is read from its tarball.
+GITHUB_ARCHIVE_MIN_FILES = int(os.environ.get('GITHUB_ARCHIVE_MIN_FILES', 25))
+# Directory listings (git trees by commit or tree SHA) kept in memory to resolve blob SHAs of paths.
+GITHUB_TREE_CACHE_SIZE = int(os.environ.get('GITHUB_TREE_CACHE_SIZE', 4096))
+
+_tree_cache = OrderedDict()  # (owner, repo, tree-ish) -> ({name: (type, sha)}, truncated); least recently used first
+_tree_cache_lock = threading.Lock()
+
+
+def _decode_text(data):
+    return data.decode('utf-8', errors='replace')
+
+
+def github_get_file_content(owner, repo, file_path, commit_sha, headers):
+    """Get decoded content of a file from GitHub."""
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{file_path}?ref={commit_sha}"
+    response = make_api_request(api_url, headers=headers, timeout=GITHUB_REQUEST_TIMEOUT)
+    if response and response.status_code == 200:
+        try:
+            content_data = response.json()
+            if isinstance(content_data, dict) and content_data.get('type') == 'file' and 'content' in content_data:
+                if content_data.get('encoding') == 'base64':
+                    return _decode_text(base64.b64decode(content_data['content'].replace('\n', '')))
+                else:
+                    return content_data['content']
+            elif isinstance(content_data, dict) and content_data.get('type') in ['dir', 'submodule', 'symlink']:
+                return ""  # Return empty string for non-file types
+            else:
+                print(
+                    f"        Warning: Could not get file content for {file_path} @ {commit_sha[:7]}. Unexpected format.")
+                return ""
+        except json.JSONDecodeError as e:
+            print(f"        Error decoding JSON response for file content {file_path} @ {commit_sha[:7]}: {e}")
+            return ""
+    elif response and response.status_code == 404:
+        # File not found at this commit, which is expected for added/removed files
+        return ""
+    else:
+        print(
+            f"        Warning: Failed to fetch file content for {file_path} @ {commit_sha[:7]}. Status: {response.status_code if response else 'N/A'}")
+        return ""
+
+
+def github_get_blob_content(owner, repo, blob_sha, headers):
+    """Get decoded content of a git blob by its SHA. Blobs are immutable, so these responses cache perfectly."""
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/blobs/{blob_sha}"
+    response = make_api_request(api_url, headers=headers, timeout=GITHUB_REQUEST_TIMEOUT)
+    if not response or response.status_code != 200:
+        print(f"        Warning: Failed to fetch blob {blob_sha[:7]}. "
+              f"Status: {response.status_code if response else 'N/A'}")
+        return None
+    try:
+        blob = response.json()
+    except json.JSONDecodeError as e:
+        print(f"        Error decoding JSON response for blob {blob_sha[:7]}: {e}")
+        return None
+    if not isinstance(blob, dict) or 'content' not in blob:
+        return None
+    if blob.get('encoding') == 'base64':
+        return _decode_text(base64.b64decode(blob['content'].replace('\n', '')))
+    return blob['content']
+
+
+def _get_directory_entries(owner, repo, tree_ish, headers):
+    """
+    Returns ({name: (type, sha)}, truncated) for one directory level (a non-recursive trees request), tree_ish
+    being a commit SHA (its root directory) or a tree SHA; None if the listing could not be fetched. Both kinds of
+    SHA name immutable listings, so they are kept in an in-memory LRU cache shared by all changes of a fetch.
+    """
+    key = (owner, repo, tree_ish)
+    with _tree_cache_lock:
+        if key in _tree_cache:
+            _tree_cache.move_to_end(key)
+            return _tree_cache[key]
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/trees/{tree_ish}"
+    response = make_api_request(api_url, headers=headers, timeout=GITHUB_REQUEST_TIMEOUT)
+    if not response or response.status_code != 200:
+        return None
+    try:
+        tree = response.json()
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(tree, dict):
+        return None
+    listing = ({entry['path']: (entry.get('type'), entry.get('sha')) for entry in tree.get('tree', [])
+                if isinstance(entry, dict) and entry.get('path')}, bool(tree.get('truncated')))
+    with _tree_cache_lock:
+        _tree_cache[key] = listing
+        while len(_tree_cache) > GITHUB_TREE_CACHE_SIZE:
+            _tree_cache.popitem(last=False)
+    return listing
+
+
+def github_get_path_blob_shas(owner, repo, commit_sha, paths, headers):
+    """
+    Returns ({path: blob_sha}, complete) for the given paths at commit_sha. Only the directories on the way to
+    those paths are listed, one non-recursive trees request each (and none for directories listed before, see
+    _get_directory_entries), instead of the whole repository's recursive tree. Paths that are not files at that
+    commit are missing from the result; complete is False if a listing failed or was truncated, in which case
+    existing paths may be missing too.
+    """
+    blob_shas = {}
+    complete = True
+    directory_shas = {'': commit_sha}  # Directory path -> tree-ish, '' being the root
+
+    def directory_listing(directory):
+        nonlocal complete
+        if directory not in directory_shas:
+            parent, _, name = directory.rpartition('/')
+            parent_entries = directory_listing(parent)
+            entry = parent_entries.get(name) if parent_entries is not None else None
+            directory_shas[directory] = entry[1] if entry and entry[0] == 'tree' else None
+        if directory_shas[directory] is None:
+            return None
+        listing = _get_directory_entries(owner, repo, directory_shas[directory], headers)
+        if listing is None:
+            complete = False
+            directory_shas[directory] = None
+            return None
+        entries, truncated = listing
+        if truncated:
+            complete = False
+        return entries
+
+    for path in dict.fromkeys(p for p in paths if p):
+        directory, _, name = path.rpartition('/')
+        entries = directory_listing(directory)
+        entry = entries.get(name) if entries is not None else None
+        if entry and entry[0] == 'blob':
+            blob_shas[path] = entry[1]
+    return blob_shas, complete
+
+
+def github_extract_archive_files(owner, repo, commit_sha, paths, headers):
+    """
+    Streams the tarball of commit_sha and extracts only the requested paths, without writing the archive to disk
+    or holding it in memory. Returns {path: content} for the paths found (paths absent from the tree, submodules
+    and symlinks are simply missing), or None if the download failed.
+    """
+    wanted = set(paths)
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/tarball/{commit_sha}"
+    response = open_api_stream(api_url, headers=headers, timeout=GITHUB_ARCHIVE_TIMEOUT)
+    if response is None:
+        return None
+
+    contents = {}
+    try:
+        response.raw.decode_content = True
+        with tarfile.open(fileobj=response.raw, mode='r|*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                # Every entry is prefixed with a single '<owner>-<repo>-<sha>/' directory.
+                path = member.name.split('/', 1)[1] if '/' in member.name else member.name
+                if path not in wanted:
+                    continue
+                extracted = archive.extractfile(member)
+                if extracted is not None:
+                    contents[path] = _decode_text(extracted.read())
+                if len(contents) == len(wanted):
+                    break
+    except (tarfile.TarError, OSError, EOFError) as e:
+        print(f"        Warning: Could not read tarball of {commit_sha[:7]}: {e}")
+        return None
+    finally:
+        response.close()
+    return contents
+
+
+def _fetch_contents_per_file(owner, repo, commit_sha, paths, headers, max_workers):
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = executor.map(lambda path: github_get_file_content(owner, repo, path, commit_sha, headers), paths)
+        return dict(zip(paths, results))
+
+
+def _fetch_contents_by_blob(owner, repo, commit_sha, paths, headers, blob_shas, max_workers):
+    """Reads paths through the blobs API; SHAs not passed in are looked up in the commit's tree."""
+    blob_shas = {path: blob_shas.get(path) for path in paths} if blob_shas else dict.fromkeys(paths)
+    unresolved = [path for path, sha in blob_shas.items() if not sha]
+    truncated = False
+    if unresolved:
+        tree_shas, complete = github_get_path_blob_shas(owner, repo, commit_sha, unresolved, headers)
+        truncated = not complete
+        for path in unresolved:
+            blob_shas[path] = tree_shas.get(path)
+
+    # The same blob often appears under several paths (copies, reverted files); fetch each SHA once.
+    unique_shas = sorted({sha for sha in blob_shas.values() if sha})
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        by_sha = dict(zip(unique_shas, executor.map(
+            lambda sha: github_get_blob_content(owner, repo, sha, headers), unique_shas)))
+
+    contents = {}
+    fallback = []
+    for path, sha in blob_shas.items():
+        content = by_sha.get(sha) if sha else None
+        if content is not None:
+            contents[path] = content
+        elif sha or truncated:
+            fallback.append(path)
+        else:
+            contents[path] = ""  # Not in the tree: added/removed on this side
+    if fallback:
+        contents.update(_fetch_contents_per_file(owner, repo, commit_sha, fallback, headers, max_workers))
+    return contents
+
+
+def github_fetch_contents(owner, repo, commit_sha, paths, headers, content_mode=GITHUB_CONTENT_MODE,
+                          blob_shas=None, max_workers=4):
+    """
+    Returns {path: content} for the given paths at commit_sha, '' for paths that do not exist there.
+
+    content_mode selects how the files are read:
+      - 'contents': one contents-API request per file (the original behaviour).
+      - 'archive':  one streamed tarball per commit, extracting only these paths.
+      - 'blobs':    one git blobs request per distinct blob SHA; SHAs not given in blob_shas are resolved
+                    by listing the directories that contain those paths (github_get_path_blob_shas).
+      - 'auto':     'archive' when at least GITHUB_ARCHIVE_MIN_FILES files are needed, otherwise 'blobs' if
+                    blob_shas has the SHA of every path (immutable, so shared blobs are served from the HTTP
+                    cache) and 'contents' if not.
+    A failed archive download falls back to per-file requests.
+    """
+    paths = list(dict.fromkeys(p for p in paths if p))
+    if not paths or not commit_sha:
+        return {}
+    if content_mode not in CONTENT_MODES:
+        raise ValueError(f"content_mode must be one of {CONTENT_MODES}, got '{content_mode}'")
+    if content_mode == 'auto':
+        if len(paths) >= GITHUB_ARCHIVE_MIN_FILES:
+            content_mode = 'archive'
+        else:
+            content_mode = 'blobs' if blob_shas and all(blob_shas.get(path) for path in paths) else 'contents'
+
+    if content_mode == 'blobs':
+        return _fetch_contents_by_blob(owner, repo, commit_sha, paths, headers, blob_shas, max_workers)
+    if content_mode == 'archive':
+        extracted = github_extract_archive_files(owner, repo, commit_sha, paths, headers)
+        if extracted is not None:
+            return {path: extracted.get(path, "") for path in paths}
+        print(f"        Falling back to per-file requests for {len(paths)} files @ {commit_sha[:7]}.")
+    return _fetch_contents_per_file(owner, repo, commit_sha, paths, headers, max_workers)
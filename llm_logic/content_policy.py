@@ -0,0 +1,154 @@
+import os
+import re
+import fnmatch
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+CONTENT_POLICY_ENABLED = os.environ.get('GITHUB_CONTENT_POLICY', '1') == '1'
+# Contents larger than this are not stored or indexed; their stats and patch-less entry stay in the manifest.
+CONTENT_MAX_BYTES = int(os.environ.get('GITHUB_CONTENT_MAX_BYTES', 512 * 1024))
+DEFAULT_SKIP_GLOBS = (
+    # Lockfiles and pinned dependency lists
+    '*.lock', 'package-lock.json', 'npm-shrinkwrap.json', 'pnpm-lock.yaml', 'go.sum', 'requirements*.txt',
+    # Minified bundles and source maps
+    '*.min.js', '*.min.css', '*.map', '*.bundle.js',
+    # Vendored and built code; a leading '/' anchors a glob at the repository root
+    'vendor/*', 'node_modules/*', '/third_party/*', '/dist/*', '/build/*',
+    # Binary-ish assets
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.ico', '*.bmp', '*.webp', '*.pdf', '*.zip', '*.gz', '*.tar', '*.jar',
+    '*.whl', '*.so', '*.dll', '*.dylib', '*.exe', '*.bin', '*.woff', '*.woff2', '*.ttf', '*.eot', '*.otf',
+    '*.mp3', '*.mp4', '*.mov', '*.pyc', '*.db', '*.sqlite3',
+)
+# Comma-separated; replaces DEFAULT_SKIP_GLOBS when set (an empty value disables path-based skipping).
+CONTENT_SKIP_GLOBS = tuple(g.strip() for g in os.environ['GITHUB_CONTENT_SKIP_GLOBS'].split(',') if g.strip()) \
+    if 'GITHUB_CONTENT_SKIP_GLOBS' in os.environ else DEFAULT_SKIP_GLOBS
+GITATTRIBUTES_SKIP_ATTRIBUTES = ('linguist-generated', 'linguist-vendored', 'binary')
+# Headers generators put at the top of their output: '@generated' (protoc, Bazel, Meta tools), Go's
+# 'Code generated ... DO NOT EDIT.' and comment lines starting with 'auto-generated' / 'autogenerated'.
+GENERATED_MARKER_PATTERN = re.compile(
+    r'@generated\b|Code generated .* DO NOT EDIT\.|^[ \t]*(?:#+|//+|/?\*+|--|;+|<!--)[ \t]*(?i:auto-?generated)\b',
+    re.MULTILINE)
+GENERATED_MARKER_SCAN_BYTES = 1024
+BINARY_SCAN_BYTES = 8000  # Like git, content with a NUL byte in its first 8000 bytes is treated as binary
+EMPTY_BLOB_SHA = 'e69de29bb2d1d6434b8b29ae775ad8c2e48c5391'  # git blob SHA of an empty file
+
+
+def _path_suffixes(path):
+    """The path and every suffix of it that starts at a directory boundary ('a/b/c', 'b/c', 'c')."""
+    parts = path.split('/')
+    return ['/'.join(parts[i:]) for i in range(len(parts))]
+
+
+def _glob_match(glob, path, suffixes):
+    """Globs starting with '/' match the whole path; others match it below any directory (any suffix)."""
+    if glob.startswith('/'):
+        return fnmatch.fnmatchcase(path, glob[1:])
+    return any(fnmatch.fnmatchcase(suffix, glob) for suffix in suffixes)
+
+
+def _may_be_empty(file_entry):
+    """An empty added or removed file is listed like a binary one: without a patch and with no line changes."""
+    sha = file_entry.get('sha')
+    return sha == EMPTY_BLOB_SHA or (not sha and file_entry.get('status') == 'added')
+
+
+def _parse_gitattributes(text):
+    """Returns [(pattern, skip)] for .gitattributes lines that set or unset one of the skip attributes."""
+    rules = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        pattern, *attributes = line.split()
+        skip = None
+        for attribute in attributes:
+            name, _, value = attribute.lstrip('-!').partition('=')
+            if name not in GITATTRIBUTES_SKIP_ATTRIBUTES:
+                continue
+            skip = not attribute.startswith(('-', '!')) and value.lower() not in ('false', '0')
+        if skip is not None:
+            rules.append((pattern, skip))
+    return rules
+
+
+def _gitattributes_match(pattern, path):
+    if pattern.startswith('/'):
+        return fnmatch.fnmatchcase(path, pattern[1:])
+    if '/' not in pattern.rstrip('/'):
+        return fnmatch.fnmatchcase(path.rsplit('/', 1)[-1], pattern)
+    return fnmatch.fnmatchcase(path, pattern.replace('**/', '*'))
+
+
+class ContentPolicy:
+    """
+    Decides which changed files are not worth fetching, storing or indexing: lockfiles, minified bundles,
+    vendored or generated code, binaries and very large files.
+
+    skip_reason() looks only at the path and the file-list entry, so it runs before any content request;
+    skip_reason_for_content() also looks at the downloaded content (size, NUL bytes, generator markers).
+    Rules from a repository's .gitattributes (linguist-generated, linguist-vendored, binary, and their
+    negations) are applied on top of the path globs.
+    """
+
+    def __init__(self, skip_globs=CONTENT_SKIP_GLOBS, max_bytes=CONTENT_MAX_BYTES):
+        self.skip_globs = tuple(skip_globs)
+        self.max_bytes = max_bytes
+        self._gitattributes = {}  # (owner, repo) -> [(pattern, skip)]
+        self._lock = threading.Lock()
+
+    def load_gitattributes(self, owner, repo, text):
+        rules = _parse_gitattributes(text or "")
+        with self._lock:
+            self._gitattributes[(owner, repo)] = rules
+        if rules:
+            logger.info(f"Loaded {len(rules)} linguist/binary rules from {owner}/{repo}/.gitattributes")
+
+    def skip_reason(self, path, file_entry=None, owner=None, repo=None):
+        """Returns why the file should be skipped ('gitattributes', 'path', 'binary'), or None to keep it."""
+        if not path:
+            return None
+        attribute_skip = None
+        for pattern, skip in self._gitattributes.get((owner, repo), ()):
+            if _gitattributes_match(pattern, path):
+                attribute_skip = skip
+        if attribute_skip is not None:
+            return 'gitattributes' if attribute_skip else None
+        suffixes = _path_suffixes(path)
+        if any(_glob_match(glob, path, suffixes) for glob in self.skip_globs):
+            return 'path'
+        if isinstance(file_entry, dict) and file_entry.get('status') != 'renamed' and not file_entry.get('patch') \
+                and not file_entry.get('changes') and not _may_be_empty(file_entry):
+            return 'binary'  # GitHub lists binary files with no line changes and leaves out their 'patch' key
+        return None
+
+    def skip_reason_for_content(self, content):
+        """Returns why already downloaded content should not be stored or indexed ('size', 'binary',
+        'generated'), or None."""
+        if not content:
+            return None
+        # Every character takes at least one byte, so only content of up to max_bytes characters needs encoding.
+        if len(content) > self.max_bytes or len(content.encode('utf-8', errors='replace')) > self.max_bytes:
+            return 'size'
+        if '\0' in content[:BINARY_SCAN_BYTES]:
+            return 'binary'
+        if GENERATED_MARKER_PATTERN.search(content[:GENERATED_MARKER_SCAN_BYTES]):
+            return 'generated'
+        return None
+
+
+_content_policy = None
+_content_policy_lock = threading.Lock()
+
+
+def get_content_policy():
+    """Returns the shared ContentPolicy, or None when GITHUB_CONTENT_POLICY=0."""
+    global _content_policy
+    if not CONTENT_POLICY_ENABLED:
+        return None
+    if _content_policy is None:
+        with _content_policy_lock:
+            if _content_policy is None:
+                _content_policy = ContentPolicy()
+    return _content_policy
@@ -7,7 +7,11 @@ import re
 import tempfile
 import shutil
 import csv
-from datetime import datetime
+import sqlite3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta, timezone
+from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
 from dateutil.parser import isoparse  # Import for parsing ISO 8601 dates
 from tqdm import tqdm
 
@@ -20,55 +24,167 @@ from langchain_community.llms import YandexGPT
 # Removed HuggingFacePipeline, AutoTokenizer, AutoModelForCausalLM as they are no longer needed for the LLM
 # from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
 # from langchain.llms import HuggingFacePipeline
-from .api_request import make_api_request
+from .api_request import make_api_request, GITHUB_API_URL
+from .http_cache import get_http_cache
+from .ci_cache import get_ci_cache, check_runs_final, statuses_final
+from .sync_manifest import SyncManifest
+from .token_pool import get_token_pool
+from .fetch_journal import FetchJournal
+from .content_policy import get_content_policy
+from .change_catalog import get_change_catalog
+from .change_record import dumps as record_dumps, loads as record_loads
+from .change_summary import (SUMMARY_PARQUET_FILE, build_change_summary, change_author_email,
+                             write_change_summary)
+from .artifact_writer import WriteBatch, get_artifact_writer, write_atomic
+from .graphql_fetcher import graphql_iter_pr_pages, GraphQLPageSizer
+from .content_fetcher import (github_get_file_content, github_fetch_contents, github_get_path_blob_shas,
+                              GITHUB_CONTENT_MODE, CONTENT_MODES)
+from .blob_store import BlobStore, get_blob_store, BLOB_STORE_DIRNAME
+from .change_archive import (GITHUB_CHANGE_ARCHIVE_ENABLED, CHANGE_ARCHIVE_FILE, write_change_archive,
+                             get_change_archive, patch_member, content_member)
+from .git_mirror import get_git_mirror, GitMirrorError
+from .data_workspace import GITHUB_DATA_REUSE, api_host, repository_dir, get_data_workspace, migrate_legacy_layout
 
 GITHUB_PER_PAGE = 100
 GITHUB_REQUEST_TIMEOUT = 100
-OUTPUT_DIR_BASE = "github_data_structured"
+OUTPUT_DIR_BASE = "github_data_structured"  # Data of each repository is kept in <host>/<owner>/<repo> below it
 GITHUB_API_VERSION = '2022-11-28'
 SUMMARY_CSV_FILE = "github_changes_summary.csv"
+SYNC_MANIFEST_FILE_TEMPLATE = ".sync_manifest_{owner}_{repo}.json"
+FETCH_JOURNAL_FILE_TEMPLATE = ".fetch_journal_{owner}_{repo}.jsonl"
+GITHUB_SEARCH_RESULT_LIMIT = 1000  # The search API never returns more than this many results per query
+GITHUB_COMPARE_FILES_LIMIT = 300  # The compare / commit APIs list at most this many files as JSON
+FETCH_BACKENDS = ('rest', 'graphql')
+DATA_SOURCES = ('api', 'git')  # Where changed files, patches and contents come from
+GITHUB_PR_WORKERS = 8  # PRs / merge commits enriched concurrently
+GITHUB_FILE_WORKERS = 4  # Files fetched concurrently within a single PR / merge commit
+GITHUB_PAGE_WORKERS = 4  # Pages fetched concurrently by fetch_paginated_data(parallel=True)
+
+
+def _numbered_page_urls(links):
+    """
+    URLs of pages next..last built from a page's Link header, or None when the endpoint does not expose
+    numbered pages (no rel="last", or cursor-based links).
+    """
+    next_url = links.get('next', {}).get('url')
+    last_url = links.get('last', {}).get('url')
+    if not next_url or not last_url:
+        return None
+    parsed_next = urlparse(next_url)
+    query = parse_qs(parsed_next.query, keep_blank_values=True)
+    try:
+        next_page = int(query['page'][0])
+        last_page = int(parse_qs(urlparse(last_url).query)['page'][0])
+    except (KeyError, IndexError, ValueError):
+        return None
+    page_urls = []
+    for page in range(next_page, last_page + 1):
+        query['page'] = [str(page)]
+        page_urls.append(urlunparse(parsed_next._replace(query=urlencode(query, doseq=True))))
+    return page_urls
+
+
+def _request_page(page_url, headers, params=None):
+    """
+    Requests one page of a paginated endpoint. Returns (items_page, links); items_page is None when the
+    request failed (the reason is printed).
+    """
+    response = make_api_request(page_url, headers=headers, params=params, timeout=GITHUB_REQUEST_TIMEOUT)
+    if not response:
+        return None, {}
+    if response.status_code != 200:
+        print(f"Received status {response.status_code} for page {page_url}.")
+        return None, {}
+    try:
+        return response.json(), response.links
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON from {page_url}: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred processing page data: {e}")
+    return None, {}
 
 
-def fetch_paginated_data(url, headers, params=None, per_page=GITHUB_PER_PAGE):
-    """Fetches all pages for a given paginated GitHub API endpoint."""
-    if params is None:
-        params = {}
+def iter_paginated_data(url, headers, params=None, per_page=GITHUB_PER_PAGE, stop_when=None, status=None,
+                        parallel=False, max_workers=GITHUB_PAGE_WORKERS):
+    """
+    Yields the items of a paginated GitHub API endpoint as pages arrive.
+
+    Pages are fetched ahead of the consumer on a small pool, but never more than one page (serial paging) or
+    max_workers pages (parallel paging) ahead: a slow consumer holds back fetching, so memory stays bounded
+    by a few pages however long the listing is. Closing the generator stops further requests.
+
+    If stop_when is given, pagination ends at the first item for which stop_when(item) is true;
+    that item and everything after it are not yielded (useful on endpoints sorted by date).
+    If a status dict is given, status['complete'] is set once pagination ended normally
+    (last page or stop_when) rather than on an error.
+    With parallel=True the page count is read from the first page's Link rel="last" and the remaining pages
+    are fetched max_workers at a time, items still yielded in page order. Endpoints without numbered pages,
+    and calls with stop_when (which must see pages in order), are paged serially.
+    """
+    if status is not None:
+        status['complete'] = False
+    params = dict(params or {})
     params['per_page'] = per_page
-    all_items = []
-    current_url = url
+    yielded = 0
 
-    while current_url:
-        response = make_api_request(current_url, headers=headers, params=params if '?' not in current_url else None,
-                                    timeout=GITHUB_REQUEST_TIMEOUT)
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers) if parallel else 1)
+    pending = deque()
 
-        if not response:
-            print("Failed to fetch paginated data page. Stopping pagination.")
-            break
+    def submit(page_url, page_params=None):
+        pending.append((page_url, executor.submit(_request_page, page_url, headers, page_params)))
 
-        if response and response.status_code == 200:
-            try:
-                items_page = response.json()
-                if not items_page or not isinstance(items_page, list):
-                    break
-                all_items.extend(items_page)
-
-                if 'next' in response.links:
-                    current_url = response.links['next']['url']
-                    params = None  # Reset params for subsequent requests using next link
-                else:
-                    current_url = None
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON from {current_url}: {e}")
-                break
-            except Exception as e:
-                print(f"An unexpected error occurred processing page data: {e}")
+    try:
+        submit(url, params if '?' not in url else None)
+        numbered_pages = None
+        while pending:
+            page_url, future = pending.popleft()
+            items_page, links = future.result()
+            if items_page is None:
+                print(f"Failed to fetch paginated data page {page_url} after retries. Stopping pagination with "
+                      f"{yielded} items collected; the result may be truncated.")
+                return
+            if not isinstance(items_page, list) or (not items_page and numbered_pages is None):
+                if status is not None:
+                    status['complete'] = items_page == []
+                return
+
+            stop_index = None
+            if stop_when is not None:
+                stop_index = next((i for i, item in enumerate(items_page) if stop_when(item)), None)
+
+            # Queue the following page(s) before handing this page out, so fetching overlaps consumption.
+            if stop_index is None:
+                if numbered_pages is None and parallel and stop_when is None:
+                    page_urls = _numbered_page_urls(links)
+                    numbered_pages = iter(page_urls) if page_urls else None
+                if numbered_pages is not None:
+                    for next_page_url in numbered_pages:
+                        submit(next_page_url)
+                        if len(pending) >= max(1, max_workers):
+                            break
+                elif 'next' in links:
+                    submit(links['next']['url'])  # The next link already carries the query params
+
+            for item in items_page[:stop_index]:
+                yield item
+            yielded += len(items_page) if stop_index is None else stop_index
+            if stop_index is not None:
                 break
 
-        else:
-            print(f"Stopping pagination. Received status {response.status_code} for a page.")
-            break
+        if status is not None:
+            status['complete'] = True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 
-    return all_items
+def fetch_paginated_data(url, headers, params=None, per_page=GITHUB_PER_PAGE, stop_when=None, status=None,
+                         parallel=False, max_workers=GITHUB_PAGE_WORKERS):
+    """
+    Fetches all pages for a given paginated GitHub API endpoint into a list.
+    Same arguments as iter_paginated_data, which callers that can process items as they arrive should prefer.
+    """
+    return list(iter_paginated_data(url, headers, params=params, per_page=per_page, stop_when=stop_when,
+                                    status=status, parallel=parallel, max_workers=max_workers))
 
 
 # --- File Saving Helper ---
@@ -76,16 +192,13 @@ def fetch_paginated_data(url, headers, params=None, per_page=GITHUB_PER_PAGE):
 def save_file(content, base_dir, relative_path):
     """
     Saves content to a file, creating necessary subdirectories. Returns True on success, False on failure.
+    The file is written under a temporary name and renamed, so an interrupted write never leaves a partial file.
     """
     if content is None or content == "":
         return False
+    full_path = os.path.join(base_dir, relative_path)
     try:
-        full_path = os.path.join(base_dir, relative_path)
-        parent_dir = os.path.dirname(full_path)
-        if parent_dir:
-            os.makedirs(parent_dir, exist_ok=True)
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        write_atomic(full_path, content)
         return True
     except IOError as e:
         print(f"          Error writing file {full_path}: {e}")
@@ -95,6 +208,64 @@ def save_file(content, base_dir, relative_path):
         return False
 
 
+def repo_data_dir(owner, repo):
+    """
+    Directory of one repository's fetched data: OUTPUT_DIR_BASE/<host>/<owner>/<repo>, the host being that of
+    GITHUB_API_URL (see data_workspace), so the same PR number in different repositories never collides.
+    """
+    return repository_dir(OUTPUT_DIR_BASE, api_host(GITHUB_API_URL), owner, repo)
+
+
+# --- Date Helpers ---
+
+def parse_github_datetime(value, end_of_day=False):
+    """
+    Converts an ISO 8601 string, date or datetime to an aware UTC datetime (None stays None).
+    Plain dates (and date-only strings) mean the start of that day, or its last instant with end_of_day=True,
+    so a date range picked in the UI covers both of its boundary days.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime.combine(value, datetime.max.time() if end_of_day else datetime.min.time())
+    else:
+        value = str(value)
+        parsed = isoparse(value)
+        if end_of_day and len(value) == 10:  # YYYY-MM-DD
+            parsed = datetime.combine(parsed.date(), datetime.max.time())
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def format_github_datetime(value, end_of_day=False):
+    """Formats a string, date or datetime as the YYYY-MM-DDTHH:MM:SSZ timestamp the GitHub API expects."""
+    parsed = parse_github_datetime(value, end_of_day=end_of_day)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%SZ') if parsed else None
+
+
+def _pr_change_date(pr_data):
+    """The date a PR counts for in the analysis: merged, else closed, else last updated."""
+    return pr_data.get('merged_at') or pr_data.get('closed_at') or pr_data.get('updated_at')
+
+
+def _in_date_window(date_str, window_start, window_end):
+    """True if the ISO timestamp falls within [window_start, window_end]; open bounds are None."""
+    if not date_str:
+        return False
+    try:
+        change_date = parse_github_datetime(date_str)
+    except (ValueError, OverflowError):
+        return False
+    if window_start and change_date < window_start:
+        return False
+    if window_end and change_date > window_end:
+        return False
+    return True
+
+
 # --- Linked Issue Parsing Helper ---
 
 def parse_linked_issues(text):
@@ -116,78 +287,37 @@ def parse_linked_issues(text):
 
 # --- GitHub Data Fetching Functions ---
 
-def github_get_file_content(owner, repo, file_path, commit_sha, headers):
-    """Get decoded content of a file from GitHub."""
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{file_path}?ref={commit_sha}"
-    response = make_api_request(api_url, headers=headers, timeout=GITHUB_REQUEST_TIMEOUT)
-    if response and response.status_code == 200:
-        try:
-            content_data = response.json()
-            if isinstance(content_data, dict) and content_data.get('type') == 'file' and 'content' in content_data:
-                if content_data.get('encoding') == 'base64':
-                    return base64.b64decode(content_data['content'].replace('\n', '')).decode('utf-8', errors='replace')
-                else:
-                    return content_data['content']
-            elif isinstance(content_data, dict) and content_data.get('type') in ['dir', 'submodule', 'symlink']:
-                return ""  # Return empty string for non-file types
-            else:
-                print(
-                    f"        Warning: Could not get file content for {file_path} @ {commit_sha[:7]}. Unexpected format.")
-                return ""
-        except json.JSONDecodeError as e:
-            print(f"        Error decoding JSON response for file content {file_path} @ {commit_sha[:7]}: {e}")
-            return ""
-    elif response and response.status_code == 404:
-        # File not found at this commit, which is expected for added/removed files
-        return ""
-    else:
-        print(
-            f"        Warning: Failed to fetch file content for {file_path} @ {commit_sha[:7]}. Status: {response.status_code if response else 'N/A'}")
-        return ""
-
-
 def github_process_commit_files_list(owner, repo, commit_sha, headers):
     """Fetches the list of changed files for a specific commit."""
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/commits/{commit_sha}"
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{commit_sha}"
     response = make_api_request(api_url, headers=headers, timeout=GITHUB_REQUEST_TIMEOUT)
     if not response or response.status_code != 200:
         print(f"    Failed to fetch commit details for {commit_sha[:7]}. Skipping file list processing.")
-        return [], 0, 0, 0
+        return []
 
     try:
         commit_details = response.json()
         if not isinstance(commit_details, dict):
             print(f"    ERROR: Commit details for {commit_sha[:7]} is not a dictionary. Skipping file list processing.")
-            return [], 0, 0, 0
+            return []
 
         files_list = commit_details.get('files', [])
         if not files_list:
-            return [], 0, 0, 0
+            return []
 
         processed_files_metadata = []
-        total_additions = 0
-        total_deletions = 0
-        total_changes = 0
 
         for f in files_list:
             if not isinstance(f, dict) or 'filename' not in f or 'status' not in f:
                 print(f"Warning: Skipping invalid file entry for commit {commit_sha[:7]}: {f}")
                 continue
 
-            additions = f.get('additions', 0)
-            deletions = f.get('deletions', 0)
-            changes = f.get('changes', 0)
-
-            total_additions += additions
-            total_deletions += deletions
-            total_changes += changes
-
             processed_files_metadata.append({
                 'filename': f['filename'],
                 'status': f['status'],
-                'additions': additions,
-                'deletions': deletions,
-                'changes': changes,
+                'additions': f.get('additions', 0),
+                'deletions': f.get('deletions', 0),
+                'changes': f.get('changes', 0),
                 'sha': f.get('sha'),  # Blob SHA
                 'blob_url': f.get('blob_url'),
                 'raw_url': f.get('raw_url'),
@@ -197,84 +327,339 @@ def github_process_commit_files_list(owner, repo, commit_sha, headers):
                 'content_head_saved': False,  # Flag to track if head content was saved
                 'previous_filename': f.get('previous_filename')  # For renamed files
             })
-        return processed_files_metadata, total_additions, total_deletions, total_changes
+        return processed_files_metadata
 
     except json.JSONDecodeError as e:
         print(
             f"    Error decoding JSON response for commit details {commit_sha[:7]}: {e}. Skipping file list processing.")
-        return [], 0, 0, 0
+        return []
     except Exception as e:
         print(
             f"    Unexpected error processing commit files list for {commit_sha[:7]}: {e}. Skipping file list processing.")
-        return [], 0, 0, 0
-
-
-def github_process_pr_files(owner, repo, pr_number, base_sha, head_sha, headers, pr_output_dir):
-    """Fetches and saves changed files (before/after content, patch) for a GitHub PR."""
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}/files"
-    files_list = fetch_paginated_data(api_url, headers=headers, per_page=100)
-    if not files_list:
-        print(f"    No files found or error fetching files for GitHub PR #{pr_number}.")
         return []
 
-    print(f"    Processing {len(files_list)} files for GitHub PR #{pr_number}...")
 
-    before_dir = os.path.join(pr_output_dir, "before_merge")
-    after_dir = os.path.join(pr_output_dir, "after_merge")
-    patch_dir = os.path.join(pr_output_dir, "changed_files")
-    os.makedirs(before_dir, exist_ok=True)
-    os.makedirs(after_dir, exist_ok=True)
-    os.makedirs(patch_dir, exist_ok=True)
-
-    processed_files_metadata = []
-    for f in tqdm(files_list, desc=f"Processing files for GitHub PR #{pr_number}"):
-        if not isinstance(f, dict) or 'filename' not in f or 'status' not in f:
-            print(f"Warning: Skipping invalid file entry for GitHub PR #{pr_number}: {f}")
+def _parse_diff_files(diff_text):
+    """
+    Splits a raw unified diff (application/vnd.github.diff) into entries shaped like the 'files' of the commits /
+    compare API. Blob SHAs are only known abbreviated there, so 'sha' is None.
+    """
+    files = []
+    current = None
+    for line in diff_text.split('\n'):
+        if line.startswith('diff --git '):
+            if current is not None:
+                files.append(current)
+            old_path, _, new_path = line[len('diff --git a/'):].partition(' b/')
+            current = {'filename': new_path, 'old_path': old_path, 'status': 'modified', 'additions': 0,
+                       'deletions': 0, 'sha': None, 'blob_url': None, 'raw_url': None, 'hunks': []}
+        elif current is None:
             continue
+        elif current['hunks']:
+            current['hunks'].append(line)
+            if line.startswith('+'):
+                current['additions'] += 1
+            elif line.startswith('-'):
+                current['deletions'] += 1
+        elif line.startswith('@@'):
+            current['hunks'].append(line)
+        elif line.startswith('new file mode'):
+            current['status'] = 'added'
+        elif line.startswith('deleted file mode'):
+            current['status'] = 'removed'
+        elif line.startswith('rename from '):
+            current['status'], current['old_path'] = 'renamed', line[len('rename from '):]
+        elif line.startswith('rename to '):
+            current['filename'] = line[len('rename to '):]
+        elif line.startswith('--- a/'):
+            current['old_path'] = line[len('--- a/'):]
+        elif line.startswith('+++ b/'):
+            current['filename'] = line[len('+++ b/'):]
+    if current is not None:
+        files.append(current)
+
+    for f in files:
+        hunks = f.pop('hunks')
+        old_path = f.pop('old_path')
+        f['previous_filename'] = old_path if f['status'] == 'renamed' else None
+        f['patch'] = "\n".join(hunks).rstrip('\n') or None
+        f['changes'] = f['additions'] + f['deletions']
+    return files
+
+
+def github_compare_files_list(owner, repo, base_sha, head_sha, headers):
+    """
+    Fetches the files changed between base_sha and head_sha, with stats and patches, from the compare endpoint
+    in one request. The JSON listing stops at GITHUB_COMPARE_FILES_LIMIT files; larger comparisons are read from
+    the raw diff instead. Returns the files list in the same shape as github_process_commit_files_list's,
+    or None if the comparison could not be fetched.
+    """
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/compare/{base_sha}...{head_sha}"
+    # Only the files are needed; the compare response also lists the commits, which are paged.
+    response = make_api_request(api_url, headers=headers, params={'per_page': 1}, timeout=GITHUB_REQUEST_TIMEOUT)
+    if not response or response.status_code != 200:
+        return None
+    try:
+        comparison = response.json()
+    except json.JSONDecodeError as e:
+        print(f"    Error decoding compare response for {base_sha[:7]}...{head_sha[:7]}: {e}")
+        return None
+    if not isinstance(comparison, dict):
+        return None
+    files_list = [f for f in comparison.get('files', []) if isinstance(f, dict) and 'filename' in f]
+
+    if len(files_list) >= GITHUB_COMPARE_FILES_LIMIT:
+        diff_response = make_api_request(api_url, headers=dict(headers, Accept='application/vnd.github.diff'),
+                                         timeout=GITHUB_REQUEST_TIMEOUT)
+        if diff_response and diff_response.status_code == 200:
+            blob_shas = {f['filename']: f.get('sha') for f in files_list}
+            files_list = _parse_diff_files(diff_response.text)
+            for f in files_list:
+                f['sha'] = blob_shas.get(f['filename'])
+        else:
+            print(f"    Warning: compare {base_sha[:7]}...{head_sha[:7]} lists only the first "
+                  f"{len(files_list)} files and its diff could not be fetched.")
+
+    return [{
+        'filename': f['filename'],
+        'status': f.get('status', 'modified'),
+        'additions': f.get('additions', 0),
+        'deletions': f.get('deletions', 0),
+        'changes': f.get('changes', 0),
+        'sha': f.get('sha'),  # Blob SHA
+        'blob_url': f.get('blob_url'),
+        'raw_url': f.get('raw_url'),
+        'patch': f.get('patch'),
+        'patch_saved': False,
+        'content_base_saved': False,
+        'content_head_saved': False,
+        'previous_filename': f.get('previous_filename')
+    } for f in files_list]
+
+
+def _mark_unsaved(file_meta, *flags):
+    """on_error callback of a WriteBatch write: the manifest entry's flags become False."""
+    def mark(error):
+        for flag in flags:
+            file_meta[flag] = False
+    return mark
+
+
+def github_save_change_files(owner, repo, files_list, base_sha, head_sha, headers, change_output_dir, label,
+                             max_workers=GITHUB_FILE_WORKERS, content_mode=GITHUB_CONTENT_MODE, git_mirror=None,
+                             write_batch=None):
+    """
+    Saves before/after contents and patches of a change's files and returns the files manifest in the order of
+    files_list. Contents are read in two batches, one per side of the change (see
+    content_fetcher.github_fetch_contents for the retrieval modes), or from git_mirror when given.
 
-        filename = f['filename']
-        status = f['status']
+    With the blob store enabled (see blob_store), contents go to the shared store keyed by blob SHA and the
+    manifest references them as base_blob_sha / head_blob_sha; contents whose blob is already stored are not
+    fetched again. Otherwise they are stored as full copies.
 
-        content_base = ""
-        # Fetch base content only if the file wasn't added and base_sha is available
-        if status != 'added' and base_sha:
-            content_base = github_get_file_content(owner, repo, filename, base_sha, headers)
-            if content_base:
-                save_file(content_base, before_dir, filename)
+    Patches (and full copies) go into one compressed archive per change, change.pack (see change_archive);
+    with GITHUB_CHANGE_ARCHIVE=0 they are written as loose files under changed_files / before_merge / after_merge.
 
-        content_head = ""
-        # Fetch head content only if the file wasn't removed/deleted and head_sha is available
-        if status not in ['removed', 'deleted'] and head_sha:
-            content_head = github_get_file_content(owner, repo, filename, head_sha, headers)
-            if content_head:
-                save_file(content_head, after_dir, filename)
+    Files the content policy rejects (see content_policy) are not fetched, stored or given a patch file; they stay
+    in the manifest with their stats and the reason under 'skipped'.
 
-        patch_content = f.get('patch')
-        if patch_content:
-            # Use original filename for patch file name
-            patch_filename = os.path.basename(filename) + ".patch"
-            save_file(patch_content, patch_dir, patch_filename)
+    Contents and patches are written by the artifact writer threads (see artifact_writer). With write_batch the
+    writes are only queued on it, and the caller waits on it (which corrects the manifest's *_saved flags of
+    failed writes) before writing metadata.json; otherwise this function waits for them itself.
+    """
+    valid_files = []
+    for f in files_list:
+        if not isinstance(f, dict) or 'filename' not in f or 'status' not in f:
+            print(f"Warning: Skipping invalid file entry for {label}: {f}")
+            continue
+        valid_files.append(f)
+
+    content_policy = get_content_policy()
+    skipped = {}  # filename -> reason
+    if content_policy is not None:
+        for f in valid_files:
+            reason = content_policy.skip_reason(f['filename'], f, owner, repo)
+            if reason:
+                skipped[f['filename']] = reason
+        if skipped:
+            print(f"    Skipping contents of {len(skipped)} lockfile/vendored/generated/binary files for {label}.")
+    kept_files = [f for f in valid_files if f['filename'] not in skipped]
+
+    blob_store = get_blob_store(repo_data_dir(owner, repo))
+    before_dir = os.path.join(change_output_dir, "before_merge")
+    after_dir = os.path.join(change_output_dir, "after_merge")
+    patch_dir = os.path.join(change_output_dir, "changed_files")
+    archive_members = {} if GITHUB_CHANGE_ARCHIVE_ENABLED else None  # member name -> text, see change_archive
+    wait_for_writes = write_batch is None
+    if write_batch is None:
+        write_batch = WriteBatch()
+
+    # Base content only for files that weren't added (renamed files are read under their old path),
+    # head content only for files that weren't removed/deleted.
+    base_paths = {f['filename']: f.get('previous_filename') or f['filename']
+                  for f in kept_files if f['status'] != 'added'} if base_sha else {}
+    head_paths = [f['filename'] for f in kept_files if f['status'] not in ['removed', 'deleted']] if head_sha else []
+
+    # Blob SHAs of both sides: the files list carries the head SHA (and the git mirror also the base SHA);
+    # missing base SHAs are looked up in the base commit's directories that hold those files (cached listings,
+    # shared by changes on the same base), which is far cheaper than refetching stored contents.
+    base_blob_shas = {f['filename']: f.get('base_sha') for f in kept_files if f['filename'] in base_paths}
+    head_blob_shas = {f['filename']: f.get('sha') for f in kept_files}
+    if blob_store is not None and git_mirror is None and not all(base_blob_shas.values()):
+        unresolved = {filename: path for filename, path in base_paths.items() if not base_blob_shas.get(filename)}
+        tree_shas, _ = github_get_path_blob_shas(owner, repo, base_sha, list(unresolved.values()), headers)
+        for filename, path in unresolved.items():
+            base_blob_shas[filename] = tree_shas.get(path)
+
+    if blob_store is not None:
+        base_reused = {filename for filename in base_paths if blob_store.has(base_blob_shas.get(filename))}
+        head_reused = {filename for filename in head_paths if blob_store.has(head_blob_shas.get(filename))}
+        base_fetch = [path for filename, path in base_paths.items() if filename not in base_reused]
+        head_fetch = [filename for filename in head_paths if filename not in head_reused]
+    else:
+        base_reused, head_reused = set(), set()
+        base_fetch, head_fetch = list(base_paths.values()), head_paths
 
-        processed_files_metadata.append({
+    if git_mirror is not None:
+        base_contents = git_mirror.read_files(base_sha, base_fetch)
+        head_contents = git_mirror.read_files(head_sha, head_fetch)
+    else:
+        base_contents = github_fetch_contents(owner, repo, base_sha, base_fetch, headers, content_mode=content_mode,
+                                              blob_shas={path: base_blob_shas.get(filename)
+                                                         for filename, path in base_paths.items()},
+                                              max_workers=max_workers)
+        head_contents = github_fetch_contents(owner, repo, head_sha, head_fetch, headers, content_mode=content_mode,
+                                              blob_shas=head_blob_shas, max_workers=max_workers)
+
+    processed_files_metadata = []
+    for f in tqdm(valid_files, desc=f"Saving files for {label}", leave=False):
+        filename = f['filename']
+        content_base = base_contents.get(base_paths.get(filename), "")
+        content_head = head_contents.get(filename, "")
+        skip_reason = skipped.get(filename)
+        if skip_reason is None and content_policy is not None:
+            # Size, binary content and generator markers are only known once the contents are downloaded.
+            # Reused blobs are checked as stored: they may have been stored under a different policy.
+            if filename in base_reused:
+                content_base = blob_store.get(base_blob_shas.get(filename)) or ""
+            if filename in head_reused:
+                content_head = blob_store.get(head_blob_shas.get(filename)) or ""
+            skip_reason = content_policy.skip_reason_for_content(content_head) or \
+                content_policy.skip_reason_for_content(content_base)
+        if skip_reason is not None:
+            content_base = content_head = ""
+        patch_content = f.get('patch') if skip_reason is None else None
+        file_meta = {
             'filename': filename,
-            'status': status,
+            'status': f['status'],
             'additions': f.get('additions', 0),
             'deletions': f.get('deletions', 0),
             'changes': f.get('changes', 0),
             'sha': f.get('sha'),  # Blob SHA
             'blob_url': f.get('blob_url'),
             'raw_url': f.get('raw_url'),
-            'patch_saved': bool(patch_content),
-            'content_base_saved': bool(content_base),
-            'content_head_saved': bool(content_head),
             'previous_filename': f.get('previous_filename')  # For renamed files
-        })
+        }
+        if archive_members is not None:
+            if patch_content:
+                archive_members[patch_member(filename)] = patch_content
+            file_meta['patch_saved'] = bool(patch_content)
+        else:
+            # Use original filename for patch file name
+            file_meta['patch_saved'] = bool(patch_content)
+            if patch_content:
+                write_batch.write(os.path.join(patch_dir, os.path.basename(filename) + ".patch"), patch_content,
+                                  on_error=_mark_unsaved(file_meta, 'patch_saved'))
+        if skip_reason is not None:
+            file_meta['skipped'] = skip_reason
+            file_meta['content_base_saved'] = file_meta['content_head_saved'] = False
+        elif blob_store is not None:
+            base_blob_sha = None
+            if filename in base_paths:
+                base_blob_sha = blob_store.reuse(base_blob_shas.get(filename)) or \
+                    blob_store.put(content_base, base_blob_shas.get(filename), write_batch=write_batch,
+                                   on_error=_mark_unsaved(file_meta, 'content_base_saved'))
+            head_blob_sha = None
+            if filename in head_paths:
+                head_blob_sha = blob_store.reuse(head_blob_shas.get(filename)) or \
+                    blob_store.put(content_head, head_blob_shas.get(filename), write_batch=write_batch,
+                                   on_error=_mark_unsaved(file_meta, 'content_head_saved'))
+            file_meta['base_blob_sha'] = base_blob_sha
+            file_meta['head_blob_sha'] = head_blob_sha
+            file_meta['content_base_saved'] = base_blob_sha is not None
+            file_meta['content_head_saved'] = head_blob_sha is not None
+        elif archive_members is not None:
+            if content_base:
+                archive_members[content_member("before_merge", filename)] = content_base
+            if content_head:
+                archive_members[content_member("after_merge", filename)] = content_head
+            file_meta['content_base_saved'] = bool(content_base)
+            file_meta['content_head_saved'] = bool(content_head)
+        else:
+            file_meta['content_base_saved'] = bool(content_base)
+            file_meta['content_head_saved'] = bool(content_head)
+            if content_base:
+                write_batch.write(os.path.join(before_dir, filename), content_base,
+                                  on_error=_mark_unsaved(file_meta, 'content_base_saved'))
+            if content_head:
+                write_batch.write(os.path.join(after_dir, filename), content_head,
+                                  on_error=_mark_unsaved(file_meta, 'content_head_saved'))
+        processed_files_metadata.append(file_meta)
+
+    archive_path = os.path.join(change_output_dir, CHANGE_ARCHIVE_FILE)
+    if archive_members is not None:
+        def archive_failed(error):
+            print(f"    Error writing change archive {archive_path}: {error}")
+            for file_meta in processed_files_metadata:
+                if 'base_blob_sha' not in file_meta:
+                    file_meta['content_base_saved'] = file_meta['content_head_saved'] = False
+                file_meta['patch_saved'] = False
+        write_batch.submit(write_change_archive, archive_path, archive_members, description=archive_path,
+                           on_error=archive_failed)
+    elif os.path.exists(archive_path):
+        os.remove(archive_path)  # Left by an earlier run; readers would prefer it over the loose files just written
+    if wait_for_writes:
+        write_batch.wait()
     return processed_files_metadata
 
 
+def github_process_pr_files(owner, repo, pr_number, base_sha, head_sha, headers, pr_output_dir,
+                            max_workers=GITHUB_FILE_WORKERS, content_mode=GITHUB_CONTENT_MODE, git_mirror=None,
+                            write_batch=None):
+    """
+    Fetches and saves changed files (before/after content, patch) for a GitHub PR.
+    Up to max_workers content requests run concurrently; the returned manifest keeps the API order.
+    With git_mirror the files are diffed locally against the merge base, as GitHub's PR files list is.
+    write_batch is passed on to github_save_change_files.
+    """
+    if git_mirror is not None:
+        try:
+            if not git_mirror.ensure_commits([base_sha, head_sha]):
+                print(f"    Commits of GitHub PR #{pr_number} are missing from the git mirror. Skipping files.")
+                return []
+            base_sha = git_mirror.merge_base(base_sha, head_sha) or base_sha
+            files_list = git_mirror.changed_files(base_sha, head_sha)
+        except GitMirrorError as e:
+            print(f"    Error reading files of GitHub PR #{pr_number} from the git mirror: {e}")
+            return []
+        return github_save_change_files(owner, repo, files_list, base_sha, head_sha, headers, pr_output_dir,
+                                        f"GitHub PR #{pr_number}", git_mirror=git_mirror, write_batch=write_batch)
+
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{pr_number}/files"
+    files_list = fetch_paginated_data(api_url, headers=headers, per_page=100, parallel=True)
+    if not files_list:
+        print(f"    No files found or error fetching files for GitHub PR #{pr_number}.")
+        return []
+
+    print(f"    Processing {len(files_list)} files for GitHub PR #{pr_number}...")
+    return github_save_change_files(owner, repo, files_list, base_sha, head_sha, headers, pr_output_dir,
+                                    f"GitHub PR #{pr_number}", max_workers=max_workers, content_mode=content_mode,
+                                    write_batch=write_batch)
+
+
 def github_get_pr_reviews(owner, repo, pr_number, headers):
     """Fetches reviews for a GitHub PR."""
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}/reviews"
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{pr_number}/reviews"
     reviews = fetch_paginated_data(api_url, headers=headers, per_page=GITHUB_PER_PAGE)
     if not reviews: return []
     return [{'id': r.get('id'), 'user': r.get('user', {}).get('login', 'ghost'),
@@ -285,7 +670,7 @@ def github_get_pr_reviews(owner, repo, pr_number, headers):
 
 def github_get_pr_review_comments(owner, repo, pr_number, headers):
     """Fetches review comments (inline code comments) for a GitHub PR."""
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}/comments"
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{pr_number}/comments"
     comments = fetch_paginated_data(api_url, headers=headers, per_page=GITHUB_PER_PAGE)
     if not comments: return []
     return [{'id': c.get('id'), 'user': c.get('user', {}).get('login', 'ghost'),
@@ -299,7 +684,7 @@ def github_get_pr_review_comments(owner, repo, pr_number, headers):
 
 def github_get_pr_issue_comments(owner, repo, pr_number, headers):
     """Fetches issue comments (comments on the PR itself) for a GitHub PR."""
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/issues/{pr_number}/comments"
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues/{pr_number}/comments"
     comments = fetch_paginated_data(api_url, headers=headers, per_page=GITHUB_PER_PAGE)
     if not comments: return []
     return [{'id': c.get('id'), 'user': c.get('user', {}).get('login', 'ghost'),
@@ -309,7 +694,7 @@ def github_get_pr_issue_comments(owner, repo, pr_number, headers):
 
 def github_get_pr_commits(owner, repo, pr_number, headers):
     """Fetches commits associated with a GitHub PR."""
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}/commits"
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{pr_number}/commits"
     commits = fetch_paginated_data(api_url, headers=headers, per_page=GITHUB_PER_PAGE)
     if not commits: return []
     return [{'sha': c.get('sha'), 'message': c.get('commit', {}).get('message'),
@@ -320,75 +705,207 @@ def github_get_pr_commits(owner, repo, pr_number, headers):
             for c in commits if isinstance(c, dict)]
 
 
-def github_get_commit_check_runs(owner, repo, ref_sha, headers):
-    """Fetches check runs (newer Checks API) for a specific GitHub commit SHA."""
-    if not ref_sha: return []
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/commits/{ref_sha}/check-runs"
+def _fetch_commit_check_runs(owner, repo, ref_sha, headers):
+    """Returns (check_runs, ok) for a commit; ok is False when the request failed."""
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{ref_sha}/check-runs"
     response = make_api_request(api_url, headers=headers, params={'per_page': GITHUB_PER_PAGE},
                                 timeout=GITHUB_REQUEST_TIMEOUT)
-    if not response or response.status_code != 200: return []
+    if not response or response.status_code != 200: return [], False
     try:
         data = response.json()
         check_runs_list = data.get('check_runs', []) if isinstance(data, dict) else data
-        if not isinstance(check_runs_list, list): return []
+        if not isinstance(check_runs_list, list): return [], False
         return [{'name': cr.get('name'), 'status': cr.get('status'), 'conclusion': cr.get('conclusion'),
                  'started_at': cr.get('started_at'), 'completed_at': cr.get('completed_at'),
                  'app_owner': cr.get('app', {}).get('owner', {}).get('login'),
                  'app_name': cr.get('app', {}).get('name')}
-                for cr in check_runs_list if isinstance(cr, dict)]
+                for cr in check_runs_list if isinstance(cr, dict)], True
     except json.JSONDecodeError:
-        return []
+        return [], False
     except Exception as e:
         print(f"Error fetching check runs for {ref_sha[:7]}: {e}")
-        return []
+        return [], False
+
+
+def _fetch_commit_combined_status(owner, repo, ref_sha, headers):
+    """
+    Returns (statuses, ok) from the combined status endpoint, which reports only the latest status of each
+    context instead of the full history the statuses list returns, usually in a single request.
+    """
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{ref_sha}/status"
+    params = {'per_page': GITHUB_PER_PAGE}
+    statuses = []
+    while api_url:
+        response = make_api_request(api_url, headers=headers, params=params, timeout=GITHUB_REQUEST_TIMEOUT)
+        if not response or response.status_code != 200: return statuses, False
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            return statuses, False
+        if not isinstance(data, dict): return statuses, False
+        statuses.extend({'context': s.get('context'), 'state': s.get('state'), 'description': s.get('description'),
+                         'target_url': s.get('target_url'), 'creator_login': (s.get('creator') or {}).get('login'),
+                         'created_at': s.get('created_at'), 'updated_at': s.get('updated_at')}
+                        for s in data.get('statuses', []) if isinstance(s, dict))
+        more = len(statuses) < data.get('total_count', 0)
+        api_url = response.links['next']['url'] if more and 'next' in response.links else None
+        params = None
+    return statuses, True
+
+
+def github_get_commit_check_runs(owner, repo, ref_sha, headers):
+    """Fetches check runs (newer Checks API) for a specific GitHub commit SHA, through the per-SHA CI cache."""
+    if not ref_sha: return []
+    ci_cache = get_ci_cache()
+    if ci_cache is None:
+        return _fetch_commit_check_runs(owner, repo, ref_sha, headers)[0]
+    return ci_cache.get_or_fetch(owner, repo, ref_sha, 'check_runs',
+                                 lambda: _fetch_commit_check_runs(owner, repo, ref_sha, headers), check_runs_final)
 
 
 def github_get_commit_statuses(owner, repo, ref_sha, headers):
-    """Fetches statuses (older Status API) for a specific GitHub commit SHA."""
+    """
+    Fetches the latest status per context (older Status API) for a specific GitHub commit SHA,
+    through the per-SHA CI cache.
+    """
     if not ref_sha: return []
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/commits/{ref_sha}/statuses"
-    statuses = fetch_paginated_data(api_url, headers=headers, per_page=GITHUB_PER_PAGE)
-    if not statuses: return []
-    return [{'context': s.get('context'), 'state': s.get('state'), 'description': s.get('description'),
-             'target_url': s.get('target_url'), 'creator_login': s.get('creator', {}).get('login'),
-             'created_at': s.get('created_at'), 'updated_at': s.get('updated_at')}
-            for s in statuses if isinstance(s, dict)]
+    ci_cache = get_ci_cache()
+    if ci_cache is None:
+        return _fetch_commit_combined_status(owner, repo, ref_sha, headers)[0]
+    return ci_cache.get_or_fetch(owner, repo, ref_sha, 'statuses',
+                                 lambda: _fetch_commit_combined_status(owner, repo, ref_sha, headers),
+                                 statuses_final)
+
+
+# --- GitHub Search (author-scoped fetching) ---
+
+def _search_pr_query(owner, repo, author_login, pr_state, window_start, window_end):
+    """Builds the search query for a repo's PRs by one author, optionally limited to a closed/merged window."""
+    qualifiers = [f"repo:{owner}/{repo}", "is:pr", f"author:{author_login}"]
+    if pr_state in ('open', 'closed'):
+        qualifiers.append(f"is:{pr_state}")
+    if window_start or window_end:
+        # closed: covers merged PRs too (they are closed when merged), matching the merged_at/closed_at filter
+        start = format_github_datetime(window_start) if window_start else '*'
+        end = format_github_datetime(window_end) if window_end else '*'
+        qualifiers.append(f"closed:{start}..{end}")
+    return " ".join(qualifiers)
+
+
+def _fetch_search_page_items(query, headers, max_total=None):
+    """
+    Runs one search query through all of its pages (the search API wraps results in {'total_count', 'items'}).
+    If the first page reports more than max_total matches, the remaining pages are not fetched.
+    Returns (items, total_count, complete).
+    """
+    api_url = f"{GITHUB_API_URL}/search/issues"
+    params = {'q': query, 'per_page': GITHUB_PER_PAGE, 'sort': 'updated', 'order': 'desc'}
+    items = []
+    total_count = 0
+    current_url = api_url
+    while current_url:
+        response = make_api_request(current_url, headers=headers, params=params if '?' not in current_url else None,
+                                    timeout=GITHUB_REQUEST_TIMEOUT)
+        if not response or response.status_code != 200:
+            print(f"Failed to fetch search results for '{query}'. Stopping with {len(items)} items.")
+            return items, total_count, False
+        try:
+            data = response.json()
+        except json.JSONDecodeError as e:
+            print(f"Error decoding search results for '{query}': {e}")
+            return items, total_count, False
+        if not isinstance(data, dict):
+            return items, total_count, False
+        total_count = data.get('total_count', 0)
+        if max_total is not None and total_count > max_total:
+            return items, total_count, False
+        items.extend(item for item in data.get('items', []) if isinstance(item, dict))
+        current_url = response.links['next']['url'] if 'next' in response.links else None
+        params = None
+    return items, total_count, not data.get('incomplete_results', False)
+
+
+def github_search_author_prs(owner, repo, author_login, pr_state='closed', since=None, until=None, headers=None):
+    """
+    Enumerates only author_login's PRs in owner/repo through the search API
+    (is:pr author:X closed:A..B), so no request is spent on other authors' PRs.
+    Windows matching more than GITHUB_SEARCH_RESULT_LIMIT results are split in halves until each part fits.
+    Returns (pr_summaries, complete); the summaries carry the fields github_enrich_pr needs
+    ('number', 'url', 'updated_at', 'closed_at', 'merged_at') and are sorted by updated_at descending.
+    """
+    window_start = parse_github_datetime(since)
+    window_end = parse_github_datetime(until, end_of_day=True)
+    print(f"--- Searching PRs by {author_login} in {owner}/{repo} ---")
+
+    def search_window(start, end):
+        query = _search_pr_query(owner, repo, author_login, pr_state, start, end)
+        can_split = start is not None and end is not None and (end - start).total_seconds() > 1
+        # A window that has to be split is abandoned after its first page instead of being paged through.
+        items, total_count, complete = _fetch_search_page_items(
+            query, headers, max_total=GITHUB_SEARCH_RESULT_LIMIT if can_split else None)
+        if total_count > GITHUB_SEARCH_RESULT_LIMIT and can_split:
+            middle = start + (end - start) / 2
+            first_items, first_complete = search_window(start, middle)
+            second_items, second_complete = search_window(middle + timedelta(seconds=1), end)
+            return first_items + second_items, first_complete and second_complete
+        if total_count > GITHUB_SEARCH_RESULT_LIMIT:
+            print(f"Warning: search for '{query}' matched {total_count} PRs; only the first "
+                  f"{GITHUB_SEARCH_RESULT_LIMIT} can be retrieved. Pass a date window to get all of them.")
+            complete = False
+        return items, complete
+
+    items, complete = search_window(window_start, window_end)
+
+    pr_summaries = {}
+    for item in items:
+        pull_request = item.get('pull_request')
+        if not isinstance(pull_request, dict) or 'number' not in item:
+            continue
+        pr_summaries[item['number']] = {
+            'number': item['number'],
+            'url': pull_request.get('url'),
+            'updated_at': item.get('updated_at'),
+            'closed_at': item.get('closed_at'),
+            'merged_at': pull_request.get('merged_at'),
+            'user': item.get('user'),
+        }
+    result = sorted(pr_summaries.values(), key=lambda pr: pr.get('updated_at') or '', reverse=True)
+    print(f"Found {len(result)} PRs by {author_login}.")
+    return result, complete
 
 
 # --- GitHub Merge Commit History Analysis Function ---
 
-def github_analyze_merge_commits_history(owner, repo, branch='master', since=None, until=None, headers=None):
+def github_iter_merge_commits_history(owner, repo, branch='master', since=None, until=None, headers=None,
+                                      author=None, status=None):
     """
-    Fetches commits for a repository branch and identifies merge commits from history.
+    Streams commits of a repository branch and yields the merge commits among them as the pages arrive.
     Includes fetching limited commit details initially.
+    If author (a GitHub login or email) is given, only that author's commits are listed.
     """
     if not headers:
         print("Skipping GitHub merge commit history analysis: Headers are missing.")
-        return []
+        return
 
     print(f"--- Fetching commits for {owner}/{repo} on branch '{branch}' to find merge commits ---")
 
-    api_url = f"https://api.github.com/repos/{owner}/{repo}/commits"
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits"
     params = {
         'sha': branch,
         'per_page': GITHUB_PER_PAGE,
         'since': since,
         'until': until,
+        'author': author,
     }
 
     # Filter out None values from params
     params = {k: v for k, v in params.items() if v is not None}
 
-    all_commits = fetch_paginated_data(api_url, headers=headers, params=params, per_page=GITHUB_PER_PAGE)
-
-    if not all_commits:
-        print("No commits found or error fetching commits history.")
-        return []
-
-    print(f"Found {len(all_commits)} commits in history. Identifying merge commits...")
-
-    merge_commits = []
-    for commit_data in all_commits:
+    commits_count = 0
+    merge_commits_count = 0
+    for commit_data in iter_paginated_data(api_url, headers=headers, params=params, per_page=GITHUB_PER_PAGE,
+                                           status=status, parallel=True):
+        commits_count += 1
         if not isinstance(commit_data, dict):
             continue
 
@@ -397,7 +914,8 @@ def github_analyze_merge_commits_history(owner, repo, branch='master', since=Non
 
         # A merge commit typically has more than one parent
         if commit and isinstance(commit, dict) and isinstance(parents, list) and len(parents) > 1:
-            merge_commit_info = {
+            merge_commits_count += 1
+            yield {
                 'platform': 'github',
                 'request_type': 'merge_commit',  # Indicate this is a merge commit
                 'request_id': commit_data.get('sha'),  # Use full SHA as ID
@@ -424,29 +942,452 @@ def github_analyze_merge_commits_history(owner, repo, branch='master', since=Non
                 'statuses': [],  # To be populated later
                 'linked_issues_parsed': []  # To be populated later
             }
-            merge_commits.append(merge_commit_info)
 
-    print(f"Identified {len(merge_commits)} merge commits in history.")
-    return merge_commits
+    if commits_count == 0:
+        print("No commits found or error fetching commits history.")
+    else:
+        print(f"Identified {merge_commits_count} merge commits among {commits_count} commits in history.")
+
+
+def github_analyze_merge_commits_history(owner, repo, branch='master', since=None, until=None, headers=None,
+                                         author=None):
+    """
+    Fetches commits for a repository branch and identifies merge commits from history.
+    List form of github_iter_merge_commits_history.
+    """
+    return list(github_iter_merge_commits_history(owner, repo, branch=branch, since=since, until=until,
+                                                  headers=headers, author=author))
+
+
+# --- Per-Change Enrichment ---
+
+def _read_stored_metadata(change_output_dir, repo_full_name=None):
+    """
+    Returns the metadata stored by a previous run for change_output_dir, or None if missing/unreadable.
+    The change catalog is asked first and answers with a ChangeRecord, which loads the change's details only when
+    one of them is used; a metadata.json written before the catalog existed is read from disk and added to the
+    catalog.
+    """
+    catalog = get_change_catalog(os.path.dirname(change_output_dir) or '.')
+    if catalog is not None:
+        try:
+            metadata = catalog.get_change_by_directory(os.path.basename(change_output_dir), repo=repo_full_name)
+            if metadata is not None:
+                return metadata
+        except sqlite3.Error as e:
+            print(f"    Warning: Could not read {change_output_dir} from the change catalog: {e}.")
+    metadata_filename = os.path.join(change_output_dir, "metadata.json")
+    if not os.path.exists(metadata_filename):
+        return None
+    try:
+        with open(metadata_filename, 'rb') as f:
+            metadata = record_loads(f.read())
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"    Warning: Could not read stored metadata {metadata_filename}: {e}. It will be re-fetched.")
+        return None
+    if not isinstance(metadata, dict):
+        return None
+    if catalog is not None and repo_full_name:
+        _catalog_change(catalog, repo_full_name, metadata, change_output_dir)
+    return metadata
+
+
+def github_enrich_pr(owner, repo, pr_summary, headers, file_workers=GITHUB_FILE_WORKERS,
+                     content_mode=GITHUB_CONTENT_MODE, git_mirror=None, on_stored=None):
+    """
+    Fetches full details, files, reviews, comments, commits and CI results for one PR from the list endpoint,
+    writes pr_N/metadata.json and returns the metadata dict (or None if the PR had to be skipped). metadata.json
+    is written in the background; on_stored(success) is called once it is (see _write_change_metadata).
+    """
+    if not isinstance(pr_summary, dict) or 'number' not in pr_summary: return None
+    pr_number = pr_summary['number']
+
+    pr_output_dir = os.path.join(repo_data_dir(owner, repo), f"pr_{pr_number}")
+    os.makedirs(pr_output_dir, exist_ok=True)
+
+    pr_detail_url = pr_summary.get('url')
+    if not pr_detail_url:
+        print(f"\n    ERROR: Missing 'url' in GitHub PR summary for #{pr_number}. Skipping.")
+        return None
+    pr_detail_response = make_api_request(pr_detail_url, headers=headers, timeout=GITHUB_REQUEST_TIMEOUT)
+    if not pr_detail_response or pr_detail_response.status_code != 200:
+        print(f"\n    ERROR: Failed to fetch full details for GitHub PR #{pr_number}. Skipping.")
+        return None
+
+    try:
+        pr = pr_detail_response.json()
+        if not isinstance(pr, dict):
+            print(f"\n    ERROR: Full GitHub PR details for #{pr_number} is not a dictionary. Skipping.")
+            return None
+    except json.JSONDecodeError as e:
+        print(f"\n    ERROR: Failed to decode JSON for full GitHub PR #{pr_number} details: {e}. Skipping.")
+        return None
+
+    base_sha = pr.get('base', {}).get('sha')
+    head_sha = pr.get('head', {}).get('sha')
+
+    if not base_sha or not head_sha:
+        print(
+            f"\n    Warning: Missing base_sha ('{base_sha}') or head_sha ('{head_sha}') for PR #{pr_number}. File content fetching might be incomplete.")
+
+    # The files are written while the remaining sections are fetched.
+    write_batch = WriteBatch()
+    files_metadata = github_process_pr_files(owner, repo, pr_number, base_sha, head_sha, headers, pr_output_dir,
+                                             max_workers=file_workers, content_mode=content_mode,
+                                             git_mirror=git_mirror, write_batch=write_batch)
+
+    reviews = github_get_pr_reviews(owner, repo, pr_number, headers)
+    review_comments = github_get_pr_review_comments(owner, repo, pr_number, headers)
+    issue_comments = github_get_pr_issue_comments(owner, repo, pr_number, headers)
+    commits_list = github_get_pr_commits(owner, repo, pr_number, headers)
+    check_runs = github_get_commit_check_runs(owner, repo, head_sha, headers) if head_sha else []
+    statuses = github_get_commit_statuses(owner, repo, head_sha, headers) if head_sha else []
+    write_batch.wait()
+
+    metadata = _build_pr_metadata(pr, files_metadata, reviews, review_comments, issue_comments, commits_list,
+                                  check_runs, statuses)
+    _write_change_metadata(pr_output_dir, metadata, f"GitHub PR #{pr_number}", f"{owner}/{repo}", on_stored=on_stored)
+    return metadata
+
+
+def _build_pr_metadata(pr, files_metadata, reviews, review_comments, issue_comments, commits_list, check_runs,
+                       statuses):
+    """Assembles the metadata.json record of a PR from its REST-shaped detail payload and fetched sections."""
+    pr_body = pr.get('body')
+    linked_issues = set()
+    if pr_body: linked_issues.update(parse_linked_issues(pr_body))
+    for c in commits_list:
+        if isinstance(c, dict) and c.get('message'):
+            linked_issues.update(parse_linked_issues(c.get('message')))
+    for ic in issue_comments:
+        if isinstance(ic, dict) and ic.get('body'):
+            linked_issues.update(parse_linked_issues(ic.get('body')))
+    for r in reviews:
+        if isinstance(r, dict) and r.get('body'):
+            linked_issues.update(parse_linked_issues(r.get('body')))
+    for rc in review_comments:
+        if isinstance(rc, dict) and rc.get('body'):
+            linked_issues.update(parse_linked_issues(rc.get('body')))
+    first_commit = commits_list[0] if commits_list and isinstance(commits_list[0], dict) else {}
+
+    return {
+        'platform': 'github',
+        'request_type': 'pr',  # Indicate this is a PR
+        'request_id': pr.get('number'),
+        'api_url': pr.get('url'),
+        'html_url': pr.get('html_url'),
+        'state': pr.get('state'),
+        'title': pr.get('title'),
+        'author_login': pr.get('user', {}).get('login', 'ghost'),
+        'author_email': (first_commit.get('author') or {}).get('email'),  # Of the first commit
+        'author_association': pr.get('author_association'),
+        'body': pr_body,
+        'created_at': pr.get('created_at'),
+        'updated_at': pr.get('updated_at'),
+        'closed_at': pr.get('closed_at'),
+        'merged_at': pr.get('merged_at'),
+        'merged_by_login': pr.get('merged_by', {}).get('login') if pr.get('merged_by') is not None else None,
+        'base_branch': pr.get('base', {}).get('ref'),
+        'base_commit_sha': pr.get('base', {}).get('sha'),
+        'head_branch': pr.get('head', {}).get('ref'),
+        'head_repo_full_name': (pr.get('head', {}).get('repo') or {}).get('full_name'),
+        'head_commit_sha': pr.get('head', {}).get('sha'),
+        'reviews': reviews,  # PR reviews
+        'review_comments': review_comments,  # PR inline comments
+        'issue_comments': issue_comments,  # PR issue comments
+        'commits_list': commits_list,  # Commits included in the PR
+        'commits_count': len(commits_list),
+        'check_runs': check_runs,  # Check runs for the head commit
+        'statuses': statuses,  # Statuses for the head commit
+        'linked_issues_parsed': sorted(list(linked_issues)),
+        'changed_files_count': len(files_metadata),
+        'total_additions': sum(f.get('additions', 0) for f in files_metadata),
+        'total_deletions': sum(f.get('deletions', 0) for f in files_metadata),
+        'total_changes': sum(f.get('changes', 0) for f in files_metadata),
+        'changed_files_manifest': files_metadata  # Files changed in the PR
+    }
+
+
+def _catalog_change(catalog, repo_full_name, metadata, label):
+    """Stores a change in the change catalog; a failure is reported but leaves metadata.json as the record."""
+    try:
+        catalog.put_change(repo_full_name, metadata)
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        print(f"\n    Warning: Could not add {label} to the change catalog: {e}")
+
+
+def _write_change_metadata(change_output_dir, metadata, label, repo_full_name=None, on_stored=None):
+    """
+    Queues metadata.json of a PR or merge commit on the artifact writer and, given the repository, its change
+    catalog row. Serialisation and both writes happen on a writer thread, so metadata must not
+    be modified afterwards. The file is written under a temporary name and renamed, so an interrupted run never
+    leaves a truncated one (a change without metadata.json is fetched again); the catalog row is replaced in a
+    single transaction. Errors are reported by the writer thread, which then calls on_stored(success): anything
+    that must only happen once the change is on disk, like marking it done in the fetch journal, goes there.
+    """
+    future = get_artifact_writer().submit(_store_change_metadata, change_output_dir, metadata, label,
+                                          repo_full_name)
+    if on_stored is not None:
+        future.add_done_callback(lambda done: on_stored(done.exception() is None and bool(done.result())))
+
+
+def _store_change_metadata(change_output_dir, metadata, label, repo_full_name):
+    """Writes metadata.json and the catalog row (see _write_change_metadata). Returns True on success."""
+    metadata_filename = os.path.join(change_output_dir, "metadata.json")
+    try:
+        write_atomic(metadata_filename, record_dumps(metadata, indent=True))
+        catalog = get_change_catalog(os.path.dirname(change_output_dir) or '.')
+        if catalog is not None and repo_full_name:
+            _catalog_change(catalog, repo_full_name, metadata, label)
+        return True
+    except IOError as e:
+        print(f"\n    Error writing metadata JSON file {metadata_filename}: {e}")
+    except TypeError as e:
+        print(f"\n    Error serializing metadata JSON for {label}: {e}")
+    except Exception as e:
+        print(f"\n    Unexpected error saving metadata JSON for {label}: {e}")
+    return False
+
+
+def github_enrich_pr_from_graphql(owner, repo, pr_record, headers, file_workers=GITHUB_FILE_WORKERS,
+                                  include_file_contents=True, content_mode=GITHUB_CONTENT_MODE, git_mirror=None,
+                                  on_stored=None):
+    """
+    Completes a PR fetched by the GraphQL backend (see graphql_fetcher.map_pull_request_node) and writes its
+    metadata.json. Reviews, comments, commits and CI results already came with the batched query; only sections
+    that had more items than the query fetched are re-read from REST. Before/after contents and patches are not
+    available over GraphQL, so with include_file_contents the files are processed by github_process_pr_files;
+    otherwise the GraphQL files list is used as the manifest and no content is stored. on_stored is passed on to
+    _write_change_metadata.
+    """
+    pr = pr_record['pr']
+    pr_number = pr['number']
+    incomplete = pr_record.get('incomplete', set())
+    head_sha = pr.get('head', {}).get('sha')
+
+    pr_output_dir = os.path.join(repo_data_dir(owner, repo), f"pr_{pr_number}")
+    os.makedirs(pr_output_dir, exist_ok=True)
+
+    write_batch = WriteBatch()
+    if include_file_contents:
+        files_metadata = github_process_pr_files(owner, repo, pr_number, pr.get('base', {}).get('sha'), head_sha,
+                                                 headers, pr_output_dir, max_workers=file_workers,
+                                                 content_mode=content_mode, git_mirror=git_mirror,
+                                                 write_batch=write_batch)
+    else:
+        if 'files' in incomplete:
+            print(f"    Warning: GraphQL files list of PR #{pr_number} is truncated at {len(pr_record['files'])}.")
+        files_metadata = [dict(f, sha=None, blob_url=None, raw_url=None, patch_saved=False,
+                               content_base_saved=False, content_head_saved=False, previous_filename=None)
+                          for f in pr_record['files']]
+
+    reviews = github_get_pr_reviews(owner, repo, pr_number, headers) \
+        if 'reviews' in incomplete else pr_record['reviews']
+    review_comments = github_get_pr_review_comments(owner, repo, pr_number, headers) \
+        if 'review_comments' in incomplete else pr_record['review_comments']
+    issue_comments = github_get_pr_issue_comments(owner, repo, pr_number, headers) \
+        if 'issue_comments' in incomplete else pr_record['issue_comments']
+    commits_list = github_get_pr_commits(owner, repo, pr_number, headers) \
+        if 'commits_list' in incomplete else pr_record['commits_list']
+    check_runs = github_get_commit_check_runs(owner, repo, head_sha, headers) \
+        if 'check_runs' in incomplete else pr_record['check_runs']
+    statuses = github_get_commit_statuses(owner, repo, head_sha, headers) \
+        if 'statuses' in incomplete else pr_record['statuses']
+    # The status rollup already holds this head's CI results; keep them for merge commits whose parent it is.
+    ci_cache = get_ci_cache()
+    if ci_cache and head_sha:
+        if 'check_runs' not in incomplete:
+            ci_cache.put(owner, repo, head_sha, 'check_runs', check_runs, check_runs_final(check_runs))
+        if 'statuses' not in incomplete:
+            ci_cache.put(owner, repo, head_sha, 'statuses', statuses, statuses_final(statuses))
+    write_batch.wait()
+
+    metadata = _build_pr_metadata(pr, files_metadata, reviews, review_comments, issue_comments, commits_list,
+                                  check_runs, statuses)
+    _write_change_metadata(pr_output_dir, metadata, f"GitHub PR #{pr_number}", f"{owner}/{repo}", on_stored=on_stored)
+    return metadata
+
+
+def github_enrich_merge_commit(owner, repo, commit_info, headers, file_workers=GITHUB_FILE_WORKERS,
+                               content_mode=GITHUB_CONTENT_MODE, git_mirror=None, on_stored=None):
+    """
+    Enriches a merge commit from github_analyze_merge_commits_history with its files, contents and CI results,
+    writes commit_XXXXXXX/metadata.json and returns the enriched dict (or None if it had to be skipped).
+    on_stored is passed on to _write_change_metadata.
+    """
+    commit_sha = commit_info.get('sha')
+    parent_shas = commit_info.get('parent_shas', [])
+    # For merge commits, the base commit for diff is typically the first parent
+    base_sha_for_files = parent_shas[0] if parent_shas else None
+
+    if not commit_sha:
+        print(f"Warning: Skipping merge commit with no SHA: {commit_info}")
+        return None
+
+    # Use short SHA for directory name for brevity
+    commit_output_dir = os.path.join(repo_data_dir(owner, repo), f"commit_{commit_sha[:7]}")
+    os.makedirs(commit_output_dir, exist_ok=True)
+
+    # Get the list of files changed in this specific merge commit
+    if git_mirror is not None:
+        try:
+            files_metadata = git_mirror.changed_files(base_sha_for_files, commit_sha) \
+                if git_mirror.ensure_commits([base_sha_for_files, commit_sha]) else []
+        except GitMirrorError as e:
+            print(f"    Error reading files of commit {commit_sha[:7]} from the git mirror: {e}")
+            files_metadata = []
+    else:
+        # One compare request gives the files, stats and patches against the first parent.
+        files_metadata = github_compare_files_list(owner, repo, base_sha_for_files, commit_sha, headers) \
+            if base_sha_for_files else None
+        if files_metadata is None:
+            files_metadata = github_process_commit_files_list(owner, repo, commit_sha, headers)
+
+    write_batch = WriteBatch()
+    updated_files_metadata = github_save_change_files(
+        owner, repo, files_metadata, base_sha_for_files, commit_sha, headers, commit_output_dir,
+        f"commit {commit_sha[:7]}", max_workers=file_workers, content_mode=content_mode, git_mirror=git_mirror,
+        write_batch=write_batch
+    )
+
+    # Update commit_info with detailed file data and counts
+    commit_info['changed_files_manifest'] = updated_files_metadata
+    commit_info['changed_files_count'] = len(updated_files_metadata)
+    commit_info['total_additions'] = sum(f.get('additions', 0) for f in updated_files_metadata)
+    commit_info['total_deletions'] = sum(f.get('deletions', 0) for f in updated_files_metadata)
+    commit_info['total_changes'] = sum(f.get('changes', 0) for f in updated_files_metadata)
+
+    # Fetch and add check runs and statuses for the merge commit SHA
+    check_runs = github_get_commit_check_runs(owner, repo, commit_sha, headers)
+    statuses = github_get_commit_statuses(owner, repo, commit_sha, headers)
+    commit_info['check_runs'] = check_runs
+    commit_info['statuses'] = statuses
+    write_batch.wait()
+
+    # Parse linked issues from the merge commit message
+    if commit_info.get('message'):
+        commit_info['linked_issues_parsed'] = sorted(list(parse_linked_issues(commit_info.get('message'))))
+    else:
+        commit_info['linked_issues_parsed'] = []
+
+    # Save the enriched metadata for the merge commit
+    _write_change_metadata(commit_output_dir, commit_info, f"commit {commit_sha[:7]}", f"{owner}/{repo}",
+                           on_stored=on_stored)
+
+    return commit_info
+
+
+def _iter_enrichment(enrich_fn, items, max_workers, desc, total=None):
+    """
+    Runs enrich_fn over an iterable of items on a bounded thread pool and yields the non-None results in input
+    order as soon as they are ready. Items are pulled from the iterable only while fewer than 2 * max_workers
+    are in flight, so a streaming listing is consumed at the pace of enrichment.
+    An exception raised for one item is reported and that item is skipped, as the serial loop used to do.
+    total (when known, e.g. from a resumed job's plan) lets the progress bar show progress against the plan.
+    """
+    def safe_enrich(item):
+        try:
+            return enrich_fn(item)
+        except Exception as e:
+            print(f"\n    Unexpected error during '{desc}': {e}. Skipping.")
+            return None
+
+    max_workers = max(1, max_workers)
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, tqdm(desc=desc, total=total) as progress:
+        for item in items:
+            in_flight.append(executor.submit(safe_enrich, item))
+            while len(in_flight) >= 2 * max_workers or (in_flight and in_flight[0].done()):
+                result = in_flight.popleft().result()
+                progress.update(1)
+                if result is not None:
+                    yield result
+        while in_flight:
+            result = in_flight.popleft().result()
+            progress.update(1)
+            if result is not None:
+                yield result
+
+
+def _run_enrichment(enrich_fn, items, max_workers, desc, total=None):
+    """Collects _iter_enrichment into a list."""
+    return list(_iter_enrichment(enrich_fn, items, max_workers, desc, total=total))
 
 
 # --- Main Data Fetching Function ---
 
 def fetch_github_data(owner, repo, pr_state='all', branch_for_merge_history='master', merge_history_since=None,
-                      merge_history_until=None):
+                      merge_history_until=None, max_workers=GITHUB_PR_WORKERS, file_workers=GITHUB_FILE_WORKERS,
+                      incremental=False, pr_since=None, pr_until=None, author_login=None, backend='rest',
+                      content_mode=GITHUB_CONTENT_MODE, data_source='api', resume=True):
     """
     Fetches data for GitHub PRs and identifies and enriches merge commits from history.
+    Up to max_workers PRs (and later merge commits) are enriched concurrently, each fetching up to
+    file_workers files at a time; the output layout and the order of the returned lists are unchanged.
+
+    Everything is stored in the repository's own directory, repo_data_dir(owner, repo). With GITHUB_DATA_REUSE
+    (the default) a stored PR whose updated_at equals the listed one, and a stored merge commit, is loaded from
+    disk instead of being re-enriched, whichever earlier run stored it. Afterwards the returned changes are marked
+    as recently used and, with GITHUB_DATA_QUOTA_BYTES set, least recently used changes of any repository are
+    evicted to keep the data directory within its quota (see data_workspace).
+
+    With incremental=True a per-repo sync manifest in the repository's directory is used: PR listing stops once
+    it reaches PRs older than the manifest's watermark, PRs whose updated_at is unchanged are loaded from their
+    stored metadata.json instead of being re-enriched, and merge commits that are already stored are reused.
+    Older PRs that have been evicted since are fetched again by number.
+
+    pr_since / pr_until (ISO strings, dates or datetimes) restrict PRs to those merged/closed in that window.
+    The listing is sorted by 'updated', so it stops at the first PR updated before pr_since, and PRs outside
+    the window are dropped before any per-PR request is made. A date window takes precedence over the
+    incremental watermark, which is then neither used nor advanced.
+
+    author_login scopes the whole fetch to one developer: PRs are enumerated through the search API
+    (github_search_author_prs) and merge commits through the commits 'author' filter, so other authors'
+    changes are never enriched. Only authorship is matched: PRs the developer merged and merge commits they
+    only committed are not listed, so callers that also look at those roles must not pass author_login.
+    The watermark is not used in this mode either.
+
+    backend='graphql' lists PRs through GraphQL, pulling many PRs per query together with their reviews,
+    comments, commits and status rollup (see graphql_fetcher); only file contents/patches and truncated
+    sections still go through REST. Merge commits are always fetched through REST.
+
+    content_mode chooses how before/after file contents are read: 'contents' (one request per file and side),
+    'archive' (one streamed tarball per commit), 'blobs' (git blobs API by SHA) or 'auto' (archive for large
+    changes); see content_fetcher.github_fetch_contents.
+
+    data_source='git' keeps a bare, blobless mirror of the repository (see git_mirror), refreshes it with
+    git fetch and reads changed files, patches and contents from it; the API is then only used for listings,
+    PR details, reviews, comments, commits and CI results.
+
+    With resume=True (the default) every finished PR and merge commit is recorded in a fetch journal in the
+    repository's directory (see fetch_journal). If a run with the same repository, states, branch, date windows and
+    author is interrupted, the next one resumes it: finished changes are loaded from their metadata.json and
+    only failed or not yet reached ones are fetched.
     """
+    if backend not in FETCH_BACKENDS:
+        raise ValueError(f"Unknown fetch backend '{backend}'. Expected one of {FETCH_BACKENDS}.")
+    if content_mode not in CONTENT_MODES:
+        raise ValueError(f"Unknown content mode '{content_mode}'. Expected one of {CONTENT_MODES}.")
+    if data_source not in DATA_SOURCES:
+        raise ValueError(f"Unknown data source '{data_source}'. Expected one of {DATA_SOURCES}.")
     # Check for the token early
     GITHUB_BOT_ACCESS_TOKEN = os.environ.get('GITHUB_BOT_ACCESS_TOKEN')
+    token_pool = get_token_pool()
+    if token_pool and (not GITHUB_BOT_ACCESS_TOKEN or GITHUB_BOT_ACCESS_TOKEN == 'YOUR_GITHUB_TOKEN'):
+        # Requests get a token from the pool; this one is only the default header and the git mirror's.
+        GITHUB_BOT_ACCESS_TOKEN = token_pool.tokens[0]
     if not GITHUB_BOT_ACCESS_TOKEN or GITHUB_BOT_ACCESS_TOKEN == 'YOUR_GITHUB_TOKEN':
         print("Skipping GitHub data fetching: GITHUB_BOT_ACCESS_TOKEN is not set or is the default placeholder.")
         return [], []
 
+    data_dir = repo_data_dir(owner, repo)
+    fetch_started = time.time()
     print(f"--- Starting GitHub data fetch for {owner}/{repo} ---")
-    print(f"--- Output base directory: {OUTPUT_DIR_BASE} ---")
+    print(f"--- Output directory: {data_dir} ---")
 
-    os.makedirs(OUTPUT_DIR_BASE, exist_ok=True)
+    # Changes stored directly in OUTPUT_DIR_BASE by earlier versions move to their repository's directory.
+    migrate_legacy_layout(OUTPUT_DIR_BASE)
+    os.makedirs(data_dir, exist_ok=True)
 
     headers = {
         'Authorization': f'token {GITHUB_BOT_ACCESS_TOKEN}',
@@ -454,237 +1395,312 @@ def fetch_github_data(owner, repo, pr_state='all', branch_for_merge_history='mas
         'X-GitHub-Api-Version': GITHUB_API_VERSION
     }
 
+    window_start = parse_github_datetime(pr_since)
+    window_end = parse_github_datetime(pr_until, end_of_day=True)
+    date_window_active = window_start is not None or window_end is not None
+    # The watermark describes the full, unfiltered PR listing; a narrowed listing can neither use nor advance it.
+    listing_filtered = date_window_active or bool(author_login)
+    merge_history_since = format_github_datetime(merge_history_since)
+    merge_history_until = format_github_datetime(merge_history_until, end_of_day=True)
+
+    git_mirror = None
+    if data_source == 'git':
+        git_mirror = get_git_mirror(owner, repo, token=GITHUB_BOT_ACCESS_TOKEN)
+        print(f"--- Syncing git mirror {git_mirror.path} ---")
+        try:
+            git_mirror.sync()
+        except GitMirrorError as e:
+            print(f"Could not sync the git mirror ({e}). Falling back to the API for file contents.")
+            git_mirror = None
+
+    content_policy = get_content_policy()
+    if content_policy is not None:
+        # linguist-generated / linguist-vendored / binary rules of the branch apply to every change fetched.
+        try:
+            if git_mirror is not None:
+                gitattributes = git_mirror.read_files(branch_for_merge_history, ['.gitattributes']).get('.gitattributes')
+            else:
+                gitattributes = github_get_file_content(owner, repo, '.gitattributes', branch_for_merge_history, headers)
+        except GitMirrorError as e:
+            print(f"Could not read .gitattributes from the git mirror ({e}). Using the default content policy only.")
+            gitattributes = ""
+        content_policy.load_gitattributes(owner, repo, gitattributes)
+
+    sync_manifest = None
+    if incremental:
+        sync_manifest_path = os.path.join(data_dir, SYNC_MANIFEST_FILE_TEMPLATE.format(owner=owner, repo=repo))
+        sync_manifest = SyncManifest(sync_manifest_path, owner, repo, pr_state)
+        print(f"--- Incremental sync: {len(sync_manifest.prs)} PRs known, watermark {sync_manifest.watermark} ---")
+
+    journal = None
+    if resume:
+        journal_path = os.path.join(data_dir, FETCH_JOURNAL_FILE_TEMPLATE.format(owner=owner, repo=repo))
+        journal = FetchJournal(journal_path, owner, repo, {
+            'pr_state': pr_state, 'branch': branch_for_merge_history, 'merge_history_since': merge_history_since,
+            'merge_history_until': merge_history_until, 'pr_since': format_github_datetime(window_start),
+            'pr_until': format_github_datetime(window_end), 'author_login': author_login}).start()
+        if journal.resumed:
+            prs_done, prs_failed, prs_planned = journal.progress('pr')
+            commits_done, commits_failed, commits_planned = journal.progress('commit')
+            print(f"--- Resuming fetch job started {journal.started_at}: "
+                  f"{prs_done}/{prs_planned if prs_planned is not None else '?'} PRs and "
+                  f"{commits_done}/{commits_planned if commits_planned is not None else '?'} merge commits done, "
+                  f"{prs_failed + commits_failed} failed ones will be retried ---")
+
     # --- Fetch and Process Pull Requests ---
     print(f"\n--- Fetching Pull Requests (state: {pr_state}) ---")
-    pr_api_url = f"https://api.github.com/repos/{owner}/{repo}/pulls"
+    pr_api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls"
     pr_params = {
         'state': pr_state,
         'per_page': GITHUB_PER_PAGE,
         'sort': 'updated',
         'direction': 'desc',
     }
-    pull_requests_list = fetch_paginated_data(pr_api_url, headers=headers, params=pr_params, per_page=GITHUB_PER_PAGE)
-
-    processed_prs_metadata = []
-    if not pull_requests_list:
-        print("No Pull Requests found or error fetching PR list.")
-    else:
-        print(f"Found {len(pull_requests_list)} Pull Requests. Processing details...")
-        for pr_summary in tqdm(pull_requests_list, desc="Processing Pull Requests"):
-            if not isinstance(pr_summary, dict) or 'number' not in pr_summary: continue
-            pr_number = pr_summary['number']
+    def stop_listing(pr_summary):
+        if not isinstance(pr_summary, dict):
+            return False
+        if date_window_active:
+            # A PR merged/closed inside the window was updated at or after window_start.
+            return window_start is not None and not _in_date_window(pr_summary.get('updated_at'), window_start, None)
+        return sync_manifest is not None and sync_manifest.is_before_watermark(pr_summary.get('updated_at'))
+
+    pr_listing_status = {}
+    graphql_pr_records = {}
+
+    def iter_listed_prs():
+        """Yields PR summaries (REST-shaped) in listing order as the listing pages arrive."""
+        if backend == 'graphql':
+            search_query = _search_pr_query(owner, repo, author_login, pr_state, window_start, window_end) \
+                if author_login else None
+            pages = graphql_iter_pr_pages(owner, repo, headers, pr_state=pr_state, search_query=search_query,
+                                          page_sizer=GraphQLPageSizer(), status=pr_listing_status)
+            for page in pages:
+                for pr_record in page:
+                    if not author_login and stop_listing(pr_record['pr']):
+                        pages.close()
+                        pr_listing_status['complete'] = True
+                        return
+                    graphql_pr_records[pr_record['pr']['number']] = pr_record
+                    yield pr_record['pr']
+        elif author_login:
+            # Search results are bisected by date range, so they only come back as a whole.
+            author_prs, pr_listing_status['complete'] = github_search_author_prs(
+                owner, repo, author_login, pr_state=pr_state, since=window_start, until=window_end, headers=headers)
+            yield from author_prs
+        else:
+            yield from iter_paginated_data(
+                pr_api_url, headers=headers, params=pr_params, per_page=GITHUB_PER_PAGE,
+                stop_when=stop_listing if (date_window_active or sync_manifest) else None,
+                status=pr_listing_status, parallel=True
+            )
 
-            pr_output_dir = os.path.join(OUTPUT_DIR_BASE, f"pr_{pr_number}")
-            os.makedirs(pr_output_dir, exist_ok=True)
+    # Only number and updated_at of listed PRs are kept for the sync manifest, not the listing itself.
+    listed_prs = []
+    listing_counts = {'listed': 0}
+    reused_pr_numbers = []  # Appended from worker threads; list.append is atomic
 
-            pr_detail_url = pr_summary.get('url')
-            if not pr_detail_url:
-                print(f"\n    ERROR: Missing 'url' in GitHub PR summary for #{pr_number}. Skipping.")
-                continue
-            pr_detail_response = make_api_request(pr_detail_url, headers=headers, timeout=GITHUB_REQUEST_TIMEOUT)
-            if not pr_detail_response or pr_detail_response.status_code != 200:
-                print(f"\n    ERROR: Failed to fetch full details for GitHub PR #{pr_number}. Skipping.")
+    def iter_prs_in_scope():
+        for pr_summary in iter_listed_prs():
+            listing_counts['listed'] += 1
+            if not isinstance(pr_summary, dict) or 'number' not in pr_summary:
                 continue
-
-            try:
-                pr = pr_detail_response.json()
-                if not isinstance(pr, dict):
-                    print(f"\n    ERROR: Full GitHub PR details for #{pr_number} is not a dictionary. Skipping.")
-                    continue
-            except json.JSONDecodeError as e:
-                print(f"\n    ERROR: Failed to decode JSON for full GitHub PR #{pr_number} details: {e}. Skipping.")
+            if date_window_active and not _in_date_window(_pr_change_date(pr_summary), window_start, window_end):
+                graphql_pr_records.pop(pr_summary['number'], None)
                 continue
-
-            base_sha = pr.get('base', {}).get('sha')
-            head_sha = pr.get('head', {}).get('sha')
-            pr_body = pr.get('body')
-
-            if not base_sha or not head_sha:
-                print(
-                    f"\n    Warning: Missing base_sha ('{base_sha}') or head_sha ('{head_sha}') for PR #{pr_number}. File content fetching might be incomplete.")
-
-            files_metadata = github_process_pr_files(owner, repo, pr_number, base_sha, head_sha, headers, pr_output_dir)
-
-            reviews = github_get_pr_reviews(owner, repo, pr_number, headers)
-            review_comments = github_get_pr_review_comments(owner, repo, pr_number, headers)
-            issue_comments = github_get_pr_issue_comments(owner, repo, pr_number, headers)
-            commits_list = github_get_pr_commits(owner, repo, pr_number, headers)
-            check_runs = github_get_commit_check_runs(owner, repo, head_sha, headers) if head_sha else []
-            statuses = github_get_commit_statuses(owner, repo, head_sha, headers) if head_sha else []
-
-            linked_issues = set()
-            if pr_body: linked_issues.update(parse_linked_issues(pr_body))
-            for c in commits_list:
-                if isinstance(c, dict) and c.get('message'):
-                    linked_issues.update(parse_linked_issues(c.get('message')))
-            for ic in issue_comments:
-                if isinstance(ic, dict) and ic.get('body'):
-                    linked_issues.update(parse_linked_issues(ic.get('body')))
-            for r in reviews:
-                if isinstance(r, dict) and r.get('body'):
-                    linked_issues.update(parse_linked_issues(r.get('body')))
-            for rc in review_comments:
-                if isinstance(rc, dict) and rc.get('body'):
-                    linked_issues.update(parse_linked_issues(rc.get('body')))
-
-            metadata = {
-                'platform': 'github',
-                'request_type': 'pr',  # Indicate this is a PR
-                'request_id': pr_number,
-                'api_url': pr.get('url'),
-                'html_url': pr.get('html_url'),
-                'state': pr.get('state'),
-                'title': pr.get('title'),
-                'author_login': pr.get('user', {}).get('login', 'ghost'),
-                'author_association': pr.get('author_association'),
-                'body': pr_body,
-                'created_at': pr.get('created_at'),
-                'updated_at': pr.get('updated_at'),
-                'closed_at': pr.get('closed_at'),
-                'merged_at': pr.get('merged_at'),
-                'merged_by_login': pr.get('merged_by', {}).get('login') if pr.get('merged_by') is not None else None,
-                'base_branch': pr.get('base', {}).get('ref'),
-                'base_commit_sha': base_sha,
-                'head_branch': pr.get('head', {}).get('ref'),
-                'head_repo_full_name': pr.get('head', {}).get('repo', {}).get('full_name'),
-                'head_commit_sha': head_sha,
-                'reviews': reviews,  # PR reviews
-                'review_comments': review_comments,  # PR inline comments
-                'issue_comments': issue_comments,  # PR issue comments
-                'commits_list': commits_list,  # Commits included in the PR
-                'commits_count': len(commits_list),
-                'check_runs': check_runs,  # Check runs for the head commit
-                'statuses': statuses,  # Statuses for the head commit
-                'linked_issues_parsed': sorted(list(linked_issues)),
-                'changed_files_count': len(files_metadata),
-                'total_additions': sum(f.get('additions', 0) for f in files_metadata),
-                'total_deletions': sum(f.get('deletions', 0) for f in files_metadata),
-                'total_changes': sum(f.get('changes', 0) for f in files_metadata),
-                'changed_files_manifest': files_metadata  # Files changed in the PR
-            }
-
-            metadata_filename = os.path.join(pr_output_dir, "metadata.json")
-            try:
-                with open(metadata_filename, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, indent=2, ensure_ascii=False)
-                processed_prs_metadata.append(metadata)
-            except IOError as e:
-                print(f"\n    Error writing metadata JSON file {metadata_filename}: {e}")
-            except TypeError as e:
-                print(f"\n    Error serializing metadata JSON for GitHub PR #{pr_number}: {e}")
-            except Exception as e:
-                print(f"\n    Unexpected error saving metadata JSON for GitHub PR #{pr_number}: {e}")
+            listed_prs.append((pr_summary['number'], pr_summary.get('updated_at')))
+            yield pr_summary
+
+    def enrich_or_reuse_pr(pr_summary):
+        pr_record = graphql_pr_records.pop(pr_summary['number'], None)
+        unit = f"pr:{pr_summary['number']}"
+        # A PR finished by the interrupted run being resumed is loaded from its stored metadata.
+        if journal and journal.is_done(unit, pr_summary.get('updated_at')):
+            stored_metadata = _read_stored_metadata(os.path.join(data_dir, f"pr_{pr_summary['number']}"),
+                                                    f"{owner}/{repo}")
+            if stored_metadata is not None:
+                journal.mark_resumed()
+                return stored_metadata
+        # A PR whose updated_at is unchanged is loaded from its stored metadata: in incremental mode when the
+        # sync manifest knows it, with GITHUB_DATA_REUSE whichever earlier run stored it.
+        updated_at = pr_summary.get('updated_at')
+        if updated_at and (GITHUB_DATA_REUSE or (sync_manifest and sync_manifest.is_current(pr_summary['number'],
+                                                                                            updated_at))):
+            stored_metadata = _read_stored_metadata(os.path.join(data_dir, f"pr_{pr_summary['number']}"),
+                                                    f"{owner}/{repo}")
+            if stored_metadata is not None and stored_metadata.get('updated_at') == updated_at:
+                reused_pr_numbers.append(pr_summary['number'])
+                if journal:
+                    journal.record(unit, True, updated_at)
+                return stored_metadata
+        # The PR is marked done only once its metadata.json has been written, which the writer reports later.
+        on_stored = (lambda stored: journal.record(unit, stored, updated_at)) if journal else None
+        metadata = None
+        try:
+            if pr_record is not None:
+                metadata = github_enrich_pr_from_graphql(owner, repo, pr_record, headers, file_workers=file_workers,
+                                                         content_mode=content_mode, git_mirror=git_mirror,
+                                                         on_stored=on_stored)
+            else:
+                metadata = github_enrich_pr(owner, repo, pr_summary, headers, file_workers=file_workers,
+                                            content_mode=content_mode, git_mirror=git_mirror, on_stored=on_stored)
+        finally:
+            if journal and metadata is None:
+                journal.record(unit, False, updated_at)
+        return metadata
+
+    # Enrichment starts with the first listed PR; the listing is only read as fast as PRs are processed.
+    print(f"Processing Pull Requests with {max_workers} workers as they are listed...")
+    processed_prs_metadata = _run_enrichment(enrich_or_reuse_pr, iter_prs_in_scope(), max_workers,
+                                             "Processing Pull Requests",
+                                             total=journal.planned['pr'] if journal else None)
+    if journal and pr_listing_status.get('complete'):
+        journal.record_plan('pr', len(listed_prs))
+    if not listed_prs:
+        print("No Pull Requests found or error fetching PR list.")
+    else:
+        print(f"Found {len(listed_prs)} Pull Requests ({listing_counts['listed']} listed).")
+        if date_window_active:
+            print(f"Date window {format_github_datetime(window_start)} .. {format_github_datetime(window_end)}: "
+                  f"{len(listed_prs)} of {listing_counts['listed']} listed PRs fall inside it.")
+        if sync_manifest:
+            print(f"Incremental sync: {len(reused_pr_numbers)} listed PRs unchanged, "
+                  f"{len(listed_prs) - len(reused_pr_numbers)} enriched.")
+        elif reused_pr_numbers:
+            print(f"{len(reused_pr_numbers)} listed PRs unchanged since an earlier run stored them, "
+                  f"{len(listed_prs) - len(reused_pr_numbers)} enriched.")
+
+    if sync_manifest:
+        listed_numbers = set()
+        for metadata in processed_prs_metadata:
+            listed_numbers.add(metadata['request_id'])
+            sync_manifest.record_pr(metadata['request_id'], metadata.get('updated_at'))
+
+        # PRs older than the watermark were not listed this time; reuse what is stored for them.
+        # With a date window or author filter, unlisted PRs are outside the requested scope.
+        older_prs_metadata = []
+        older_pr_numbers = set() if listing_filtered else set(sync_manifest.prs) - listed_numbers
+        evicted_pr_numbers = []
+        for pr_number in sorted(older_pr_numbers, reverse=True):
+            stored_metadata = _read_stored_metadata(os.path.join(data_dir, f"pr_{pr_number}"),
+                                                    f"{owner}/{repo}")
+            if stored_metadata is not None:
+                older_prs_metadata.append(stored_metadata)
+            else:
+                evicted_pr_numbers.append(pr_number)
+        if evicted_pr_numbers:
+            # Evicted by the data quota (or deleted) since they were stored; the listing won't reach them again.
+            print(f"Incremental sync: re-fetching {len(evicted_pr_numbers)} older PRs that are no longer stored.")
+            if journal and journal.planned['pr'] is not None:
+                journal.record_plan('pr', len(listed_prs) + len(evicted_pr_numbers))
+
+            def refetch_pr(pr_number):
+                pr_summary = {'number': pr_number, 'url': f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{pr_number}"}
+                # Journaled like the listed PRs: done once metadata.json is written, failed if enrichment fails.
+                unit, updated_at = f"pr:{pr_number}", sync_manifest.prs.get(pr_number)
+                on_stored = (lambda stored: journal.record(unit, stored, updated_at)) if journal else None
+                metadata = None
+                try:
+                    metadata = github_enrich_pr(owner, repo, pr_summary, headers, file_workers=file_workers,
+                                                content_mode=content_mode, git_mirror=git_mirror, on_stored=on_stored)
+                finally:
+                    if journal and metadata is None:
+                        journal.record(unit, False, updated_at)
+                return metadata
+
+            for metadata in _run_enrichment(refetch_pr, evicted_pr_numbers, max_workers, "Re-fetching evicted PRs"):
+                sync_manifest.record_pr(metadata['request_id'], metadata.get('updated_at'))
+                older_prs_metadata.append(metadata)
+        older_prs_metadata.sort(key=lambda metadata: metadata.get('updated_at') or '', reverse=True)
+        processed_prs_metadata.extend(older_prs_metadata)
+
+        # Only move the watermark forward when the listing completed and every listed PR made it to disk;
+        # otherwise the next run has to list the missing ones again.
+        if listing_filtered:
+            print("Incremental sync: PR listing was filtered by date or author; the watermark is left unchanged.")
+        elif pr_listing_status.get('complete') and all(number in listed_numbers for number, _ in listed_prs):
+            for _, updated_at in listed_prs:
+                sync_manifest.advance_watermark(updated_at)
+        else:
+            print("Incremental sync: PR listing or enrichment was incomplete; the watermark is left unchanged.")
+        sync_manifest.save()
+        print(f"Incremental sync: {len(older_prs_metadata)} older PRs loaded from disk, "
+              f"watermark now {sync_manifest.watermark}.")
 
     # --- Fetch and Process Merge Commits from History ---
-    merge_commits_history_list = github_analyze_merge_commits_history(
+    merge_commit_count = [0]
+
+    def iter_merge_commits():
+        for commit_info in merge_commits_iter:
+            merge_commit_count[0] += 1
+            yield commit_info
+
+    def enrich_or_reuse_merge_commit(commit_info):
+        unit = f"commit:{commit_info.get('sha')}"
+        resumable = bool(journal and commit_info.get('sha') and journal.is_done(unit))
+        # Commits are immutable, so a stored merge commit is reused as is (with GITHUB_DATA_REUSE, in incremental
+        # mode or when resuming).
+        if (GITHUB_DATA_REUSE or incremental or resumable) and commit_info.get('sha'):
+            stored_metadata = _read_stored_metadata(
+                os.path.join(data_dir, f"commit_{commit_info['sha'][:7]}"), f"{owner}/{repo}")
+            if stored_metadata is not None and stored_metadata.get('sha') == commit_info['sha']:
+                if resumable:
+                    journal.mark_resumed()
+                elif journal:
+                    journal.record(unit, True)
+                return stored_metadata
+        on_stored = (lambda stored: journal.record(unit, stored)) if journal else None
+        metadata = None
+        try:
+            metadata = github_enrich_merge_commit(owner, repo, commit_info, headers, file_workers=file_workers,
+                                                  content_mode=content_mode, git_mirror=git_mirror,
+                                                  on_stored=on_stored)
+        finally:
+            if journal and metadata is None:
+                journal.record(unit, False)
+        return metadata
+
+    # Merge commits are enriched as the history pages arrive instead of after the whole history is listed.
+    merge_listing_status = {}
+    merge_commits_iter = github_iter_merge_commits_history(
         owner,
         repo,
         branch=branch_for_merge_history,
         since=merge_history_since,
         until=merge_history_until,
-        headers=headers
+        headers=headers,
+        author=author_login,
+        status=merge_listing_status
     )
-
-    enriched_merge_commits = []
-    if merge_commits_history_list:
-        print(f"\n--- Enriching {len(merge_commits_history_list)} Merge Commits with detailed data ---")
-        for commit_info in tqdm(merge_commits_history_list, desc="Enriching merge commits"):
-            commit_sha = commit_info.get('sha')
-            parent_shas = commit_info.get('parent_shas', [])
-            # For merge commits, the base commit for diff is typically the first parent
-            base_sha_for_files = parent_shas[0] if parent_shas else None
-
-            if not commit_sha:
-                print(f"Warning: Skipping merge commit with no SHA: {commit_info}")
-                continue
-
-            # Use short SHA for directory name for brevity
-            commit_output_dir = os.path.join(OUTPUT_DIR_BASE, f"commit_{commit_sha[:7]}")
-            os.makedirs(commit_output_dir, exist_ok=True)
-
-            # Get the list of files changed in this specific merge commit
-            files_metadata, total_additions, total_deletions, total_changes = github_process_commit_files_list(
-                owner, repo, commit_sha, headers
-            )
-
-            before_dir = os.path.join(commit_output_dir, "before_merge")
-            after_dir = os.path.join(commit_output_dir, "after_merge")
-            patch_dir = os.path.join(commit_output_dir, "changed_files")
-            os.makedirs(before_dir, exist_ok=True)
-            os.makedirs(after_dir, exist_ok=True)
-            os.makedirs(patch_dir, exist_ok=True)
-
-            updated_files_metadata = []
-            for file_info in files_metadata:
-                filename = file_info.get('filename')
-                if not filename: continue
-
-                # Save patch if available
-                patch_content = file_info.pop('patch', None)  # Remove patch from file_info dict after getting it
-                if patch_content:
-                    patch_filename = os.path.basename(filename) + ".patch"
-                    file_info['patch_saved'] = save_file(patch_content, patch_dir, patch_filename)
-                else:
-                    file_info['patch_saved'] = False
-
-                # Fetch and save base content
-                content_base = ""
-                if base_sha_for_files and file_info.get('status') != 'added':
-                    content_base = github_get_file_content(owner, repo, filename, base_sha_for_files, headers)
-                    if content_base:
-                        file_info['content_base_saved'] = save_file(content_base, before_dir, filename)
-                    else:
-                        file_info['content_base_saved'] = False
-                else:
-                    file_info['content_base_saved'] = False  # No base content for added files or if base_sha is missing
-
-                # Fetch and save head content (content at the merge commit SHA)
-                content_head = ""
-                if file_info.get('status') not in ['removed', 'deleted']:
-                    content_head = github_get_file_content(owner, repo, filename, commit_sha, headers)
-                    if content_head:
-                        file_info['content_head_saved'] = save_file(content_head, after_dir, filename)
-                    else:
-                        file_info['content_head_saved'] = False
-                else:
-                    file_info['content_head_saved'] = False  # No head content for removed/deleted files
-
-                updated_files_metadata.append(file_info)
-
-            # Update commit_info with detailed file data and counts
-            commit_info['changed_files_manifest'] = updated_files_metadata
-            commit_info['changed_files_count'] = len(updated_files_metadata)
-            commit_info['total_additions'] = sum(f.get('additions', 0) for f in updated_files_metadata)
-            commit_info['total_deletions'] = sum(f.get('deletions', 0) for f in updated_files_metadata)
-            commit_info['total_changes'] = sum(f.get('changes', 0) for f in updated_files_metadata)
-
-            # Fetch and add check runs and statuses for the merge commit SHA
-            check_runs = github_get_commit_check_runs(owner, repo, commit_sha, headers)
-            statuses = github_get_commit_statuses(owner, repo, commit_sha, headers)
-            commit_info['check_runs'] = check_runs
-            commit_info['statuses'] = statuses
-
-            # Parse linked issues from the merge commit message
-            if commit_info.get('message'):
-                commit_info['linked_issues_parsed'] = sorted(list(parse_linked_issues(commit_info.get('message'))))
-            else:
-                commit_info['linked_issues_parsed'] = []
-
-            # Save the enriched metadata for the merge commit
-            metadata_filename = os.path.join(commit_output_dir, "metadata.json")
-            try:
-                with open(metadata_filename, 'w', encoding='utf-8') as f:
-                    json.dump(commit_info, f, indent=2, ensure_ascii=False)
-            except IOError as e:
-                print(f"    Error writing metadata JSON file {metadata_filename}: {e}")
-            except TypeError as e:
-                print(f"    Error serializing metadata JSON for commit {commit_sha[:7]}: {e}")
-            except Exception as e:
-                print(f"    Unexpected error saving metadata JSON for commit {commit_sha[:7]}: {e}")
-
-            enriched_merge_commits.append(commit_info)
-
-        merge_commits_history_list = enriched_merge_commits  # Update the list with enriched data
+    merge_commits_history_list = _run_enrichment(
+        enrich_or_reuse_merge_commit,
+        iter_merge_commits(),
+        max_workers,
+        "Enriching merge commits",
+        total=journal.planned['commit'] if journal else None
+    )
+    # Every change is on disk before the job is marked complete and the summaries are written.
+    get_artifact_writer().flush()
+    # The returned changes become the most recently used ones; others may make room for them.
+    workspace = get_data_workspace(OUTPUT_DIR_BASE)
+    evicted_changes = []
+    if workspace:
+        try:
+            workspace.record_use(data_dir, f"{owner}/{repo}", processed_prs_metadata + merge_commits_history_list)
+            evicted_changes = workspace.enforce_quota(protected_since=fetch_started)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Could not update the data workspace index: {e}")
+    if journal:
+        if merge_listing_status.get('complete'):
+            journal.record_plan('commit', merge_commit_count[0])
+        prs_done, prs_failed, prs_planned = journal.progress('pr')
+        commits_done, commits_failed, commits_planned = journal.progress('commit')
+        complete = bool(pr_listing_status.get('complete') and merge_listing_status.get('complete')) \
+            and not prs_failed and not commits_failed
+        journal.finish(complete)
+        print(f"--- Fetch job: {prs_done}/{prs_planned if prs_planned is not None else '?'} PRs and "
+              f"{commits_done}/{commits_planned if commits_planned is not None else '?'} merge commits done ({journal.stats['resumed']} resumed from an "
+              f"interrupted run), {prs_failed + commits_failed} failed"
+              f"{'' if complete else '; the next run will resume this job'} ---")
 
     all_changes_summary = []
 
@@ -694,16 +1710,12 @@ def fetch_github_data(owner, repo, pr_state='all', branch_for_merge_history='mas
         change_id = pr_data.get('request_id')
         pr_author_login = pr_data.get('author_login', 'N/A')
         pr_author_name = pr_author_login  # Using login as name for simplicity in summary
-        # Attempt to get email from the first commit in the PR's commit list
-        pr_author_email = 'N/A'
-        if pr_data.get('commits_list'):
-            first_commit = pr_data['commits_list'][0]
-            if isinstance(first_commit, dict) and first_commit.get('author'):
-                pr_author_email = first_commit['author'].get('email', 'N/A')
-
-        change_date_str = pr_data.get('merged_at') or pr_data.get('closed_at') or pr_data.get('updated_at')
+        # The email of the first commit in the PR's commit list
+        pr_author_email = change_author_email(pr_data) or 'N/A'
+
+        change_date_str = _pr_change_date(pr_data)
         change_date = change_date_str  # Keep as string for CSV
-        directory = os.path.join(OUTPUT_DIR_BASE, f"pr_{change_id}")
+        directory = os.path.join(data_dir, f"pr_{change_id}")
         # Add email to the list
         all_changes_summary.append(
             [pr_author_login, pr_author_name, pr_author_email, change_type, change_id, change_date, directory])
@@ -717,12 +1729,12 @@ def fetch_github_data(owner, repo, pr_state='all', branch_for_merge_history='mas
         mc_author_email = mc_data.get('author_email') or 'N/A'  # Get author email for merge commit
 
         change_date = mc_data.get('committer_date') or mc_data.get('author_date')  # Use committer or author date
-        directory = os.path.join(OUTPUT_DIR_BASE, f"commit_{change_id}")
+        directory = os.path.join(data_dir, f"commit_{change_id}")
         # Add email to the list
         all_changes_summary.append(
             [mc_author_login, mc_author_name, mc_author_email, change_type, change_id, change_date, directory])
 
-    summary_filepath = os.path.join(OUTPUT_DIR_BASE, SUMMARY_CSV_FILE)
+    summary_filepath = os.path.join(data_dir, SUMMARY_CSV_FILE)
     try:
         with open(summary_filepath, 'w', newline='', encoding='utf-8') as csvfile:
             csv_writer = csv.writer(csvfile)
@@ -736,18 +1748,44 @@ def fetch_github_data(owner, repo, pr_state='all', branch_for_merge_history='mas
         print(f"Error writing summary CSV file {summary_filepath}: {e}")
     except Exception as e:
         print(f"Unexpected error saving summary CSV: {e}")
+    # The same summary, typed and columnar, for vectorised filtering (see change_summary.filter_changes).
+    summary_parquet_path = os.path.join(data_dir, SUMMARY_PARQUET_FILE)
+    if write_change_summary(summary_parquet_path,
+                            build_change_summary(processed_prs_metadata + merge_commits_history_list,
+                                                 f"{owner}/{repo}")):
+        print(f"Successfully saved columnar summary to {summary_parquet_path}")
 
     print(f"\n--- Finished GitHub data fetch and summary generation for {owner}/{repo}. ---")
-    print(f"--- Data saved in subdirectories within: {OUTPUT_DIR_BASE} ---")
+    print(f"--- Data saved in subdirectories within: {data_dir} ---")
     print(f"--- Summary saved to: {summary_filepath} ---")
 
+    http_cache = get_http_cache()
+    if http_cache:
+        cache_stats = http_cache.stats()
+        print(f"--- HTTP cache: {cache_stats['hits']} hits (304), {cache_stats['misses']} misses, "
+              f"hit rate {cache_stats['hit_rate']:.0%}, {cache_stats['entries']} entries, "
+              f"{cache_stats['size_bytes'] / (1024 * 1024):.1f} MiB ---")
+    ci_cache = get_ci_cache()
+    if ci_cache:
+        print(f"--- CI result cache: {ci_cache.stats['hits']} hits, {ci_cache.stats['misses']} fetched ---")
+    blob_store = get_blob_store(data_dir)
+    if blob_store:
+        print(f"--- Blob store: {blob_store.stats['written']} contents written, "
+              f"{blob_store.stats['reused']} reused from earlier changes ---")
+    if workspace and workspace.max_bytes:
+        print(f"--- Data directory: {workspace.usage() / (1024 * 1024):.1f} of "
+              f"{workspace.max_bytes / (1024 * 1024):.1f} MiB quota used, {len(evicted_changes)} least recently "
+              f"used changes evicted ---")
+
     return processed_prs_metadata, merge_commits_history_list
 
 
 # --- RAG System ---
 class CodeChangeRAG:
     def __init__(self, data_path="github_data_structured"):
-        self.data_path = data_path
+        self.data_path = data_path  # One repository's data directory, see repo_data_dir
+        # Shared file contents referenced by blob SHA from the change manifests
+        self.blob_store = BlobStore(os.path.join(data_path, BLOB_STORE_DIRNAME))
         print("Initializing embeddings model...")
         try:
             ################################################################################################################################
@@ -799,12 +1837,20 @@ class CodeChangeRAG:
                 print(f"Error cleaning up temporary directory {temp_dir} for {change_id}: {e}")
 
     def _load_change_metadata(self, change_dir):
-        """Loads the metadata.json file for a single change (PR or Merge Commit) directory."""
+        """
+        Loads the metadata of a single change (PR or Merge Commit) directory from the change catalog,
+        or from its metadata.json when the catalog does not have it.
+        """
+        catalog = get_change_catalog(self.data_path)
+        if catalog is not None:
+            metadata = catalog.get_change_by_directory(os.path.basename(os.path.normpath(change_dir)))
+            if metadata is not None:
+                return metadata
         metadata_path = os.path.join(change_dir, "metadata.json")
         if not os.path.exists(metadata_path):
             raise FileNotFoundError(f"Metadata file not found in {change_dir}")
-        with open(metadata_path, "r", encoding='utf-8') as f:
-            return json.load(f)
+        with open(metadata_path, "rb") as f:
+            return record_loads(f.read())
 
     def _process_single_change(self, change_dir_name):
         """
@@ -853,6 +1899,8 @@ class CodeChangeRAG:
             print(f"No changed files found in metadata for {change_type.upper()} {full_change_id}.")
             pass
 
+        content_policy = get_content_policy()
+        skipped_files = []
         for file_meta in tqdm(changed_files, desc=f"Processing files for {change_type.upper()} {full_change_id}"):
             if not isinstance(file_meta, dict) or 'filename' not in file_meta:
                 print(
@@ -860,10 +1908,25 @@ class CodeChangeRAG:
                 continue
 
             filename = file_meta["filename"]
+            skip_reason = file_meta.get('skipped')
+            if skip_reason is None and content_policy is not None:
+                # Data fetched before the policy existed (or with it disabled) is filtered here.
+                skip_reason = content_policy.skip_reason(filename)
+            if skip_reason is not None:
+                skipped_files.append((file_meta, skip_reason))
+                continue
             try:
                 # Read code content saved during the fetch process
-                before_code = self._read_code_file(full_path, "before_merge", filename)
-                after_code = self._read_code_file(full_path, "after_merge", filename)
+                before_code = self._read_code_file(full_path, "before_merge", filename,
+                                                   file_meta.get('base_blob_sha'))
+                after_code = self._read_code_file(full_path, "after_merge", filename,
+                                                  file_meta.get('head_blob_sha'))
+                if content_policy is not None:
+                    skip_reason = content_policy.skip_reason_for_content(after_code) or \
+                        content_policy.skip_reason_for_content(before_code)
+                    if skip_reason is not None:
+                        skipped_files.append((file_meta, skip_reason))
+                        continue
                 patch = self._read_patch_file(full_path, filename)
 
                 # Create context string for the file
@@ -877,6 +1940,13 @@ class CodeChangeRAG:
             except Exception as e:
                 print(f"Error processing file {filename} in {change_type.upper()} {full_change_id}: {str(e)}")
 
+        if skipped_files:
+            # The files themselves are not embedded, but the reviewer should still know they changed.
+            skipped_text = "Changed files not indexed (lockfiles, vendored, generated, binary or oversized):\n" + \
+                "\n".join(f"{meta['filename']} ({meta.get('status')}, +{meta.get('additions', 0)}/"
+                          f"-{meta.get('deletions', 0)}, {reason})" for meta, reason in skipped_files)
+            chunks.extend(self.splitter.split_text(skipped_text))
+
         # Add other relevant metadata fields as chunks
         # Only add PR-specific fields if it's a PR
         if change_type == 'pr':
@@ -947,8 +2017,18 @@ class CodeChangeRAG:
         self.change_databases[full_change_id] = vector_db
         return vector_db
 
-    def _read_code_file(self, change_path, dir_name, filename):
-        """Reads content from a code file within a change directory."""
+    def _read_code_file(self, change_path, dir_name, filename, blob_sha=None):
+        """
+        Reads content from a code file of a change: from the blob store when the manifest references a blob,
+        otherwise from the change archive or, for data written without one, the change directory.
+        """
+        if blob_sha:
+            content = self.blob_store.get(blob_sha)
+            if content is not None:
+                return content
+        archive = get_change_archive(change_path)
+        if archive is not None:
+            return archive.get(content_member(dir_name, filename)) or ""
         file_path = os.path.join(change_path, dir_name, filename)
         if os.path.exists(file_path):
             try:
@@ -960,8 +2040,11 @@ class CodeChangeRAG:
         return ""
 
     def _read_patch_file(self, change_path, filename):
-        """Reads content from a patch file within a change directory."""
-        # Patch files are named after the base filename
+        """Reads the patch of a file from the change archive, or from a loose patch file within the change directory."""
+        archive = get_change_archive(change_path)
+        if archive is not None:
+            return archive.get(patch_member(filename)) or ""
+        # Loose patch files are named after the base filename
         patch_path = os.path.join(change_path, "changed_files", os.path.basename(filename) + ".patch")
         if os.path.exists(patch_path):
             try:
@@ -1192,8 +2275,10 @@ class CodeChangeRAG:
                         continue
 
                     filename = file_meta["filename"]
-                    before_code = self._read_code_file(full_path, "before_merge", filename)
-                    after_code = self._read_code_file(full_path, "after_merge", filename)
+                    before_code = self._read_code_file(full_path, "before_merge", filename,
+                                                       file_meta.get('base_blob_sha'))
+                    after_code = self._read_code_file(full_path, "after_merge", filename,
+                                                      file_meta.get('head_blob_sha'))
                     patch = self._read_patch_file(full_path, filename)
 
                     # Create context string for the file, including coder info
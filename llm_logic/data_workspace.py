@@ -0,0 +1,366 @@
+import os
+import re
+import json
+import time
+import shutil
+import sqlite3
+import threading
+import logging
+from urllib.parse import urlparse
+
+from .blob_store import BLOB_STORE_DIRNAME
+from .change_catalog import get_change_catalog, change_directory_name
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for everything stored under the data directory; least recently used changes are evicted beyond it.
+# 0 disables the quota.
+GITHUB_DATA_QUOTA_BYTES = int(os.environ.get('GITHUB_DATA_QUOTA_BYTES', 0))
+# Reuse any stored change whose updated_at (for merge commits: SHA) matches the listing, whichever run stored it.
+GITHUB_DATA_REUSE = os.environ.get('GITHUB_DATA_REUSE', '1') == '1'
+WORKSPACE_DB_FILE = "workspace.sqlite3"  # In the data directory, next to the <host> directories
+# Change directories that earlier versions stored directly in the data directory, for every repository alike
+LEGACY_CHANGE_DIR_PATTERN = re.compile(r'^(?:pr_\d+|commit_[0-9a-f]{7})$')
+
+
+def api_host(api_url):
+    """
+    The host part of the data layout for a REST API base URL: github.com for api.github.com, the server name for
+    GitHub Enterprise ('https://ghe.example.com/api/v3' -> ghe.example.com). A port is kept as host_port.
+    """
+    netloc = (urlparse(api_url).netloc or 'api.github.com').lower()
+    if netloc == 'api.github.com':
+        return 'github.com'
+    if netloc.startswith('api.') and netloc.endswith('.ghe.com'):
+        netloc = netloc[len('api.'):]
+    return netloc.replace(':', '_')
+
+
+def repository_dir(data_root, host, owner, repo):
+    """Directory holding one repository's changes, catalog, blobs, summaries, journal and sync manifest."""
+    return os.path.join(data_root, host, owner, repo)
+
+
+def _legacy_change_repository(metadata):
+    """(host, owner, repo) of a change stored in the legacy flat layout, read from its GitHub URLs, or None."""
+    for key in ('html_url', 'commit_url'):
+        parsed = urlparse(metadata.get(key) or '')
+        parts = parsed.path.strip('/').split('/')
+        if parsed.netloc and len(parts) >= 3 and parts[2] in ('pull', 'commit'):
+            return parsed.netloc.lower().replace(':', '_'), parts[0], parts[1]
+    return None
+
+
+_migrated_roots = set()
+_migrated_roots_lock = threading.Lock()
+
+
+def migrate_legacy_layout(data_root):
+    """
+    Moves change directories stored directly in data_root by earlier versions (pr_N / commit_XXXXXXX) to the
+    <host>/<owner>/<repo> directory of the repository their metadata.json links to, so they are reused instead of
+    fetched again. Runs once per data directory and process; directories whose repository can't be told, or
+    whose new location is already taken, are left in place with a warning. Returns how many were moved.
+    """
+    with _migrated_roots_lock:
+        if data_root in _migrated_roots:
+            return 0
+        _migrated_roots.add(data_root)
+        if not os.path.isdir(data_root):
+            return 0
+        moved, left = 0, []
+        for entry in os.scandir(data_root):
+            if not entry.is_dir() or not LEGACY_CHANGE_DIR_PATTERN.match(entry.name):
+                continue
+            try:
+                with open(os.path.join(entry.path, "metadata.json"), 'rb') as f:
+                    metadata = json.loads(f.read())
+                location = _legacy_change_repository(metadata) if isinstance(metadata, dict) else None
+            except (IOError, ValueError):
+                location = None
+            target = os.path.join(repository_dir(data_root, *location), entry.name) if location else None
+            if target is None or os.path.exists(target):
+                left.append(entry.name)
+                continue
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(entry.path, target)
+                moved += 1
+            except OSError as e:
+                logger.warning(f"Could not move {entry.path} to {target}: {e}")
+                left.append(entry.name)
+        if moved:
+            logger.info(f"Moved {moved} changes stored by an earlier version from {data_root} to their "
+                        f"<host>/<owner>/<repo> directories.")
+        if left:
+            logger.warning(f"{len(left)} change directories in {data_root} use the layout of an earlier version and "
+                           f"were not moved (e.g. {left[0]}); they are not read and can be deleted.")
+        return moved
+
+
+def _tree_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _files_size(path):
+    """Bytes used by the files directly in path, without its subdirectories."""
+    total = 0
+    try:
+        for entry in os.scandir(path):
+            try:
+                if entry.is_file():
+                    total += entry.stat().st_size
+            except OSError:
+                pass
+    except OSError:
+        pass
+    return total
+
+
+def _manifest_blob_shas(metadata):
+    shas = set()
+    for file_meta in metadata.get('changed_files_manifest') or []:
+        if isinstance(file_meta, dict):
+            shas.update(sha for sha in (file_meta.get('base_blob_sha'), file_meta.get('head_blob_sha')) if sha)
+    return shas
+
+
+class DataWorkspace:
+    """
+    Index of the changes stored under a data directory laid out as <host>/<owner>/<repo>/, used as a persistent
+    cache across runs and repositories.
+
+    Every change a fetch returns is recorded with its size (its own directory plus the blobs its manifest
+    references) and the time it was last used. When the data directory outgrows max_bytes, whole changes are
+    evicted least-recently-used first: the directory and catalog rows go, then blobs no remaining change of that
+    repository references.
+    """
+
+    def __init__(self, data_root, max_bytes=GITHUB_DATA_QUOTA_BYTES):
+        self.data_root = data_root
+        self.max_bytes = max_bytes
+        self.db_path = os.path.join(data_root, WORKSPACE_DB_FILE)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {'evicted': 0, 'freed_bytes': 0}
+
+        os.makedirs(data_root, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS changes (
+                    directory TEXT PRIMARY KEY,
+                    repo_dir TEXT NOT NULL,
+                    repo TEXT NOT NULL,
+                    change_type TEXT NOT NULL,
+                    change_id TEXT NOT NULL,
+                    dir_size INTEGER NOT NULL,
+                    blob_size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS changes_last_used ON changes (last_used)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS blob_stores (
+                    repo_dir TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL
+                )""")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _relative(self, path):
+        return os.path.relpath(path, self.data_root).replace(os.sep, '/')
+
+    def record_use(self, data_dir, repo_full_name, changes):
+        """
+        Records the changes (metadata dicts or ChangeRecords) of one repository stored under data_dir as used
+        now, with their current sizes, and refreshes the size of that repository's blob store. A ChangeRecord
+        reused without loading its details keeps the blob size already indexed for it, so its manifest is not read.
+        """
+        blob_root = os.path.join(data_dir, BLOB_STORE_DIRNAME)
+        now = time.time()
+        conn = self._connection()
+        indexed_blob_sizes = dict(conn.execute("SELECT directory, blob_size FROM changes WHERE repo_dir = ?",
+                                               (self._relative(data_dir),)).fetchall())
+        rows = []
+        for metadata in changes:
+            change_dir = os.path.join(data_dir, change_directory_name(metadata))
+            if not os.path.isdir(change_dir):
+                continue
+            blob_size = indexed_blob_sizes.get(self._relative(change_dir))
+            if blob_size is None or getattr(metadata, 'details_loaded', True):
+                blob_size = 0
+                for sha in _manifest_blob_shas(metadata):
+                    try:
+                        blob_size += os.path.getsize(os.path.join(blob_root, sha[:2], sha[2:]))
+                    except OSError:
+                        pass
+            rows.append((self._relative(change_dir), self._relative(data_dir), repo_full_name,
+                         metadata.get('request_type'), str(metadata.get('request_id')), _tree_size(change_dir),
+                         blob_size, now))
+        with self._lock, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO changes (directory, repo_dir, repo, change_type, change_id, dir_size, "
+                "blob_size, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO blob_stores (repo_dir, size) VALUES (?, ?)",
+                         (self._relative(data_dir), _tree_size(blob_root)))
+        return len(rows)
+
+    def usage(self):
+        """
+        Bytes used by the indexed changes, the blob stores of their repositories and the files kept next to them
+        (change catalog with its -wal/-shm files, CSV and Parquet summaries, journal, sync manifest), plus this
+        index itself. The repository files are measured on each call; they can't be evicted but count toward the
+        quota all the same.
+        """
+        conn = self._connection()
+        changes = conn.execute("SELECT COALESCE(SUM(dir_size), 0) FROM changes").fetchone()[0]
+        blobs = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blob_stores").fetchone()[0]
+        repo_dirs = [row[0] for row in conn.execute(
+            "SELECT repo_dir FROM changes UNION SELECT repo_dir FROM blob_stores")]
+        files = _files_size(self.data_root) + sum(_files_size(os.path.join(self.data_root, repo_dir))
+                                                  for repo_dir in repo_dirs)
+        return changes + blobs + files
+
+    def enforce_quota(self, protected_since=None):
+        """
+        Evicts least-recently-used changes until usage is back under 90% of max_bytes and returns the evicted
+        changes as (repo, change_type, change_id) tuples. Changes used at or after protected_since (e.g. the
+        start of the current fetch) are kept even if that leaves the data directory over its quota.
+        """
+        if not self.max_bytes or self.max_bytes <= 0:
+            return []
+        usage = self.usage()
+        if usage <= self.max_bytes:
+            return []
+        target = int(self.max_bytes * 0.9)
+        conn = self._connection()
+        evicted = []
+        with self._lock:
+            while usage > target:
+                # Freed bytes are estimated from each change's directory and blobs (blobs shared with other
+                # changes stay), so evict about enough, collect unreferenced blobs and measure again.
+                candidates = conn.execute(
+                    "SELECT directory, repo_dir, repo, change_type, change_id, dir_size, blob_size FROM changes "
+                    "WHERE last_used < ? ORDER BY last_used ASC",
+                    (protected_since if protected_since is not None else float('inf'),)).fetchall()
+                if not candidates:
+                    break
+                estimated = usage
+                touched_repos = {}
+                for directory, change_repo_dir, repo, change_type, change_id, dir_size, blob_size in candidates:
+                    if estimated <= target:
+                        break
+                    self._evict_change(directory, repo_dir=change_repo_dir, repo=repo, change_type=change_type,
+                                       change_id=change_id)
+                    evicted.append((repo, change_type, change_id))
+                    touched_repos[change_repo_dir] = repo
+                    estimated -= dir_size + blob_size
+                for change_repo_dir, repo in touched_repos.items():
+                    self._collect_blobs(change_repo_dir, repo, protected_since)
+                previous, usage = usage, self.usage()
+                if usage >= previous:
+                    break
+            self.stats['evicted'] += len(evicted)
+        if evicted:
+            logger.info(f"Data quota: evicted {len(evicted)} changes; {usage} of {self.max_bytes} bytes used.")
+        if usage > self.max_bytes:
+            logger.warning(f"Data directory {self.data_root} uses {usage} bytes, over its quota of "
+                           f"{self.max_bytes}, with only recently used changes left.")
+        return evicted
+
+    def _evict_change(self, directory, repo_dir, repo, change_type, change_id):
+        change_dir = os.path.join(self.data_root, directory)
+        freed = _tree_size(change_dir)
+        shutil.rmtree(change_dir, ignore_errors=True)
+        catalog = get_change_catalog(os.path.join(self.data_root, repo_dir))
+        if catalog is not None:
+            try:
+                catalog.delete_change(repo, change_type, change_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not remove evicted change {directory} from the change catalog: {e}")
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM changes WHERE directory = ?", (directory,))
+        self.stats['freed_bytes'] += freed
+
+    def _referenced_blobs(self, repo_dir, repo):
+        """Blob SHAs referenced by the manifests of the changes still stored for a repository."""
+        data_dir = os.path.join(self.data_root, repo_dir)
+        referenced = set()
+        for entry in os.scandir(data_dir):
+            metadata_path = os.path.join(entry.path, "metadata.json")
+            if not entry.is_dir() or not os.path.exists(metadata_path):
+                continue
+            try:
+                with open(metadata_path, 'rb') as f:
+                    referenced.update(_manifest_blob_shas(json.loads(f.read())))
+            except (IOError, ValueError) as e:
+                # Without its manifest this change's blobs can't be told apart; keep every blob.
+                logger.warning(f"Not collecting blobs of {repo}: could not read {metadata_path}: {e}")
+                return None
+        return referenced
+
+    def _collect_blobs(self, repo_dir, repo, protected_since=None):
+        """
+        Deletes the blobs of a repository no stored change references and updates its blob store size. Blobs
+        written or reused at or after protected_since are kept: the change they belong to may not have its
+        metadata.json on disk yet, as that is written in the background.
+        """
+        blob_root = os.path.join(self.data_root, repo_dir, BLOB_STORE_DIRNAME)
+        referenced = self._referenced_blobs(repo_dir, repo) if os.path.isdir(blob_root) else None
+        if referenced is not None:
+            for prefix in os.listdir(blob_root):
+                prefix_dir = os.path.join(blob_root, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for name in os.listdir(prefix_dir):
+                    if prefix + name in referenced:
+                        continue
+                    path = os.path.join(prefix_dir, name)
+                    try:
+                        blob_stat = os.stat(path)
+                        if protected_since is not None and blob_stat.st_mtime >= protected_since:
+                            continue
+                        os.remove(path)
+                        self.stats['freed_bytes'] += blob_stat.st_size
+                    except OSError as e:
+                        logger.warning(f"Could not remove blob {path}: {e}")
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO blob_stores (repo_dir, size) VALUES (?, ?)",
+                         (repo_dir, _tree_size(blob_root)))
+
+
+_workspaces = {}
+_workspaces_lock = threading.Lock()
+_failed_roots = set()
+
+
+def get_data_workspace(data_root):
+    """Returns the DataWorkspace of a data directory, or None if its index can't be opened."""
+    with _workspaces_lock:
+        if data_root in _failed_roots:
+            return None
+        if data_root not in _workspaces:
+            try:
+                _workspaces[data_root] = DataWorkspace(data_root)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not open the data workspace index in {data_root}: {e}. "
+                               f"Changes will not be evicted.")
+                _failed_roots.add(data_root)
+                return None
+        return _workspaces[data_root]
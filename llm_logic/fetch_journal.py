@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+import threading
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+FETCH_JOURNAL_VERSION = 1
+FETCH_JOURNAL_KINDS = ('pr', 'commit')
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FetchJournal:
+    """
+    Durable journal of one fetch job, so an interrupted run (timeout, rate limit, Streamlit rerun) can resume.
+
+    The journal is an append-only JSON-lines file. Its first line describes the job (the parameters that decide
+    which changes are fetched); every PR or merge commit that finishes appends one line marking it done or failed,
+    flushed and fsynced before the next unit is reported, so a crash loses at most the units in flight. A unit
+    counts as finished only when it is marked done and its metadata.json exists. A run with the same parameters
+    resumes an unfinished job: finished units are loaded from disk, failed and missing ones are fetched again.
+    Once a job completes without failures the next run starts a new one.
+    """
+
+    def __init__(self, path, owner, repo, job_params):
+        self.path = path
+        self.repo = f"{owner}/{repo}"
+        self.job_params = job_params
+        self.job_key = hashlib.sha256(json.dumps(job_params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        self.started_at = None
+        self.resumed = False
+        self.units = {}  # 'pr:<number>' / 'commit:<sha>' -> {'status', 'updated_at'}
+        self.planned = dict.fromkeys(FETCH_JOURNAL_KINDS)
+        self.stats = {'resumed': 0, 'done': 0, 'failed': 0}
+        self._lock = threading.Lock()
+        self._file = None
+        self._intact_size = 0  # Bytes of the journal up to the end of its last complete line
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                lines = f.readlines()
+        except IOError as e:
+            logger.warning(f"Ignoring unreadable fetch journal {self.path}: {e}")
+            return
+        entries = []
+        for line in lines:
+            if not line.endswith(b'\n'):
+                break  # A torn last line from a crash; everything before it is intact
+            try:
+                entries.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                break
+            self._intact_size += len(line)
+        if not entries:
+            return
+        job = entries[0]
+        if (job.get('event') != 'job' or job.get('version') != FETCH_JOURNAL_VERSION or job.get('repo') != self.repo
+                or job.get('job_key') != self.job_key):
+            return
+        if any(entry.get('event') == 'complete' for entry in entries):
+            return
+        self.resumed = True
+        self.started_at = job.get('started_at')
+        for entry in entries[1:]:
+            if entry.get('event') == 'unit':
+                self.units[entry['unit']] = {'status': entry.get('status'), 'updated_at': entry.get('updated_at')}
+            elif entry.get('event') == 'plan':
+                self.planned[entry['kind']] = entry.get('count')
+
+    def start(self):
+        """Opens the journal for appending, writing a new job header unless an unfinished job is resumed."""
+        try:
+            if self.resumed:
+                # Cut off a torn tail first, or the next entry would be glued onto it and lost with it.
+                if os.path.getsize(self.path) > self._intact_size:
+                    os.truncate(self.path, self._intact_size)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            else:
+                self.started_at = _now()
+                self._file = open(self.path, 'w', encoding='utf-8')
+                self._append({'event': 'job', 'version': FETCH_JOURNAL_VERSION, 'repo': self.repo,
+                              'job_key': self.job_key, 'params': self.job_params, 'started_at': self.started_at})
+        except IOError as e:
+            logger.warning(f"Could not open fetch journal {self.path}: {e}. The fetch will not be resumable.")
+            self._file = None
+        return self
+
+    def _append(self, entry):
+        if self._file is None:
+            return
+        with self._lock:
+            try:
+                self._file.write(json.dumps(entry, default=str) + "\n")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except (IOError, OSError) as e:
+                logger.warning(f"Could not write to fetch journal {self.path}: {e}")
+
+    def is_done(self, unit, updated_at=None):
+        """True when unit was finished by this job (and, if updated_at is given, at exactly that updated_at)."""
+        entry = self.units.get(unit)
+        return bool(entry) and entry['status'] == 'done' and (updated_at is None or entry['updated_at'] == updated_at)
+
+    def mark_resumed(self):
+        with self._lock:
+            self.stats['resumed'] += 1
+
+    def record(self, unit, done, updated_at=None):
+        status = 'done' if done else 'failed'
+        with self._lock:
+            self.units[unit] = {'status': status, 'updated_at': updated_at}
+            self.stats[status] += 1
+        self._append({'event': 'unit', 'unit': unit, 'status': status, 'updated_at': updated_at, 'at': _now()})
+
+    def record_plan(self, kind, count):
+        """Records how many units of a kind ('pr' or 'commit') the job covers once its listing is complete."""
+        self.planned[kind] = count
+        self._append({'event': 'plan', 'kind': kind, 'count': count})
+
+    def progress(self, kind):
+        """Returns (done, failed, planned) for one kind of unit; planned is None until its listing completed."""
+        prefix = f"{kind}:"
+        statuses = [entry['status'] for unit, entry in self.units.items() if unit.startswith(prefix)]
+        return statuses.count('done'), statuses.count('failed'), self.planned[kind]
+
+    def finish(self, complete):
+        """Closes the journal; a complete job is marked so that the next run starts afresh."""
+        if complete:
+            self._append({'event': 'complete', 'finished_at': _now()})
+        if self._file is not None:
+            self._file.close()
+            self._file = None
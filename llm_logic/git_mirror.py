@@ -0,0 +1,214 @@
+import os
+import base64
+import subprocess
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+GIT_MIRROR_DIR = os.environ.get('GITHUB_GIT_MIRROR_DIR', '.git_mirrors')
+GIT_REMOTE_URL_TEMPLATE = os.environ.get('GITHUB_GIT_REMOTE_URL_TEMPLATE', 'https://github.com/{owner}/{repo}.git')
+GIT_COMMAND_TIMEOUT = int(os.environ.get('GITHUB_GIT_COMMAND_TIMEOUT', 1800))  # Seconds, long for first clones
+# Branches plus the head of every PR, which GitHub publishes under refs/pull/<n>/head.
+GIT_MIRROR_REFSPECS = ('+refs/heads/*:refs/heads/*', '+refs/pull/*/head:refs/pull/*/head')
+GIT_FILE_STATUSES = {'A': 'added', 'D': 'removed', 'M': 'modified', 'R': 'renamed', 'C': 'copied', 'T': 'changed'}
+NULL_SHA = '0' * 40
+
+
+class GitMirrorError(Exception):
+    pass
+
+
+class GitMirror:
+    """
+    Bare, blobless (--filter=blob:none) local mirror of one repository.
+
+    Commits and trees are fetched up front; blobs are fetched by git on demand the first time a diff or
+    cat-file needs them and stay local afterwards. Changed files, patches and before/after contents are read
+    with git diff and git cat-file --batch instead of per-file API calls. remote_url can be any URL git
+    understands, including a local path, so the mirror works against local repositories.
+    """
+
+    def __init__(self, remote_url, path, token=None, blobless=True):
+        self.remote_url = remote_url
+        self.path = path
+        self.blobless = blobless
+        self._fetch_lock = threading.Lock()
+        self._env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+        if token:
+            # Passed through the environment so the token is neither written to the mirror's config nor
+            # visible in the process list.
+            credentials = base64.b64encode(f"x-access-token:{token}".encode('utf-8')).decode('ascii')
+            self._env.update({'GIT_CONFIG_COUNT': '1', 'GIT_CONFIG_KEY_0': 'http.extraHeader',
+                              'GIT_CONFIG_VALUE_0': f"Authorization: Basic {credentials}"})
+
+    @classmethod
+    def for_github(cls, owner, repo, token=None, base_dir=GIT_MIRROR_DIR):
+        return cls(GIT_REMOTE_URL_TEMPLATE.format(owner=owner, repo=repo),
+                   os.path.join(base_dir, f"{owner}_{repo}.git"), token=token)
+
+    def _git(self, *args, input=None, check=True):
+        try:
+            result = subprocess.run(['git', '--git-dir', self.path, *args], input=input, capture_output=True,
+                                    env=self._env, timeout=GIT_COMMAND_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise GitMirrorError(f"git {args[0]} failed: {e}") from e
+        if check and result.returncode != 0:
+            raise GitMirrorError(f"git {args[0]} failed: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        return result
+
+    # --- Synchronisation ---
+
+    def sync(self):
+        """Creates the mirror on first use, then fetches new commits of all branches and PR heads."""
+        with self._fetch_lock:
+            if not os.path.isdir(self.path):
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                clone_args = ['clone', '--bare', '--quiet']
+                if self.blobless:
+                    clone_args.append('--filter=blob:none')
+                logger.info(f"Creating git mirror of {self.remote_url} in {self.path}")
+                try:
+                    result = subprocess.run(['git', *clone_args, self.remote_url, self.path], capture_output=True,
+                                            env=self._env, timeout=GIT_COMMAND_TIMEOUT)
+                except (OSError, subprocess.TimeoutExpired) as e:
+                    raise GitMirrorError(f"git clone failed: {e}") from e
+                if result.returncode != 0:
+                    raise GitMirrorError(
+                        f"git clone failed: {result.stderr.decode('utf-8', errors='replace').strip()}")
+            self._git('fetch', '--quiet', '--prune', '--no-write-fetch-head', 'origin', *GIT_MIRROR_REFSPECS)
+
+    def has_commit(self, sha):
+        return bool(sha) and self._git('cat-file', '-e', f"{sha}^{{commit}}", check=False).returncode == 0
+
+    def ensure_commits(self, shas):
+        """
+        Makes sure the given commits are present, fetching the missing ones by SHA (e.g. heads of PRs from
+        forks that were force-pushed since the last sync). Returns True if all of them are available.
+        """
+        missing = [sha for sha in dict.fromkeys(shas) if sha and not self.has_commit(sha)]
+        if not missing:
+            return True
+        with self._fetch_lock:
+            missing = [sha for sha in missing if not self.has_commit(sha)]
+            if missing:
+                self._git('fetch', '--quiet', '--no-write-fetch-head', 'origin', *missing, check=False)
+        return all(self.has_commit(sha) for sha in missing)
+
+    def merge_base(self, base_sha, head_sha):
+        result = self._git('merge-base', base_sha, head_sha, check=False)
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode('ascii').strip() or None
+
+    # --- Change extraction ---
+
+    def _diff_patches(self, base_sha, head_sha):
+        """Per-file patches of the diff, in git's file order, reduced to the hunks like GitHub's 'patch' field."""
+        output = self._git('diff', '-M', '--no-color', '--no-ext-diff', '--patch', base_sha, head_sha).stdout
+        patches = []
+        current = None
+        for line in output.decode('utf-8', errors='replace').split('\n'):
+            if line.startswith('diff --git '):
+                if current is not None:
+                    patches.append(current)
+                current = []
+            elif current is not None and (current or line.startswith('@@')):
+                current.append(line)
+        if current is not None:
+            patches.append(current)
+        return ["\n".join(lines).rstrip('\n') or None for lines in patches]
+
+    def changed_files(self, base_sha, head_sha):
+        """
+        Files changed between two commits, shaped like entries of GitHub's PR files / commit files API
+        (filename, status, additions, deletions, changes, sha, previous_filename, patch).
+        """
+        raw = self._git('diff', '--raw', '-z', '-M', '--no-abbrev', base_sha, head_sha).stdout.decode(
+            'utf-8', errors='surrogateescape').split('\0')
+        numstat = self._git('diff', '--numstat', '-z', '-M', base_sha, head_sha).stdout.decode(
+            'utf-8', errors='surrogateescape').split('\0')
+
+        files = []
+        i = 0
+        while i < len(raw) and raw[i].startswith(':'):
+            _old_mode, _new_mode, old_sha, new_sha, status = raw[i][1:].split(' ')
+            if status[0] in 'RC':
+                previous_filename, filename = raw[i + 1], raw[i + 2]
+                i += 3
+            else:
+                previous_filename, filename = None, raw[i + 1]
+                i += 2
+            files.append({
+                'filename': filename,
+                'status': GIT_FILE_STATUSES.get(status[0], 'modified'),
+                'sha': new_sha if new_sha != NULL_SHA else old_sha,  # Blob SHA
+                'base_sha': old_sha if old_sha != NULL_SHA else None,
+                'previous_filename': previous_filename,
+                'blob_url': None,
+                'raw_url': None,
+            })
+
+        stats = []
+        j = 0
+        while j < len(numstat) and numstat[j]:
+            additions, deletions, path = numstat[j].split('\t', 2)
+            # Renames have an empty path followed by the old and new names as separate fields.
+            j += 3 if path == '' else 1
+            stats.append((0 if additions == '-' else int(additions), 0 if deletions == '-' else int(deletions)))
+
+        patches = self._diff_patches(base_sha, head_sha)
+        for index, f in enumerate(files):
+            additions, deletions = stats[index] if index < len(stats) else (0, 0)
+            f['additions'], f['deletions'], f['changes'] = additions, deletions, additions + deletions
+            f['patch'] = patches[index] if index < len(patches) else None
+        return files
+
+    def read_files(self, commit_sha, paths):
+        """
+        Returns {path: content} for the given paths at commit_sha through a single git cat-file --batch process;
+        paths that do not exist at that commit map to ''.
+        """
+        paths = list(dict.fromkeys(p for p in paths if p))
+        if not paths or not commit_sha:
+            return {}
+        # One request per line, so a name containing a newline can't be asked for; git diff -z can report one.
+        requested = [path for path in paths if '\n' not in path]
+        contents = {path: "" for path in paths}
+        request = "".join(f"{commit_sha}:{path}\n" for path in requested).encode('utf-8')
+        output = self._git('cat-file', '--batch=%(objectname) %(objecttype) %(objectsize)', input=request).stdout
+
+        # Replies come in request order: '<sha> <type> <size>' followed by the content and a newline, or
+        # '<commit>:<path> missing' (or 'ambiguous'), which repeats the path and so may contain any number of spaces.
+        offset = 0
+        for path in requested:
+            header_end = output.find(b'\n', offset)
+            if header_end < 0:
+                raise GitMirrorError(f"git cat-file ended before the reply for {path}")
+            header = output[offset:header_end]
+            offset = header_end + 1
+            if header.endswith((b' missing', b' ambiguous')):
+                continue
+            try:
+                _object_name, object_type, size = header.split(b' ')
+                size = int(size)
+            except ValueError as e:
+                raise GitMirrorError(f"Unexpected git cat-file reply for {path}: {header!r}") from e
+            data = output[offset:offset + size]
+            offset += size + 1  # Content is followed by a newline
+            if object_type == b'blob':
+                contents[path] = data.decode('utf-8', errors='replace')
+        return contents
+
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def get_git_mirror(owner, repo, token=None):
+    """Returns the process-wide GitMirror of owner/repo (not synced; call sync() before use)."""
+    key = (owner, repo)
+    with _mirrors_lock:
+        if key not in _mirrors:
+            _mirrors[key] = GitMirror.for_github(owner, repo, token=token)
+        return _mirrors[key]
@@ -0,0 +1,382 @@
+import os
+import time
+import logging
+from datetime import datetime, timezone
+
+from .api_request import make_graphql_request, GITHUB_API_URL
+
+logger = logging.getLogger(__name__)
+
+GITHUB_GRAPHQL_URL = os.environ.get('GITHUB_GRAPHQL_URL', f"{GITHUB_API_URL}/graphql")
+GRAPHQL_MAX_PRS_PER_QUERY = 50
+GRAPHQL_INITIAL_PRS_PER_QUERY = 10
+GRAPHQL_TARGET_COST = int(os.environ.get('GITHUB_GRAPHQL_TARGET_COST', 25))  # Points per query to aim for
+GRAPHQL_MIN_REMAINING = 100  # Below this many points, wait for the reset instead of issuing the next query
+
+# Nested connection sizes. A connection that has more items than this is reported as incomplete and the
+# caller falls back to the REST endpoint for that section of that PR only.
+GRAPHQL_FILES_PER_PR = 100
+GRAPHQL_REVIEWS_PER_PR = 50
+GRAPHQL_THREADS_PER_PR = 30
+GRAPHQL_COMMENTS_PER_THREAD = 20
+GRAPHQL_ISSUE_COMMENTS_PER_PR = 100
+GRAPHQL_COMMITS_PER_PR = 100
+GRAPHQL_CONTEXTS_PER_COMMIT = 100
+
+PR_FIELDS = f"""
+    number
+    url
+    title
+    body
+    state
+    createdAt
+    updatedAt
+    closedAt
+    mergedAt
+    authorAssociation
+    author {{ login }}
+    mergedBy {{ login }}
+    baseRefName
+    baseRefOid
+    headRefName
+    headRefOid
+    headRepository {{ nameWithOwner }}
+    files(first: {GRAPHQL_FILES_PER_PR}) {{
+      pageInfo {{ hasNextPage }}
+      nodes {{ path additions deletions changeType }}
+    }}
+    reviews(first: {GRAPHQL_REVIEWS_PER_PR}) {{
+      pageInfo {{ hasNextPage }}
+      nodes {{ databaseId author {{ login }} state submittedAt body commit {{ oid }} }}
+    }}
+    reviewThreads(first: {GRAPHQL_THREADS_PER_PR}) {{
+      pageInfo {{ hasNextPage }}
+      nodes {{
+        comments(first: {GRAPHQL_COMMENTS_PER_THREAD}) {{
+          pageInfo {{ hasNextPage }}
+          nodes {{
+            databaseId author {{ login }} body path position originalPosition
+            commit {{ oid }} originalCommit {{ oid }} createdAt updatedAt replyTo {{ databaseId }}
+          }}
+        }}
+      }}
+    }}
+    comments(first: {GRAPHQL_ISSUE_COMMENTS_PER_PR}) {{
+      pageInfo {{ hasNextPage }}
+      nodes {{ databaseId author {{ login }} body createdAt updatedAt }}
+    }}
+    commits(first: {GRAPHQL_COMMITS_PER_PR}) {{
+      pageInfo {{ hasNextPage }}
+      nodes {{
+        commit {{
+          oid message
+          author {{ name email date user {{ login }} }}
+          committer {{ name email date user {{ login }} }}
+          parents(first: 2) {{ nodes {{ oid }} }}
+        }}
+      }}
+    }}
+    headCommit: commits(last: 1) {{
+      nodes {{
+        commit {{
+          statusCheckRollup {{
+            contexts(first: {GRAPHQL_CONTEXTS_PER_COMMIT}) {{
+              pageInfo {{ hasNextPage }}
+              nodes {{
+                __typename
+                ... on CheckRun {{
+                  name status conclusion startedAt completedAt
+                  checkSuite {{ app {{ name owner {{ login }} }} }}
+                }}
+                ... on StatusContext {{ context state description targetUrl createdAt creator {{ login }} }}
+              }}
+            }}
+          }}
+        }}
+      }}
+    }}
+"""
+
+REPOSITORY_PRS_QUERY = f"""
+query RepositoryPullRequests($owner: String!, $name: String!, $first: Int!, $after: String,
+                             $states: [PullRequestState!]) {{
+  rateLimit {{ cost remaining resetAt }}
+  repository(owner: $owner, name: $name) {{
+    pullRequests(first: $first, after: $after, states: $states, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{ {PR_FIELDS} }}
+    }}
+  }}
+}}
+"""
+
+SEARCH_PRS_QUERY = f"""
+query SearchPullRequests($query: String!, $first: Int!, $after: String) {{
+  rateLimit {{ cost remaining resetAt }}
+  search(query: $query, type: ISSUE, first: $first, after: $after) {{
+    pageInfo {{ hasNextPage endCursor }}
+    nodes {{ ... on PullRequest {{ {PR_FIELDS} }} }}
+  }}
+}}
+"""
+
+PR_STATES = {
+    'open': ['OPEN'],
+    'closed': ['CLOSED', 'MERGED'],
+    'all': None,
+}
+FILE_CHANGE_TYPES = {
+    'ADDED': 'added',
+    'DELETED': 'removed',
+    'MODIFIED': 'modified',
+    'RENAMED': 'renamed',
+    'COPIED': 'copied',
+    'CHANGED': 'changed',
+}
+# Errors after which the same page is retried with fewer PRs per query
+GRAPHQL_SHRINK_ERRORS = ('MAX_NODE_LIMIT_EXCEEDED', 'RESOURCE_LIMITS_EXCEEDED', 'timeout', 'timed out',
+                         'Something went wrong')
+
+
+class GraphQLPageSizer:
+    """
+    Chooses how many PRs to request per GraphQL query.
+
+    GitHub charges GraphQL queries in points derived from the nested connection sizes (and caps nodes and
+    execution time per query). The sizer keeps the observed cost per PR, sizes the next page so a query costs
+    about target_cost points, halves the page after a node-limit/timeout error, and waits for the reset when
+    the remaining point budget gets low.
+    """
+
+    def __init__(self, initial_size=GRAPHQL_INITIAL_PRS_PER_QUERY, max_size=GRAPHQL_MAX_PRS_PER_QUERY,
+                 target_cost=GRAPHQL_TARGET_COST, min_remaining=GRAPHQL_MIN_REMAINING):
+        self.size = initial_size
+        self.max_size = max_size
+        self.target_cost = target_cost
+        self.min_remaining = min_remaining
+        self.cost_per_pr = None
+        self.remaining = None
+        self.reset_at = None
+
+    def observe(self, rate_limit, page_size):
+        """Feeds back the rateLimit block of a successful query."""
+        if not isinstance(rate_limit, dict):
+            return
+        cost = rate_limit.get('cost')
+        self.remaining = rate_limit.get('remaining')
+        self.reset_at = rate_limit.get('resetAt')
+        if cost and page_size:
+            self.cost_per_pr = cost / page_size
+            self.size = max(1, min(self.max_size, int(self.target_cost / self.cost_per_pr)))
+
+    def shrink(self):
+        """
+        Halves the page size after a failed query and keeps it as the new ceiling, so later cost
+        observations do not grow the page back into the limit. Returns False when it cannot shrink any further.
+        """
+        if self.size <= 1:
+            return False
+        self.size = max(1, self.size // 2)
+        self.max_size = self.size
+        return True
+
+    def wait_if_exhausted(self):
+        if self.remaining is None or self.remaining >= self.min_remaining or not self.reset_at:
+            return
+        try:
+            reset_epoch = datetime.strptime(self.reset_at, '%Y-%m-%dT%H:%M:%SZ').replace(
+                tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            return
+        wait = reset_epoch - time.time() + 1
+        if wait > 0:
+            logger.warning(f"GraphQL budget low ({self.remaining} points left), waiting {wait:.0f}s for the reset")
+            time.sleep(wait)
+            self.remaining = None
+
+
+def _login(actor, default=None):
+    return actor.get('login', default) if isinstance(actor, dict) else default
+
+
+def _nodes(connection):
+    if not isinstance(connection, dict):
+        return []
+    return [node for node in connection.get('nodes') or [] if isinstance(node, dict)]
+
+
+def _has_more(connection):
+    return isinstance(connection, dict) and bool((connection.get('pageInfo') or {}).get('hasNextPage'))
+
+
+def _lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+def _map_git_actor(actor):
+    if not isinstance(actor, dict):
+        return None
+    return {'name': actor.get('name'), 'email': actor.get('email'), 'date': actor.get('date')}
+
+
+def map_pull_request_node(node, owner, repo):
+    """
+    Converts one PullRequest node into the shapes the REST helpers produce:
+    'pr' looks like the REST PR detail payload, the other keys match github_get_pr_reviews & co.
+    'incomplete' lists the sections that had more items than the query fetched.
+    """
+    number = node.get('number')
+    state = _lower(node.get('state'))
+    incomplete = set()
+
+    files = []
+    for f in _nodes(node.get('files')):
+        additions, deletions = f.get('additions', 0), f.get('deletions', 0)
+        files.append({'filename': f.get('path'), 'status': FILE_CHANGE_TYPES.get(f.get('changeType'), 'modified'),
+                      'additions': additions, 'deletions': deletions, 'changes': additions + deletions})
+    if _has_more(node.get('files')):
+        incomplete.add('files')
+
+    reviews = [{'id': r.get('databaseId'), 'user': _login(r.get('author'), 'ghost'), 'state': r.get('state'),
+                'submitted_at': r.get('submittedAt'), 'body': r.get('body'),
+                'commit_id': (r.get('commit') or {}).get('oid')}
+               for r in _nodes(node.get('reviews'))]
+    if _has_more(node.get('reviews')):
+        incomplete.add('reviews')
+
+    review_comments = []
+    for thread in _nodes(node.get('reviewThreads')):
+        for c in _nodes(thread.get('comments')):
+            review_comments.append({
+                'id': c.get('databaseId'), 'user': _login(c.get('author'), 'ghost'), 'body': c.get('body'),
+                'path': c.get('path'), 'position': c.get('position'), 'original_position': c.get('originalPosition'),
+                'commit_id': (c.get('commit') or {}).get('oid'),
+                'original_commit_id': (c.get('originalCommit') or {}).get('oid'),
+                'created_at': c.get('createdAt'), 'updated_at': c.get('updatedAt'),
+                'in_reply_to_id': (c.get('replyTo') or {}).get('databaseId')})
+        if _has_more(thread.get('comments')):
+            incomplete.add('review_comments')
+    if _has_more(node.get('reviewThreads')):
+        incomplete.add('review_comments')
+    review_comments.sort(key=lambda c: c.get('id') or 0)
+
+    issue_comments = [{'id': c.get('databaseId'), 'user': _login(c.get('author'), 'ghost'), 'body': c.get('body'),
+                       'created_at': c.get('createdAt'), 'updated_at': c.get('updatedAt')}
+                      for c in _nodes(node.get('comments'))]
+    if _has_more(node.get('comments')):
+        incomplete.add('issue_comments')
+
+    commits_list = []
+    for commit_node in _nodes(node.get('commits')):
+        commit = commit_node.get('commit') or {}
+        commits_list.append({
+            'sha': commit.get('oid'), 'message': commit.get('message'),
+            'author': _map_git_actor(commit.get('author')), 'committer': _map_git_actor(commit.get('committer')),
+            'api_author_login': _login((commit.get('author') or {}).get('user')),
+            'api_committer_login': _login((commit.get('committer') or {}).get('user')),
+            'parents': [p.get('oid') for p in _nodes(commit.get('parents')) if p.get('oid')]})
+    if _has_more(node.get('commits')):
+        incomplete.add('commits_list')
+
+    check_runs, statuses = [], []
+    head_commits = _nodes(node.get('headCommit'))
+    rollup = ((head_commits[0].get('commit') or {}).get('statusCheckRollup') if head_commits else None) or {}
+    for context in _nodes(rollup.get('contexts')):
+        if context.get('__typename') == 'CheckRun':
+            app = (context.get('checkSuite') or {}).get('app') or {}
+            check_runs.append({'name': context.get('name'), 'status': _lower(context.get('status')),
+                               'conclusion': _lower(context.get('conclusion')),
+                               'started_at': context.get('startedAt'), 'completed_at': context.get('completedAt'),
+                               'app_owner': _login(app.get('owner')), 'app_name': app.get('name')})
+        elif context.get('__typename') == 'StatusContext':
+            statuses.append({'context': context.get('context'), 'state': _lower(context.get('state')),
+                             'description': context.get('description'), 'target_url': context.get('targetUrl'),
+                             'creator_login': _login(context.get('creator')),
+                             'created_at': context.get('createdAt'), 'updated_at': context.get('createdAt')})
+    if _has_more(rollup.get('contexts')):
+        incomplete.update(('check_runs', 'statuses'))
+
+    pr = {
+        'number': number,
+        'url': f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{number}",
+        'html_url': node.get('url'),
+        'state': 'open' if state == 'open' else 'closed',
+        'title': node.get('title'),
+        'user': {'login': _login(node.get('author'), 'ghost')},
+        'author_association': node.get('authorAssociation'),
+        'body': node.get('body'),
+        'created_at': node.get('createdAt'),
+        'updated_at': node.get('updatedAt'),
+        'closed_at': node.get('closedAt'),
+        'merged_at': node.get('mergedAt'),
+        'merged_by': {'login': _login(node.get('mergedBy'))} if node.get('mergedBy') else None,
+        'base': {'ref': node.get('baseRefName'), 'sha': node.get('baseRefOid')},
+        'head': {'ref': node.get('headRefName'), 'sha': node.get('headRefOid'),
+                 'repo': {'full_name': (node.get('headRepository') or {}).get('nameWithOwner')}},
+    }
+    return {
+        'pr': pr,
+        'files': files,
+        'reviews': reviews,
+        'review_comments': review_comments,
+        'issue_comments': issue_comments,
+        'commits_list': commits_list,
+        'check_runs': check_runs,
+        'statuses': statuses,
+        'incomplete': incomplete,
+    }
+
+
+def graphql_iter_pr_pages(owner, repo, headers, pr_state='all', search_query=None, page_sizer=None,
+                          url=GITHUB_GRAPHQL_URL, status=None):
+    """
+    Yields pages (lists) of mapped PRs, newest update first, pulling many PRs with all their sections per query.
+    With search_query the PRs come from the search connection (e.g. 'repo:o/r is:pr author:x') instead of
+    repository.pullRequests. Stops on the last page or when a query fails even at one PR per page;
+    the caller can stop early by closing the generator. If a status dict is given, status['complete']
+    is set once the last page has been yielded.
+    """
+    if status is not None:
+        status['complete'] = False
+    page_sizer = page_sizer or GraphQLPageSizer()
+    cursor = None
+    while True:
+        page_sizer.wait_if_exhausted()
+        page_size = page_sizer.size
+        if search_query:
+            query = SEARCH_PRS_QUERY
+            variables = {'query': search_query, 'first': page_size, 'after': cursor}
+        else:
+            query = REPOSITORY_PRS_QUERY
+            variables = {'owner': owner, 'name': repo, 'first': page_size, 'after': cursor,
+                         'states': PR_STATES.get(pr_state)}
+
+        payload = make_graphql_request(url, query, variables, headers)
+        data = (payload or {}).get('data') or {}
+        errors = (payload or {}).get('errors') or []
+        connection = data.get('search') if search_query else (data.get('repository') or {}).get('pullRequests')
+
+        if payload is None or (errors and connection is None):
+            error_text = "; ".join(str(e.get('message', e)) if isinstance(e, dict) else str(e) for e in errors)
+            error_types = " ".join(str(e.get('type', '')) for e in errors if isinstance(e, dict))
+            retryable = payload is None or any(marker in error_text or marker in error_types
+                                               for marker in GRAPHQL_SHRINK_ERRORS)
+            if retryable and page_sizer.shrink():
+                logger.warning(f"GraphQL query for {page_size} PRs failed ({error_text or 'no response'}); "
+                               f"retrying with {page_sizer.size}")
+                continue
+            logger.error(f"GraphQL PR query failed: {error_text or 'no response'}. Stopping.")
+            return
+        if errors:
+            logger.warning(f"GraphQL returned partial data with errors: {errors}")
+
+        page_sizer.observe(data.get('rateLimit'), page_size)
+        nodes = [node for node in _nodes(connection) if node.get('number') is not None]
+        yield [map_pull_request_node(node, owner, repo) for node in nodes]
+
+        page_info = connection.get('pageInfo') or {}
+        if not page_info.get('hasNextPage') or not page_info.get('endCursor'):
+            if status is not None:
+                status['complete'] = True
+            return
+        cursor = page_info['endCursor']
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENABLED = os.environ.get('GITHUB_HTTP_CACHE', '1') == '1'
+HTTP_CACHE_DIR = os.environ.get('GITHUB_HTTP_CACHE_DIR', '.github_http_cache')
+HTTP_CACHE_MAX_BYTES = int(os.environ.get('GITHUB_HTTP_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+HTTP_CACHE_DB_FILE = "http_cache.sqlite3"
+# Response headers that are kept with the body so a cached response behaves like the original
+# (pagination links, content type, validators).
+CACHED_RESPONSE_HEADERS = ('Content-Type', 'Link', 'ETag', 'Last-Modified', 'X-GitHub-Media-Type')
+# Request headers that select a different representation of the same URL and therefore belong in the key.
+# Authorization is deliberately left out: a cached body is only served after GitHub answers 304 to a
+# conditional request made with the current credentials.
+KEY_REQUEST_HEADERS = ('Accept', 'X-GitHub-Api-Version')
+
+
+class HttpCache:
+    """
+    Persistent conditional-request cache for GitHub GET responses.
+
+    Stores the body and validators (ETag / Last-Modified) per request key in a SQLite file.
+    make_api_request sends them back as If-None-Match / If-Modified-Since; GitHub answers 304
+    (not counted against the rate limit) when nothing changed and the stored body is served instead.
+    Entries are evicted least-recently-used once the stored bodies exceed max_bytes.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.db_path = os.path.join(cache_dir, HTTP_CACHE_DB_FILE)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'bytes_saved': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        conn.commit()
+        self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _connection(self):
+        """SQLite connections are not shared between threads, so each worker thread gets its own."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(url, params=None, headers=None):
+        """Builds the cache key from the URL, the query parameters and the representation-selecting headers."""
+        headers = headers or {}
+        key_parts = {
+            'url': url,
+            'params': sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None),
+            'headers': [(h, headers.get(h)) for h in KEY_REQUEST_HEADERS],
+        }
+        return hashlib.sha256(json.dumps(key_parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        """Returns the stored entry for key as a dict, or None."""
+        row = self._connection().execute(
+            "SELECT url, etag, last_modified, headers, body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {'key': key, 'url': row[0], 'etag': row[1], 'last_modified': row[2],
+                'headers': json.loads(row[3]), 'body': row[4]}
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Returns the If-None-Match / If-Modified-Since headers to revalidate a stored entry."""
+        conditional = {}
+        if entry.get('etag'):
+            conditional['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            conditional['If-Modified-Since'] = entry['last_modified']
+        return conditional
+
+    def build_response(self, entry, original_response=None):
+        """
+        Rebuilds a 200 requests.Response from a stored entry after a 304.
+        Headers of the 304 itself (rate-limit counters etc.) are merged in without replacing the stored ones.
+        """
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = entry['url']
+        response._content = entry['body']
+        response.encoding = 'utf-8'
+        headers = CaseInsensitiveDict(entry['headers'])
+        if original_response is not None:
+            for name, value in original_response.headers.items():
+                if name.lower() not in ('content-length', 'content-encoding', 'transfer-encoding'):
+                    headers.setdefault(name, value)
+            response.request = original_response.request
+            response.elapsed = original_response.elapsed
+        response.headers = headers
+        response.from_cache = True
+
+        self._connection().execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), entry['key']))
+        self._connection().commit()
+        with self._lock:
+            self._stats['hits'] += 1
+            self._stats['bytes_saved'] += len(entry['body'])
+        return response
+
+    def record_miss(self):
+        with self._lock:
+            self._stats['misses'] += 1
+
+    def store(self, key, response):
+        """Stores a 200 response that carries at least one validator; other responses are not cacheable."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code != 200 or not (etag or last_modified):
+            return False
+
+        body = response.content
+        size = len(body)
+        if size > self.max_bytes:
+            return False
+        headers = {h: response.headers[h] for h in CACHED_RESPONSE_HEADERS if h in response.headers}
+
+        conn = self._connection()
+        previous = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, url, etag, last_modified, headers, body, size, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, response.url, etag, last_modified, json.dumps(headers), sqlite3.Binary(body), size, time.time()))
+        conn.commit()
+
+        with self._lock:
+            self._stats['stores'] += 1
+            self._total_bytes += size - (previous[0] if previous else 0)
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+        return True
+
+    def _evict(self):
+        """Drops least-recently-used entries until the cache is back under 90% of max_bytes."""
+        target = int(self.max_bytes * 0.9)
+        conn = self._connection()
+        with self._lock:
+            freed = 0
+            evicted = 0
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall():
+                if self._total_bytes - freed <= target:
+                    break
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                freed += size
+                evicted += 1
+            conn.commit()
+            self._total_bytes -= freed
+            self._stats['evictions'] += evicted
+        if evicted:
+            logger.info(f"HTTP cache evicted {evicted} entries ({freed} bytes)")
+
+    def stats(self):
+        """Returns hit/miss counters for this process plus the current size of the cache."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size_bytes'] = self._total_bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['entries'] = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return stats
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM responses")
+        conn.commit()
+        with self._lock:
+            self._total_bytes = 0
+
+
+_cache = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    """Returns the shared HttpCache, or None when caching is disabled (GITHUB_HTTP_CACHE=0)."""
+    global _cache, _cache_failed
+    if not HTTP_CACHE_ENABLED or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = HttpCache()
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"Could not open HTTP cache in {HTTP_CACHE_DIR}: {e}. Caching disabled.")
+                    _cache_failed = True
+                    return None
+    return _cache
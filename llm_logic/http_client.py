@@ -0,0 +1,249 @@
+import os
+import asyncio
+import threading
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Pool sizes and timeouts can be tuned per deployment through the environment
+# or at runtime through configure_http_client().
+HTTP_POOL_CONNECTIONS = int(os.environ.get('GITHUB_HTTP_POOL_CONNECTIONS', 4))  # Number of hosts kept pooled
+HTTP_POOL_MAXSIZE = int(os.environ.get('GITHUB_HTTP_POOL_MAXSIZE', 32))  # Keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('GITHUB_HTTP_CONNECT_TIMEOUT', 10))
+HTTP_READ_TIMEOUT = float(os.environ.get('GITHUB_HTTP_READ_TIMEOUT', 100))
+# 'requests' (pooled HTTP/1.1 session) or 'httpx' (AsyncGitHubClient, HTTP/2 when 'h2' is installed)
+HTTP_BACKEND = os.environ.get('GITHUB_HTTP_BACKEND', 'requests').lower()
+HTTP_ASYNC_HTTP2 = os.environ.get('GITHUB_HTTP_ASYNC_HTTP2', '1') == '1'
+HTTP_USER_AGENT = 'llm-coding-challenge'
+
+_config = {
+    'pool_connections': HTTP_POOL_CONNECTIONS,
+    'pool_maxsize': HTTP_POOL_MAXSIZE,
+    'connect_timeout': HTTP_CONNECT_TIMEOUT,
+    'read_timeout': HTTP_READ_TIMEOUT,
+    'backend': HTTP_BACKEND,
+    'async_http2': HTTP_ASYNC_HTTP2,
+}
+HTTP_BACKENDS = ('requests', 'httpx')
+_session = None
+_session_lock = threading.Lock()
+_async_bridge = None
+
+
+def configure_http_client(pool_connections=None, pool_maxsize=None, connect_timeout=None, read_timeout=None,
+                          backend=None, async_http2=None):
+    """
+    Overrides the shared client settings. The pooled session and the async backend are rebuilt on next use,
+    so this should be called before a fetch starts rather than in the middle of one.
+    """
+    if backend is not None and backend.lower() not in HTTP_BACKENDS:
+        raise ValueError(f"Unknown HTTP backend {backend!r}; expected one of {', '.join(HTTP_BACKENDS)}")
+    overrides = {
+        'pool_connections': pool_connections,
+        'pool_maxsize': pool_maxsize,
+        'connect_timeout': connect_timeout,
+        'read_timeout': read_timeout,
+        'backend': backend.lower() if backend is not None else None,
+        'async_http2': async_http2,
+    }
+    with _session_lock:
+        _config.update({k: v for k, v in overrides.items() if v is not None})
+    close_http_client()
+
+
+def get_http_timeout(read_timeout=None):
+    """Returns the (connect, read) timeout tuple used for requests made through the shared client."""
+    return _config['connect_timeout'], read_timeout if read_timeout is not None else _config['read_timeout']
+
+
+def get_session():
+    """
+    Returns the process-wide requests.Session. It keeps a pool of keep-alive connections per host,
+    so the thousands of API calls a fetch makes reuse a handful of TCP+TLS connections.
+    The session is safe to share between the enrichment worker threads.
+    """
+    global _session
+    if _session is not None:
+        return _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=_config['pool_connections'],
+                                  pool_maxsize=_config['pool_maxsize'],
+                                  pool_block=False)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'Accept-Encoding': 'gzip, deflate',
+                'Connection': 'keep-alive',
+                'User-Agent': HTTP_USER_AGENT,
+            })
+            _session = session
+            logger.info(f"Created pooled HTTP session (pool_connections={_config['pool_connections']}, "
+                        f"pool_maxsize={_config['pool_maxsize']})")
+    return _session
+
+
+def send_request(method, url, **kwargs):
+    """
+    Sends one request through the configured backend and returns a requests.Response, so the scheduler,
+    the token pool and the HTTP cache work the same on either backend. kwargs are those of requests.Session.request
+    (headers, params, json, timeout); streaming downloads always use get_session() directly.
+    """
+    if _config['backend'] == 'httpx':
+        return _get_async_bridge().request(method, url, **kwargs)
+    return get_session().request(method, url, **kwargs)
+
+
+def close_http_client():
+    """Closes the shared session, the async backend and their pooled connections."""
+    global _session, _async_bridge
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        bridge, _async_bridge = _async_bridge, None
+    if bridge is not None:
+        bridge.close()
+
+
+class AsyncGitHubClient:
+    """
+    Optional asyncio backend built on httpx. Uses HTTP/2 (one multiplexed connection to api.github.com)
+    when the 'h2' package is installed and falls back to pooled HTTP/1.1 otherwise.
+    Fetches use it through send_request() with GITHUB_HTTP_BACKEND=httpx; asyncio callers should go through
+    api_request.async_make_api_request so that pacing, the ETag cache and the token pool still apply.
+
+    Usage:
+        async with AsyncGitHubClient() as client:
+            response = await client.get(url, headers=headers)
+    """
+
+    def __init__(self, max_connections=None, http2=None):
+        self.max_connections = max_connections or _config['pool_maxsize']
+        self.http2 = _config['async_http2'] if http2 is None else http2
+        self._client = None
+
+    async def __aenter__(self):
+        try:
+            import httpx
+        except ImportError as e:
+            raise RuntimeError("The async HTTP backend requires the 'httpx' package.") from e
+
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("Package 'h2' is not installed; async HTTP client falls back to HTTP/1.1.")
+                http2 = False
+
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+            timeout=httpx.Timeout(_config['read_timeout'], connect=_config['connect_timeout']),
+            headers={'Accept-Encoding': 'gzip, deflate', 'User-Agent': HTTP_USER_AGENT},
+        )
+        logger.info(f"Created async HTTP client (http2={http2}, max_connections={self.max_connections})")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def request(self, method, url, headers=None, params=None, json=None, timeout=None):
+        """Issues a request; the returned httpx.Response exposes status_code, headers, links and json()."""
+        if self._client is None:
+            raise RuntimeError("AsyncGitHubClient must be used as an async context manager.")
+        if timeout is None:
+            return await self._client.request(method, url, headers=headers, params=params, json=json)
+        return await self._client.request(method, url, headers=headers, params=params, json=json, timeout=timeout)
+
+    async def get(self, url, headers=None, params=None, timeout=None):
+        return await self.request('GET', url, headers=headers, params=params, timeout=timeout)
+
+    async def post(self, url, headers=None, json=None, timeout=None):
+        return await self.request('POST', url, headers=headers, json=json, timeout=timeout)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _get_async_bridge():
+    global _async_bridge
+    if _async_bridge is not None:
+        return _async_bridge
+    with _session_lock:
+        if _async_bridge is None:
+            _async_bridge = _AsyncBridge()
+    return _async_bridge
+
+
+class _AsyncBridge:
+    """
+    Runs one AsyncGitHubClient on a private event loop thread so the synchronous fetch workers can share its
+    HTTP/2 connection. Responses are converted to requests.Response and httpx transport errors to the
+    requests exceptions the RequestScheduler retries on.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='github-http-async', daemon=True)
+        self._thread.start()
+        self._client = AsyncGitHubClient()
+        try:
+            self._run(self._client.__aenter__())
+        except Exception:
+            self._stop()
+            raise
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def request(self, method, url, headers=None, params=None, json=None, timeout=None):
+        import httpx
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        try:
+            response = self._run(self._client.request(method, url, headers=headers, params=params, json=json,
+                                                      timeout=timeout))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        return _to_requests_response(response)
+
+    def close(self):
+        try:
+            self._run(self._client.aclose())
+        finally:
+            self._stop()
+
+    def _stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def _to_requests_response(response):
+    """Copies a fully read httpx.Response into a requests.Response; the body is already decoded by httpx."""
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.reason = response.reason_phrase
+    converted.url = str(response.url)
+    converted.headers = CaseInsensitiveDict({name: value for name, value in response.headers.items()
+                                             if name.lower() not in ('content-encoding', 'content-length')})
+    converted._content = response.content
+    converted.encoding = response.encoding
+    converted.elapsed = response.elapsed
+    converted.request = requests.Request(response.request.method, str(response.request.url),
+                                         headers=dict(response.request.headers)).prepare()
+    return converted
+
@@ -0,0 +1,843 @@
+"""
+Local stand-in for the GitHub API, serving a synthetic repository.
+
+Lets the fetchers be exercised and benchmarked offline (see benchmark.py):
+
+    repo_model = SyntheticRepo('acme', 'widgets', pr_count=50, files_per_pr=5)
+    with MockGitHubServer(repo_model, port=8765, latency=0.02) as server:
+        ...  # with GITHUB_API_URL=http://127.0.0.1:8765 set before the fetchers were imported
+
+Only the REST endpoints, GraphQL queries and fields the fetchers in this package use are implemented.
+"""
+import io
+import re
+import json
+import time
+import base64
+import random
+import hashlib
+import tarfile
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode, unquote
+
+from .blob_store import git_blob_sha
+
+from .graphql_fetcher import (GRAPHQL_FILES_PER_PR, GRAPHQL_REVIEWS_PER_PR, GRAPHQL_THREADS_PER_PR,
+                              GRAPHQL_COMMENTS_PER_THREAD, GRAPHQL_ISSUE_COMMENTS_PER_PR, GRAPHQL_COMMITS_PER_PR,
+                              GRAPHQL_CONTEXTS_PER_COMMIT)
+
+logger = logging.getLogger(__name__)
+
+MOCK_GRAPHQL_POINTS_PER_HOUR = 5000
+MOCK_RATE_LIMIT = 5000  # Core REST requests per window, like an authenticated token
+MOCK_RATE_LIMIT_WINDOW = 3600  # Seconds
+MOCK_SEARCH_RATE_LIMIT = 30  # Search requests per minute
+MOCK_DEFAULT_PER_PAGE = 30
+MOCK_MAX_PER_PAGE = 100
+
+
+def _iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _fake_sha(*parts):
+    return hashlib.sha1("/".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
+class SyntheticRepo:
+    """
+    Deterministic in-memory repository: PRs with files (before/after contents and patches), reviews,
+    review and issue comments, commits and CI results, plus a merge commit on the default branch per merged PR.
+    """
+
+    def __init__(self, owner='acme', repo='widgets', pr_count=20, files_per_pr=3, lines_per_file=40,
+                 authors=('alice', 'bob', 'carol'), comments_per_pr=2, commits_per_pr=2, seed=0,
+                 start=datetime(2025, 1, 1, tzinfo=timezone.utc)):
+        self.owner = owner
+        self.repo = repo
+        self.authors = list(authors)
+        self.prs = []
+        self.merge_commits = []
+        rnd = random.Random(seed)
+
+        for number in range(1, pr_count + 1):
+            author = self.authors[number % len(self.authors)]
+            created = start + timedelta(hours=6 * number)
+            merged = number % 4 != 0
+            closed_at = created + timedelta(hours=rnd.randint(1, 48))
+            updated_at = closed_at + timedelta(minutes=rnd.randint(0, 30))
+            base_sha = _fake_sha(owner, repo, number, 'base')
+            head_sha = _fake_sha(owner, repo, number, 'head')
+
+            files = []
+            for index in range(files_per_pr):
+                path = f"src/module_{number % 7}/file_{index}.py"
+                before = "\n".join(f"value_{i} = {i}  # pr {number}" for i in range(lines_per_file)) + "\n"
+                after = before.replace("value_0 = 0", f"value_0 = {number}") + f"extra_{number} = True\n"
+                status = 'added' if index == 0 and number % 5 == 0 else 'modified'
+                files.append({
+                    'filename': path,
+                    'status': status,
+                    'before': None if status == 'added' else before,
+                    'after': after,
+                    'additions': 2 if status == 'modified' else lines_per_file + 1,
+                    'deletions': 1 if status == 'modified' else 0,
+                    'patch': f"@@ -1,1 +1,1 @@\n-value_0 = 0  # pr {number}\n+value_0 = {number}  # pr {number}\n"
+                             f"+extra_{number} = True",
+                })
+            for f in files:
+                f['changes'] = f['additions'] + f['deletions']
+                f['sha'] = git_blob_sha(f['after'])
+
+            reviewer = self.authors[(number + 1) % len(self.authors)]
+            commits = []
+            for index in range(commits_per_pr):
+                commit_time = created + timedelta(minutes=10 * (index + 1))
+                commits.append({
+                    'sha': _fake_sha(owner, repo, number, 'commit', index),
+                    'message': f"Work on feature {number}, step {index + 1} (fixes #{number + 1000})",
+                    'author': {'name': author.title(), 'email': f"{author}@example.com", 'date': _iso(commit_time)},
+                    'committer': {'name': author.title(), 'email': f"{author}@example.com",
+                                  'date': _iso(commit_time)},
+                    'login': author,
+                    'parents': [commits[-1]['sha'] if commits else base_sha],
+                })
+            commits[-1]['sha'] = head_sha
+
+            pr = {
+                'number': number,
+                'title': f"Feature {number}",
+                'body': f"Implements feature {number}. Closes #{number + 1000}.",
+                'author': author,
+                'created_at': _iso(created),
+                'updated_at': _iso(updated_at),
+                'closed_at': _iso(closed_at),
+                'merged_at': _iso(closed_at) if merged else None,
+                'merged_by': reviewer if merged else None,
+                'base_sha': base_sha,
+                'head_sha': head_sha,
+                'head_ref': f"feature-{number}",
+                'files': files,
+                'reviews': [{'id': number * 100 + 1, 'user': reviewer, 'state': 'APPROVED',
+                             'submitted_at': _iso(closed_at - timedelta(minutes=5)),
+                             'body': f"Looks good, see #{number + 1000}", 'commit_id': head_sha}],
+                'review_comments': [{'id': number * 100 + 10 + i, 'user': reviewer,
+                                     'body': f"Nit {i} on feature {number}", 'path': files[0]['filename'],
+                                     'position': i + 1, 'original_position': i + 1, 'commit_id': head_sha,
+                                     'original_commit_id': head_sha,
+                                     'created_at': _iso(created + timedelta(hours=1, minutes=i)),
+                                     'updated_at': _iso(created + timedelta(hours=1, minutes=i)),
+                                     'in_reply_to_id': None} for i in range(comments_per_pr)],
+                'issue_comments': [{'id': number * 100 + 50 + i, 'user': self.authors[i % len(self.authors)],
+                                    'body': f"Comment {i} on feature {number}",
+                                    'created_at': _iso(created + timedelta(hours=2, minutes=i)),
+                                    'updated_at': _iso(created + timedelta(hours=2, minutes=i))}
+                                   for i in range(comments_per_pr)],
+                'commits': commits,
+                'check_runs': [{'name': 'tests', 'status': 'completed', 'conclusion': 'success',
+                                'started_at': _iso(closed_at - timedelta(minutes=20)),
+                                'completed_at': _iso(closed_at - timedelta(minutes=10)),
+                                'app_owner': 'github', 'app_name': 'GitHub Actions'}],
+                'statuses': [{'context': 'ci/lint', 'state': 'success', 'description': 'Lint passed',
+                              'target_url': f"https://ci.example.com/{number}", 'creator_login': 'ci-bot',
+                              'created_at': _iso(closed_at - timedelta(minutes=15)),
+                              'updated_at': _iso(closed_at - timedelta(minutes=15))}],
+            }
+            self.prs.append(pr)
+
+            if merged:
+                self.merge_commits.append({
+                    'sha': _fake_sha(owner, repo, number, 'merge'),
+                    'message': f"Merge pull request #{number} from {owner}/feature-{number}\n\nFeature {number}",
+                    'author': {'name': reviewer.title(), 'email': f"{reviewer}@example.com",
+                               'date': _iso(closed_at)},
+                    'committer': {'name': 'GitHub', 'email': 'noreply@github.com', 'date': _iso(closed_at)},
+                    'login': reviewer,
+                    'parents': [base_sha, head_sha],
+                    'pr_number': number,
+                })
+
+        # File contents per commit (only the paths the changes touch), blobs by SHA and the default branch history.
+        self._prs_by_number = {pr['number']: pr for pr in self.prs}
+        self.snapshots = {}
+        self.blobs = {}
+        self.history = []
+        for pr in self.prs:
+            base = self.snapshots.setdefault(pr['base_sha'], {})
+            head = self.snapshots.setdefault(pr['head_sha'], {})
+            for f in pr['files']:
+                if f['before'] is not None:
+                    base[f['filename']] = f['before']
+                head[f['filename']] = f['after']
+        for merge_commit in self.merge_commits:
+            self.snapshots[merge_commit['sha']] = dict(self.snapshots[self.pr(merge_commit['pr_number'])['head_sha']])
+            self.history.append(merge_commit)
+            self.history.extend(self.pr(merge_commit['pr_number'])['commits'])
+        for snapshot in self.snapshots.values():
+            for content in snapshot.values():
+                self.blobs[git_blob_sha(content)] = content
+        # Directory listings by tree SHA and the root tree of every commit, for non-recursive trees requests.
+        self.trees = {}
+        self.root_trees = {sha: self._add_tree(snapshot) for sha, snapshot in self.snapshots.items()}
+        self.history.sort(key=lambda commit: commit['committer']['date'], reverse=True)
+        self._commits_by_sha = {commit['sha']: commit for commit in self.history}
+
+    def _add_tree(self, files):
+        """Registers the directory holding files ({relative path: content}) and its subdirectories; returns its SHA."""
+        entries = []
+        subdirectories = {}
+        for path, content in files.items():
+            name, separator, rest = path.partition('/')
+            if separator:
+                subdirectories.setdefault(name, {})[rest] = content
+            else:
+                entries.append({'path': name, 'mode': '100644', 'type': 'blob', 'sha': git_blob_sha(content),
+                                'size': len(content.encode('utf-8'))})
+        for name, subdirectory_files in subdirectories.items():
+            entries.append({'path': name, 'mode': '040000', 'type': 'tree', 'sha': self._add_tree(subdirectory_files)})
+        entries.sort(key=lambda entry: entry['path'])
+        sha = _fake_sha('tree', *(f"{entry['mode']} {entry['path']} {entry['sha']}" for entry in entries))
+        self.trees[sha] = entries
+        return sha
+
+    def pr(self, number):
+        return self._prs_by_number.get(number)
+
+    def commit(self, sha):
+        return self._commits_by_sha.get(sha)
+
+    def commit_files(self, sha):
+        """Files of a merge commit (those of its PR) or of a PR commit (all files of the PR, for simplicity)."""
+        commit = self._commits_by_sha.get(sha)
+        if commit is None:
+            return None
+        if commit.get('pr_number'):
+            return self.pr(commit['pr_number'])['files']
+        return next((pr['files'] for pr in self.prs if any(c['sha'] == sha for c in pr['commits'])), [])
+
+    def prs_by_updated(self, states=None, author=None, closed_start=None, closed_end=None):
+        """PRs sorted by updated_at descending, filtered like the GraphQL/search arguments the fetchers send."""
+        selected = []
+        for pr in self.prs:
+            if states:
+                state = 'MERGED' if pr['merged_at'] else ('CLOSED' if pr['closed_at'] else 'OPEN')
+                if state not in states:
+                    continue
+            if author and pr['author'] != author:
+                continue
+            if closed_start and (not pr['closed_at'] or pr['closed_at'] < closed_start):
+                continue
+            if closed_end and (not pr['closed_at'] or pr['closed_at'] > closed_end):
+                continue
+            selected.append(pr)
+        return sorted(selected, key=lambda pr: pr['updated_at'], reverse=True)
+
+
+# --- GraphQL rendering ---
+
+def _connection(items, limit, render):
+    return {'pageInfo': {'hasNextPage': len(items) > limit}, 'nodes': [render(item) for item in items[:limit]]}
+
+
+def _actor(login):
+    return {'login': login} if login else None
+
+
+def _graphql_pr_node(repo_model, pr):
+    change_types = {'added': 'ADDED', 'removed': 'DELETED', 'modified': 'MODIFIED', 'renamed': 'RENAMED'}
+    threads = [[c] for c in pr['review_comments']]
+    contexts = ([dict(cr, __typename='CheckRun') for cr in pr['check_runs']] +
+                [dict(st, __typename='StatusContext') for st in pr['statuses']])
+
+    def render_context(context):
+        if context['__typename'] == 'CheckRun':
+            return {'__typename': 'CheckRun', 'name': context['name'], 'status': context['status'].upper(),
+                    'conclusion': (context['conclusion'] or '').upper() or None,
+                    'startedAt': context['started_at'], 'completedAt': context['completed_at'],
+                    'checkSuite': {'app': {'name': context['app_name'], 'owner': _actor(context['app_owner'])}}}
+        return {'__typename': 'StatusContext', 'context': context['context'], 'state': context['state'].upper(),
+                'description': context['description'], 'targetUrl': context['target_url'],
+                'createdAt': context['created_at'], 'creator': _actor(context['creator_login'])}
+
+    def render_commit(commit):
+        return {'commit': {
+            'oid': commit['sha'], 'message': commit['message'],
+            'author': dict(commit['author'], user=_actor(commit['login'])),
+            'committer': dict(commit['committer'], user=_actor(commit['login'])),
+            'parents': {'nodes': [{'oid': sha} for sha in commit['parents']]}}}
+
+    return {
+        'number': pr['number'],
+        'url': f"https://github.com/{repo_model.owner}/{repo_model.repo}/pull/{pr['number']}",
+        'title': pr['title'],
+        'body': pr['body'],
+        'state': 'MERGED' if pr['merged_at'] else ('CLOSED' if pr['closed_at'] else 'OPEN'),
+        'createdAt': pr['created_at'],
+        'updatedAt': pr['updated_at'],
+        'closedAt': pr['closed_at'],
+        'mergedAt': pr['merged_at'],
+        'authorAssociation': 'CONTRIBUTOR',
+        'author': _actor(pr['author']),
+        'mergedBy': _actor(pr['merged_by']),
+        'baseRefName': 'master',
+        'baseRefOid': pr['base_sha'],
+        'headRefName': pr['head_ref'],
+        'headRefOid': pr['head_sha'],
+        'headRepository': {'nameWithOwner': f"{repo_model.owner}/{repo_model.repo}"},
+        'files': _connection(pr['files'], GRAPHQL_FILES_PER_PR, lambda f: {
+            'path': f['filename'], 'additions': f['additions'], 'deletions': f['deletions'],
+            'changeType': change_types.get(f['status'], 'MODIFIED')}),
+        'reviews': _connection(pr['reviews'], GRAPHQL_REVIEWS_PER_PR, lambda r: {
+            'databaseId': r['id'], 'author': _actor(r['user']), 'state': r['state'],
+            'submittedAt': r['submitted_at'], 'body': r['body'], 'commit': {'oid': r['commit_id']}}),
+        'reviewThreads': _connection(threads, GRAPHQL_THREADS_PER_PR, lambda thread: {
+            'comments': _connection(thread, GRAPHQL_COMMENTS_PER_THREAD, lambda c: {
+                'databaseId': c['id'], 'author': _actor(c['user']), 'body': c['body'], 'path': c['path'],
+                'position': c['position'], 'originalPosition': c['original_position'],
+                'commit': {'oid': c['commit_id']}, 'originalCommit': {'oid': c['original_commit_id']},
+                'createdAt': c['created_at'], 'updatedAt': c['updated_at'],
+                'replyTo': {'databaseId': c['in_reply_to_id']} if c['in_reply_to_id'] else None})}),
+        'comments': _connection(pr['issue_comments'], GRAPHQL_ISSUE_COMMENTS_PER_PR, lambda c: {
+            'databaseId': c['id'], 'author': _actor(c['user']), 'body': c['body'],
+            'createdAt': c['created_at'], 'updatedAt': c['updated_at']}),
+        'commits': _connection(pr['commits'], GRAPHQL_COMMITS_PER_PR, render_commit),
+        'headCommit': {'nodes': [{'commit': {'statusCheckRollup': {
+            'contexts': _connection(contexts, GRAPHQL_CONTEXTS_PER_COMMIT, render_context)}}}]},
+    }
+
+
+# --- REST rendering ---
+
+def _rest_user(login):
+    if not login:
+        return None
+    return {'login': login, 'id': int(hashlib.sha1(login.encode('utf-8')).hexdigest()[:8], 16), 'type': 'User'}
+
+
+def _rest_pr(repo_model, pr, base_url, detail=False):
+    repo_url = f"{base_url}/repos/{repo_model.owner}/{repo_model.repo}"
+    html_url = f"https://github.com/{repo_model.owner}/{repo_model.repo}"
+    data = {
+        'url': f"{repo_url}/pulls/{pr['number']}",
+        'html_url': f"{html_url}/pull/{pr['number']}",
+        'number': pr['number'],
+        'state': 'closed' if pr['closed_at'] else 'open',
+        'title': pr['title'],
+        'body': pr['body'],
+        'user': _rest_user(pr['author']),
+        'author_association': 'CONTRIBUTOR',
+        'created_at': pr['created_at'],
+        'updated_at': pr['updated_at'],
+        'closed_at': pr['closed_at'],
+        'merged_at': pr['merged_at'],
+        'base': {'ref': 'master', 'sha': pr['base_sha'],
+                 'repo': {'full_name': f"{repo_model.owner}/{repo_model.repo}"}},
+        'head': {'ref': pr['head_ref'], 'sha': pr['head_sha'],
+                 'repo': {'full_name': f"{repo_model.owner}/{repo_model.repo}"}},
+    }
+    if detail:
+        data['merged_by'] = _rest_user(pr['merged_by'])
+        data['merged'] = pr['merged_at'] is not None
+        data['commits'] = len(pr['commits'])
+        data['changed_files'] = len(pr['files'])
+    return data
+
+
+def _rest_file(repo_model, f, ref):
+    html_url = f"https://github.com/{repo_model.owner}/{repo_model.repo}"
+    data = {'sha': f['sha'], 'filename': f['filename'], 'status': f['status'], 'additions': f['additions'],
+            'deletions': f['deletions'], 'changes': f['changes'],
+            'blob_url': f"{html_url}/blob/{ref}/{f['filename']}", 'raw_url': f"{html_url}/raw/{ref}/{f['filename']}"}
+    if f.get('patch') is not None:  # GitHub leaves the key out for binary files
+        data['patch'] = f['patch']
+    return data
+
+
+def _rest_commit(repo_model, commit, base_url, files=None):
+    data = {
+        'sha': commit['sha'],
+        'node_id': base64.b64encode(f"commit:{commit['sha']}".encode('ascii')).decode('ascii'),
+        'url': f"{base_url}/repos/{repo_model.owner}/{repo_model.repo}/commits/{commit['sha']}",
+        'html_url': f"https://github.com/{repo_model.owner}/{repo_model.repo}/commit/{commit['sha']}",
+        'commit': {'message': commit['message'], 'author': commit['author'], 'committer': commit['committer']},
+        'author': _rest_user(commit['login']),
+        'committer': _rest_user(commit['login']),
+        'parents': [{'sha': sha} for sha in commit['parents']],
+    }
+    if files is not None:
+        data['files'] = [_rest_file(repo_model, f, commit['sha']) for f in files]
+    return data
+
+
+def _tarball(repo_model, sha, snapshot):
+    buffer = io.BytesIO()
+    prefix = f"{repo_model.owner}-{repo_model.repo}-{sha[:7]}"
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for path, content in sorted(snapshot.items()):
+            data = content.encode('utf-8')
+            member = tarfile.TarInfo(f"{prefix}/{path}")
+            member.size = len(data)
+            archive.addfile(member, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def _encode_cursor(offset):
+    return base64.b64encode(f"cursor:{offset}".encode('ascii')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return 0
+    return int(base64.b64decode(cursor).decode('ascii').split(':', 1)[1])
+
+
+class MockGitHubServer:
+    """
+    Threaded HTTP server answering the GitHub API calls of this package from a SyntheticRepo.
+
+    latency (seconds) is added to every response. REST lists are paginated with Link headers (next/last) and
+    every response carries X-RateLimit-* headers; once rate_limit core requests (or MOCK_SEARCH_RATE_LIMIT
+    searches) have been made with one token in the window the server answers 403 with Remaining 0 (each token
+    in the Authorization header has its own budget, like on GitHub), and with
+    secondary_limit_every=N every Nth REST request gets a 429 with Retry-After: retry_after. JSON responses
+    have an ETag and If-None-Match is answered with 304, which does not count against the budget.
+    graphql_points_per_hour bounds the GraphQL budget reported in rateLimit; max_graphql_nodes makes queries
+    asking for too many PRs fail with MAX_NODE_LIMIT_EXCEEDED, so the page sizer's back-off can be exercised.
+    """
+
+    def __init__(self, repo_model, host='127.0.0.1', port=0, latency=0.0,
+                 graphql_points_per_hour=MOCK_GRAPHQL_POINTS_PER_HOUR, max_graphql_nodes=None,
+                 rate_limit=MOCK_RATE_LIMIT, rate_limit_window=MOCK_RATE_LIMIT_WINDOW,
+                 secondary_limit_every=None, retry_after=1):
+        self.repo_model = repo_model
+        self.latency = latency
+        self.graphql_points_per_hour = graphql_points_per_hour
+        self.graphql_points_used = 0
+        self.max_graphql_nodes = max_graphql_nodes
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.secondary_limit_every = secondary_limit_every
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.bytes_sent = 0
+        self.route_counts = {}
+        self._rate_used = {}  # (token, resource) -> requests made in the current window
+        self._rate_reset = {}  # (token, resource) -> end of the current window
+        self._rest_requests = 0
+        self._routes = self._build_routes()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def graphql_url(self):
+        return f"{self.url}/graphql"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _count(self, body_size, route=None):
+        with self._lock:
+            self.request_count += 1
+            self.bytes_sent += body_size
+            if route:
+                self.route_counts[route] = self.route_counts.get(route, 0) + 1
+
+    def _take_rate_limit(self, resource, token=None):
+        """
+        Returns (allowed, rate_limit_headers, secondary_limited) for one REST request made with token against
+        resource ('core' or 'search').
+        """
+        limit = self.rate_limit if resource == 'core' else MOCK_SEARCH_RATE_LIMIT
+        window = self.rate_limit_window if resource == 'core' else 60
+        key = (token, resource)
+        with self._lock:
+            now = time.time()
+            if now >= self._rate_reset.get(key, 0):
+                self._rate_used[key] = 0
+                self._rate_reset[key] = now + window
+            self._rest_requests += 1
+            secondary_limited = bool(self.secondary_limit_every) and \
+                self._rest_requests % self.secondary_limit_every == 0
+            allowed = self._rate_used[key] < limit
+            if allowed and not secondary_limited:
+                self._rate_used[key] += 1
+            headers = {
+                'X-RateLimit-Limit': str(limit),
+                'X-RateLimit-Remaining': str(max(0, limit - self._rate_used[key])),
+                'X-RateLimit-Reset': str(int(self._rate_reset[key])),
+                'X-RateLimit-Used': str(self._rate_used[key]),
+                'X-RateLimit-Resource': resource,
+            }
+        return allowed, headers, secondary_limited
+
+    # --- GraphQL ---
+
+    def handle_graphql(self, payload):
+        query = payload.get('query') or ''
+        variables = payload.get('variables') or {}
+        first = int(variables.get('first') or 10)
+        offset = _decode_cursor(variables.get('after'))
+
+        if 'SearchPullRequests' in query:
+            search = variables.get('query') or ''
+            author = re.search(r'author:(\S+)', search)
+            closed = re.search(r'closed:(\S+)\.\.(\S+)', search)
+            is_state = re.findall(r'is:(open|closed)', search)
+            states = ['OPEN'] if 'open' in is_state else (['CLOSED', 'MERGED'] if 'closed' in is_state else None)
+            prs = self.repo_model.prs_by_updated(
+                states=states, author=author.group(1) if author else None,
+                closed_start=closed.group(1) if closed and closed.group(1) != '*' else None,
+                closed_end=closed.group(2) if closed and closed.group(2) != '*' else None)
+        elif 'RepositoryPullRequests' in query:
+            prs = self.repo_model.prs_by_updated(states=variables.get('states'))
+        else:
+            return {'errors': [{'message': 'Unsupported query for the mock GitHub server'}]}
+
+        if self.max_graphql_nodes is not None and first * 500 > self.max_graphql_nodes:
+            return {'errors': [{'type': 'MAX_NODE_LIMIT_EXCEEDED',
+                                'message': f"This query requests up to {first * 500} possible nodes "
+                                           f"which exceeds the maximum of {self.max_graphql_nodes}"}]}
+
+        page = prs[offset:offset + first]
+        cost = max(1, round(first * 15 / 100))
+        with self._lock:
+            self.graphql_points_used += cost
+            remaining = max(0, self.graphql_points_per_hour - self.graphql_points_used)
+        connection = {
+            'pageInfo': {'hasNextPage': offset + first < len(prs),
+                         'endCursor': _encode_cursor(offset + first) if page else None},
+            'nodes': [_graphql_pr_node(self.repo_model, pr) for pr in page],
+        }
+        reset_at = _iso(datetime.now(timezone.utc).replace(microsecond=0) + timedelta(hours=1))
+        data = {'rateLimit': {'cost': cost, 'remaining': remaining, 'resetAt': reset_at}}
+        if 'SearchPullRequests' in query:
+            data['search'] = connection
+        else:
+            data['repository'] = {'pullRequests': connection}
+        return {'data': data}
+
+    # --- REST ---
+
+    def _build_routes(self):
+        repo_path = rf"/repos/{re.escape(self.repo_model.owner)}/{re.escape(self.repo_model.repo)}"
+        routes = [
+            (r'/pulls', 'pulls', self._list_pulls),
+            (r'/pulls/(\d+)', 'pull', self._get_pull),
+            (r'/pulls/(\d+)/files', 'pull_files', self._list_pull_files),
+            (r'/pulls/(\d+)/reviews', 'pull_reviews', self._list_pull_reviews),
+            (r'/pulls/(\d+)/comments', 'pull_comments', self._list_pull_comments),
+            (r'/pulls/(\d+)/commits', 'pull_commits', self._list_pull_commits),
+            (r'/issues/(\d+)/comments', 'issue_comments', self._list_issue_comments),
+            (r'/commits', 'commits', self._list_commits),
+            (r'/commits/([0-9a-f]{40})', 'commit', self._get_commit),
+            (r'/commits/([0-9a-f]{40})/check-runs', 'check_runs', self._get_check_runs),
+            (r'/commits/([0-9a-f]{40})/statuses', 'statuses', self._list_statuses),
+            (r'/commits/([0-9a-f]{40})/status', 'combined_status', self._get_combined_status),
+            (r'/compare/([0-9a-f]{40})\.\.\.([0-9a-f]{40})', 'compare', self._compare),
+            (r'/contents/(.+)', 'contents', self._get_contents),
+            (r'/git/blobs/([0-9a-f]{40})', 'blob', self._get_blob),
+            (r'/git/trees/([0-9a-f]{40})', 'tree', self._get_tree),
+            (r'/tarball/([0-9a-f]{40})', 'tarball', self._get_tarball),
+        ]
+        compiled = [(re.compile(repo_path + pattern + '$'), name, handler) for pattern, name, handler in routes]
+        compiled.append((re.compile(r'/search/issues$'), 'search', self._search_issues))
+        return compiled
+
+    def handle_rest(self, path, query, accept=None):
+        """
+        Returns (route, status, body, extra_headers) for a GET request; body is JSON-serialisable or bytes.
+        """
+        for pattern, name, handler in self._routes:
+            match = pattern.match(path)
+            if match:
+                groups = [unquote(group) for group in match.groups()]
+                if name == 'compare' and accept == 'application/vnd.github.diff':
+                    return ('compare_diff', *self._compare_diff(*groups))
+                return (name, *handler(query, *groups))
+        return None, 404, {'message': 'Not Found'}, {}
+
+    def _paginate(self, items, query, path, render):
+        per_page = min(int(query.get('per_page', MOCK_DEFAULT_PER_PAGE)), MOCK_MAX_PER_PAGE)
+        page = max(1, int(query.get('page', 1)))
+        last_page = max(1, -(-len(items) // per_page))
+        links = []
+        for rel, number in (('next', page + 1), ('last', last_page), ('first', 1), ('prev', page - 1)):
+            if (rel in ('next', 'last') and page < last_page) or (rel in ('first', 'prev') and page > 1):
+                link_query = urlencode({**query, 'page': number})
+                links.append(f'<{self.url}{path}?{link_query}>; rel="{rel}"')
+        body = [render(item) for item in items[(page - 1) * per_page:page * per_page]]
+        return body, ({'Link': ", ".join(links)} if links else {})
+
+    def _repo_path(self, suffix):
+        return f"/repos/{self.repo_model.owner}/{self.repo_model.repo}{suffix}"
+
+    def _pr_or_404(self, number):
+        pr = self.repo_model.pr(int(number))
+        return pr, (None if pr else (404, {'message': 'Not Found'}, {}))
+
+    def _list_pulls(self, query):
+        state = query.get('state', 'open')
+        states = {'open': ['OPEN'], 'closed': ['CLOSED', 'MERGED']}.get(state)
+        prs = self.repo_model.prs_by_updated(states=states)
+        body, headers = self._paginate(prs, query, self._repo_path('/pulls'),
+                                       lambda pr: _rest_pr(self.repo_model, pr, self.url))
+        return 200, body, headers
+
+    def _get_pull(self, query, number):
+        pr, missing = self._pr_or_404(number)
+        return missing or (200, _rest_pr(self.repo_model, pr, self.url, detail=True), {})
+
+    def _list_pr_items(self, query, number, key, suffix, render):
+        pr, missing = self._pr_or_404(number)
+        if missing:
+            return missing
+        body, headers = self._paginate(pr[key], query, self._repo_path(f"/{suffix}"), render)
+        return 200, body, headers
+
+    def _list_pull_files(self, query, number):
+        pr = self.repo_model.pr(int(number))
+        ref = pr['head_sha'] if pr else None
+        return self._list_pr_items(query, number, 'files', f"pulls/{number}/files",
+                                   lambda f: _rest_file(self.repo_model, f, ref))
+
+    def _list_pull_reviews(self, query, number):
+        return self._list_pr_items(query, number, 'reviews', f"pulls/{number}/reviews",
+                                   lambda review: {**review, 'user': _rest_user(review['user'])})
+
+    def _list_pull_comments(self, query, number):
+        return self._list_pr_items(query, number, 'review_comments', f"pulls/{number}/comments",
+                                   lambda comment: {**comment, 'user': _rest_user(comment['user'])})
+
+    def _list_pull_commits(self, query, number):
+        return self._list_pr_items(query, number, 'commits', f"pulls/{number}/commits",
+                                   lambda commit: _rest_commit(self.repo_model, commit, self.url))
+
+    def _list_issue_comments(self, query, number):
+        return self._list_pr_items(query, number, 'issue_comments', f"issues/{number}/comments",
+                                   lambda comment: {**comment, 'user': _rest_user(comment['user'])})
+
+    def _list_commits(self, query):
+        commits = self.repo_model.history
+        since, until, author = query.get('since'), query.get('until'), query.get('author')
+        if since:
+            commits = [c for c in commits if c['committer']['date'] >= since]
+        if until:
+            commits = [c for c in commits if c['committer']['date'] <= until]
+        if author:
+            commits = [c for c in commits if author in (c['login'], c['author']['email'])]
+        body, headers = self._paginate(commits, query, self._repo_path('/commits'),
+                                       lambda commit: _rest_commit(self.repo_model, commit, self.url))
+        return 200, body, headers
+
+    def _get_commit(self, query, sha):
+        commit = self.repo_model.commit(sha)
+        if commit is None:
+            return 422, {'message': f"No commit found for SHA: {sha}"}, {}
+        return 200, _rest_commit(self.repo_model, commit, self.url, files=self.repo_model.commit_files(sha)), {}
+
+    def _compare(self, query, base, head):
+        commit = self.repo_model.commit(head)
+        if commit is None or base not in commit['parents']:
+            return 404, {'message': 'Not Found'}, {}
+        files = self.repo_model.commit_files(head)
+        return 200, {'status': 'ahead', 'ahead_by': 1, 'behind_by': 0, 'total_commits': 1,
+                     'base_commit': {'sha': base}, 'merge_base_commit': {'sha': base},
+                     'commits': [_rest_commit(self.repo_model, commit, self.url)],
+                     'files': [_rest_file(self.repo_model, f, head) for f in files]}, {}
+
+    def _compare_diff(self, base, head):
+        commit = self.repo_model.commit(head)
+        if commit is None or base not in commit['parents']:
+            return 404, {'message': 'Not Found'}, {}
+        sections = []
+        for f in self.repo_model.commit_files(head):
+            header = [f"diff --git a/{f['filename']} b/{f['filename']}"]
+            if f['status'] == 'added':
+                header += ['new file mode 100644', '--- /dev/null']
+            else:
+                header.append(f"--- a/{f['filename']}")
+            header.append(f"+++ b/{f['filename']}")
+            sections.append("\n".join(header) + "\n" + f['patch'])
+        return 200, ("\n".join(sections) + "\n").encode('utf-8'), {'Content-Type': 'text/plain; charset=utf-8'}
+
+    def _pr_of_commit(self, sha):
+        commit = self.repo_model.commit(sha)
+        if commit is not None and commit.get('pr_number'):
+            return self.repo_model.pr(commit['pr_number'])
+        return next((pr for pr in self.repo_model.prs if pr['head_sha'] == sha), None)
+
+    def _get_check_runs(self, query, sha):
+        pr = self._pr_of_commit(sha)
+        runs = [{'id': index + 1, 'name': run['name'], 'head_sha': sha, 'status': run['status'],
+                 'conclusion': run['conclusion'], 'started_at': run['started_at'],
+                 'completed_at': run['completed_at'],
+                 'app': {'name': run['app_name'], 'owner': _rest_user(run['app_owner'])}}
+                for index, run in enumerate(pr['check_runs'] if pr else [])]
+        return 200, {'total_count': len(runs), 'check_runs': runs}, {}
+
+    def _list_statuses(self, query, sha):
+        pr = self._pr_of_commit(sha)
+        statuses = [{**status, 'creator': _rest_user(status['creator_login'])}
+                    for status in (pr['statuses'] if pr else [])]
+        body, headers = self._paginate(statuses, query, self._repo_path(f"/commits/{sha}/statuses"),
+                                       lambda status: status)
+        return 200, body, headers
+
+    def _get_combined_status(self, query, sha):
+        pr = self._pr_of_commit(sha)
+        latest = {}
+        for status in sorted(pr['statuses'] if pr else [], key=lambda status: status['updated_at']):
+            latest[status['context']] = status
+        statuses = [{key: value for key, value in status.items() if key != 'creator_login'}
+                    for status in latest.values()]
+        states = {status['state'] for status in statuses}
+        state = 'failure' if states & {'failure', 'error'} else (
+            'success' if statuses and states == {'success'} else 'pending')
+        page_statuses, headers = self._paginate(statuses, query, self._repo_path(f"/commits/{sha}/status"),
+                                                lambda status: status)
+        return 200, {'state': state, 'sha': sha, 'total_count': len(statuses), 'statuses': page_statuses}, headers
+
+    def _get_contents(self, query, path):
+        content = self.repo_model.snapshots.get(query.get('ref'), {}).get(path)
+        if content is None:
+            return 404, {'message': 'Not Found'}, {}
+        encoded = base64.b64encode(content.encode('utf-8')).decode('ascii')
+        return 200, {'type': 'file', 'encoding': 'base64', 'path': path, 'name': path.rsplit('/', 1)[-1],
+                     'sha': git_blob_sha(content), 'size': len(content.encode('utf-8')),
+                     'content': "\n".join(encoded[i:i + 60] for i in range(0, len(encoded), 60))}, {}
+
+    def _get_blob(self, query, sha):
+        content = self.repo_model.blobs.get(sha)
+        if content is None:
+            return 404, {'message': 'Not Found'}, {}
+        return 200, {'sha': sha, 'size': len(content.encode('utf-8')), 'encoding': 'base64',
+                     'content': base64.b64encode(content.encode('utf-8')).decode('ascii')}, {}
+
+    def _get_tree(self, query, sha):
+        # sha is a commit (its root directory) or a tree; recursive listings are served for commits only.
+        if query.get('recursive') not in (None, '', '0', 'false') and sha in self.repo_model.snapshots:
+            tree = [{'path': path, 'mode': '100644', 'type': 'blob', 'sha': git_blob_sha(content),
+                     'size': len(content.encode('utf-8'))}
+                    for path, content in sorted(self.repo_model.snapshots[sha].items())]
+            return 200, {'sha': self.repo_model.root_trees[sha], 'tree': tree, 'truncated': False}, {}
+        tree_sha = self.repo_model.root_trees.get(sha, sha)
+        entries = self.repo_model.trees.get(tree_sha)
+        if entries is None:
+            return 404, {'message': 'Not Found'}, {}
+        return 200, {'sha': tree_sha, 'tree': entries, 'truncated': False}, {}
+
+    def _get_tarball(self, query, sha):
+        snapshot = self.repo_model.snapshots.get(sha)
+        if snapshot is None:
+            return 404, {'message': 'Not Found'}, {}
+        return 200, _tarball(self.repo_model, sha, snapshot), {'Content-Type': 'application/x-gzip'}
+
+    def _search_issues(self, query):
+        search = query.get('q', '')
+        author = re.search(r'author:(\S+)', search)
+        closed = re.search(r'closed:(\S+)\.\.(\S+)', search)
+        is_state = re.findall(r'is:(open|closed|merged)', search)
+        states = ['OPEN'] if 'open' in is_state else (['CLOSED', 'MERGED'] if 'closed' in is_state else None)
+        if 'merged' in is_state:
+            states = ['MERGED']
+        prs = self.repo_model.prs_by_updated(
+            states=states, author=author.group(1) if author else None,
+            closed_start=closed.group(1) if closed and closed.group(1) != '*' else None,
+            closed_end=closed.group(2) if closed and closed.group(2) != '*' else None)
+        rest_prs = [_rest_pr(self.repo_model, pr, self.url) for pr in prs[:1000]]
+
+        def render(rest_pr):
+            return {'number': rest_pr['number'], 'title': rest_pr['title'], 'state': rest_pr['state'],
+                    'user': rest_pr['user'], 'created_at': rest_pr['created_at'],
+                    'updated_at': rest_pr['updated_at'], 'closed_at': rest_pr['closed_at'],
+                    'pull_request': {'url': rest_pr['url'], 'html_url': rest_pr['html_url'],
+                                     'merged_at': rest_pr['merged_at']}}
+
+        items, headers = self._paginate(rest_prs, query, '/search/issues', render)
+        return 200, {'total_count': len(prs), 'incomplete_results': False, 'items': items}, headers
+
+    # --- HTTP plumbing ---
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                logger.debug("mock github: " + format % args)
+
+            def _send_json(self, status, body, extra_headers=None, route=None):
+                if isinstance(body, bytes):
+                    data, content_type = body, 'application/octet-stream'
+                else:
+                    data, content_type = json.dumps(body).encode('utf-8'), 'application/json; charset=utf-8'
+                headers = {'Content-Type': content_type, **(extra_headers or {})}
+                if status == 200 and not isinstance(body, bytes):
+                    etag = f'"{hashlib.sha1(data).hexdigest()}"'
+                    headers['ETag'] = etag
+                    if self.headers.get('If-None-Match') == etag:
+                        status, data = 304, b''
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(status)
+                headers['Content-Length'] = str(len(data))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+                server._count(len(data), route)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                resource = 'search' if parts.path.startswith('/search/') else 'core'
+                allowed, rate_headers, secondary_limited = server._take_rate_limit(
+                    resource, self.headers.get('Authorization'))
+                if secondary_limited:
+                    self._send_json(429, {'message': 'You have exceeded a secondary rate limit.'},
+                                    {**rate_headers, 'Retry-After': str(server.retry_after)}, route='secondary_limit')
+                    return
+                if not allowed:
+                    self._send_json(403, {'message': 'API rate limit exceeded'},
+                                    {**rate_headers, 'X-RateLimit-Remaining': '0'}, route='rate_limited')
+                    return
+                route, status, body, extra_headers = server.handle_rest(parts.path, query, self.headers.get('Accept'))
+                self._send_json(status, body, {**rate_headers, **extra_headers}, route=route)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except json.JSONDecodeError:
+                    self._send_json(400, {'message': 'Problems parsing JSON'})
+                    return
+                if self.path.split('?')[0] != '/graphql':
+                    self._send_json(404, {'message': 'Not Found'})
+                    return
+                self._send_json(200, server.handle_graphql(payload), {'X-RateLimit-Resource': 'graphql'},
+                                route='graphql')
+
+        return Handler
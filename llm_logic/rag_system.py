@@ -8,6 +8,11 @@ from langchain_community.vectorstores import Chroma
 from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
 from langchain_community.llms import HuggingFacePipeline
 from tqdm import tqdm  # For progress bars
+from .blob_store import BlobStore, BLOB_STORE_DIRNAME
+from .content_policy import get_content_policy
+from .change_catalog import get_change_catalog
+from .change_record import loads as record_loads
+from .change_archive import get_change_archive, patch_member, content_member
 
 
 class PRSpecificRAG:
@@ -24,6 +29,8 @@ class PRSpecificRAG:
                                        Defaults to "pull_request_data_structured".
         """
         self.data_path = data_path
+        # Shared file contents referenced by blob SHA from the PR manifests
+        self.blob_store = BlobStore(os.path.join(data_path, BLOB_STORE_DIRNAME))
         # Initialize embeddings model (CodeBERT for code understanding)
         print("Initializing embeddings model...")
         try:
@@ -65,7 +72,7 @@ class PRSpecificRAG:
 
     def _load_pr_metadata(self, pr_dir):
         """
-        Loads the metadata.json file for a single PR directory.
+        Loads the metadata of a single PR directory from the change catalog, falling back to its metadata.json.
         Returns the metadata dictionary.
         Args:
             pr_dir (str): The path to the specific PR directory.
@@ -75,11 +82,16 @@ class PRSpecificRAG:
             FileNotFoundError: If metadata file is not found.
             json.JSONDecodeError: If metadata file is invalid JSON.
         """
+        catalog = get_change_catalog(self.data_path)
+        if catalog is not None:
+            metadata = catalog.get_change_by_directory(os.path.basename(os.path.normpath(pr_dir)))
+            if metadata is not None:
+                return metadata
         metadata_path = os.path.join(pr_dir, "metadata.json")
         if not os.path.exists(metadata_path):
             raise FileNotFoundError(f"Metadata file not found for PR in {pr_dir}")
-        with open(metadata_path, "r", encoding='utf-8') as f:
-            return json.load(f)
+        with open(metadata_path, "rb") as f:
+            return record_loads(f.read())
 
     def _process_single_pr(self, pr_dir_name):
         """
@@ -128,6 +140,7 @@ class PRSpecificRAG:
             print(f"No changed files found in metadata for PR #{pr_number_str}.")
             pass  # Continue to process other data
 
+        content_policy = get_content_policy()
         for file_meta in tqdm(changed_files, desc=f"Processing files for PR #{pr_number_str}"):
             # Ensure file_meta is a dictionary and has a filename
             if not isinstance(file_meta, dict) or 'filename' not in file_meta:
@@ -135,10 +148,18 @@ class PRSpecificRAG:
                 continue
 
             filename = file_meta["filename"]
+            # Lockfiles, vendored, generated, binary and oversized files are not embedded (see content_policy).
+            if file_meta.get('skipped') or (content_policy is not None and content_policy.skip_reason(filename)):
+                continue
             try:
                 # Load code and patch content
-                before_code = self._read_code_file(full_path, "before_merge", filename)
-                after_code = self._read_code_file(full_path, "after_merge", filename)
+                before_code = self._read_code_file(full_path, "before_merge", filename,
+                                                   file_meta.get('base_blob_sha'))
+                after_code = self._read_code_file(full_path, "after_merge", filename,
+                                                  file_meta.get('head_blob_sha'))
+                if content_policy is not None and (content_policy.skip_reason_for_content(after_code)
+                                                   or content_policy.skip_reason_for_content(before_code)):
+                    continue
                 patch = self._read_patch_file(full_path, filename)
 
                 # Create context string for the file
@@ -206,7 +227,7 @@ class PRSpecificRAG:
         self.pr_databases[pr_number_str] = vector_db  # Store with string key
         return vector_db
 
-    def _read_code_file(self, pr_path, dir_name, filename):
+    def _read_code_file(self, pr_path, dir_name, filename, blob_sha=None):
         """
         Reads content from a code file within a PR directory.
         Returns the file content as a string or an empty string if not found/error.
@@ -214,9 +235,18 @@ class PRSpecificRAG:
             pr_path (str): The full path to the specific PR directory.
             dir_name (str): The subdirectory name ('before_merge' or 'after_merge').
             filename (str): The name of the file.
+            blob_sha (str, optional): Blob SHA from the manifest; when set, the content is read
+                                      from the shared blob store first.
         Returns:
             str: The file content as a string, or empty string if not found/error.
         """
+        if blob_sha:
+            content = self.blob_store.get(blob_sha)
+            if content is not None:
+                return content
+        archive = get_change_archive(pr_path)
+        if archive is not None:  # Packed PR directory (see change_archive)
+            return archive.get(content_member(dir_name, filename)) or ""
         file_path = os.path.join(pr_path, dir_name, filename)
         if os.path.exists(file_path):
             try:
@@ -237,6 +267,9 @@ class PRSpecificRAG:
         Returns:
             str: The patch content as a string, or empty string if not found/error.
         """
+        archive = get_change_archive(pr_path)
+        if archive is not None:
+            return archive.get(patch_member(filename)) or ""
         patch_path = os.path.join(pr_path, "changed_files", filename + ".patch")
         if os.path.exists(patch_path):
             try:
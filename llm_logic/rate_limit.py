@@ -0,0 +1,279 @@
+import os
+import time
+import random
+import threading
+import logging
+
+import requests
+
+from .token_pool import get_token_pool
+
+logger = logging.getLogger(__name__)
+
+GITHUB_MAX_RETRIES = int(os.environ.get('GITHUB_MAX_RETRIES', 5))
+GITHUB_BACKOFF_BASE = float(os.environ.get('GITHUB_BACKOFF_BASE', 1.0))  # Seconds
+GITHUB_BACKOFF_MAX = float(os.environ.get('GITHUB_BACKOFF_MAX', 60.0))  # Seconds
+# GitHub's secondary limits allow roughly 900 REST points per minute and 100 concurrent requests.
+GITHUB_MAX_REQUESTS_PER_SECOND = float(os.environ.get('GITHUB_MAX_REQUESTS_PER_SECOND', 15))
+GITHUB_MAX_CONCURRENCY = int(os.environ.get('GITHUB_MAX_CONCURRENCY', 32))
+GITHUB_MIN_CONCURRENCY = 1
+# Once fewer than this share of the primary budget is left, requests are spread evenly until the reset.
+GITHUB_RATE_LIMIT_LOW_WATER = 0.1
+SECONDARY_RATE_LIMIT_DEFAULT_WAIT = 60.0  # Seconds, used when GitHub does not send Retry-After
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Classic token bucket: acquire() blocks until a token is available; the refill rate can change at runtime."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = max(rate, 0.001)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RequestScheduler:
+    """
+    Paces and retries GitHub API calls so long fetches run at the highest sustainable rate instead of failing.
+
+    - Reads X-RateLimit-Remaining / X-RateLimit-Reset from every response. Requests go through a token bucket
+      capped at GITHUB_MAX_REQUESTS_PER_SECOND; when the primary budget runs low the bucket rate is lowered
+      so the rest of the budget lasts until the reset, and at zero all requests wait for the reset.
+    - Retries timeouts, connection errors, 5xx and rate-limit responses with full-jitter exponential backoff,
+      honouring Retry-After and X-RateLimit-Reset when GitHub sends them.
+    - Limits in-flight requests with an AIMD window: +1 after a window's worth of successes,
+      halved when a secondary rate limit is hit.
+    """
+
+    def __init__(self, max_retries=GITHUB_MAX_RETRIES, max_concurrency=GITHUB_MAX_CONCURRENCY,
+                 max_rate=GITHUB_MAX_REQUESTS_PER_SECOND, backoff_base=GITHUB_BACKOFF_BASE,
+                 backoff_max=GITHUB_BACKOFF_MAX):
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.max_rate = max_rate
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.bucket = TokenBucket(max_rate, capacity=max(1, int(max_rate)))
+        self._cond = threading.Condition()
+        self._concurrency_limit = max_concurrency
+        self._in_flight = 0
+        self._successes_in_window = 0
+        self._paused_until = 0.0
+        self.rate_limit_remaining = None
+        self.rate_limit_limit = None
+        self.rate_limit_reset = None
+        self.stats = {'requests': 0, 'retries': 0, 'rate_limited': 0, 'secondary_rate_limited': 0, 'failures': 0}
+
+    # --- Concurrency window (AIMD) ---
+
+    @property
+    def concurrency_limit(self):
+        return self._concurrency_limit
+
+    def _acquire_slot(self):
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.time()
+                if wait > 0:
+                    self._cond.wait(timeout=wait)
+                    continue
+                if self._in_flight < self._concurrency_limit:
+                    self._in_flight += 1
+                    return
+                self._cond.wait()
+
+    def _release_slot(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _on_success(self):
+        with self._cond:
+            self._successes_in_window += 1
+            if self._successes_in_window >= self._concurrency_limit and self._concurrency_limit < self.max_concurrency:
+                self._concurrency_limit += 1
+                self._successes_in_window = 0
+                self._cond.notify_all()
+
+    def _on_secondary_limit(self, wait_seconds):
+        with self._cond:
+            self._concurrency_limit = max(GITHUB_MIN_CONCURRENCY, self._concurrency_limit // 2)
+            self._successes_in_window = 0
+            self._paused_until = max(self._paused_until, time.time() + wait_seconds)
+            self.stats['secondary_rate_limited'] += 1
+        logger.warning(f"Secondary rate limit hit: concurrency reduced to {self._concurrency_limit}, "
+                       f"pausing for {wait_seconds:.0f}s")
+
+    def _pause_until_reset(self, reset_epoch):
+        with self._cond:
+            self._paused_until = max(self._paused_until, reset_epoch + 1)
+            self.stats['rate_limited'] += 1
+        logger.warning(f"Primary rate limit exhausted, pausing until "
+                       f"{time.strftime('%H:%M:%S', time.localtime(reset_epoch))}")
+
+    # --- Rate-limit header bookkeeping ---
+
+    @staticmethod
+    def _is_core_resource(headers):
+        """Search, GraphQL etc. have their own small budgets; only the core REST budget drives global pacing."""
+        return headers.get('X-RateLimit-Resource', 'core') == 'core'
+
+    def _update_from_headers(self, headers):
+        if not self._is_core_resource(headers):
+            return
+        token_pool = get_token_pool()
+        if token_pool is not None:
+            # With several tokens one exhausted token is not a reason to slow down; pace on the pool's budget.
+            remaining, limit, reset = token_pool.budget('core')
+            if reset is None:
+                self.bucket.set_rate(self.max_rate)
+                return
+        else:
+            remaining = headers.get('X-RateLimit-Remaining')
+            reset = headers.get('X-RateLimit-Reset')
+            limit = headers.get('X-RateLimit-Limit')
+            if remaining is None or reset is None:
+                return
+            try:
+                remaining, reset = int(remaining), int(reset)
+                limit = int(limit) if limit is not None else None
+            except ValueError:
+                return
+
+        self.rate_limit_remaining, self.rate_limit_reset, self.rate_limit_limit = remaining, reset, limit
+        seconds_to_reset = max(1.0, reset - time.time())
+        if remaining <= 0:
+            self._pause_until_reset(reset)
+        elif limit and remaining < limit * GITHUB_RATE_LIMIT_LOW_WATER:
+            self.bucket.set_rate(min(self.max_rate, remaining / seconds_to_reset))
+        else:
+            self.bucket.set_rate(self.max_rate)
+
+    @staticmethod
+    def _retry_after(headers):
+        value = headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _is_rate_limited(response):
+        if response.status_code not in (403, 429):
+            return False
+        if response.status_code == 429 or response.headers.get('Retry-After') is not None:
+            return True
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            return True
+        try:
+            return 'rate limit' in response.text.lower()
+        except Exception:
+            return False
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    # --- Entry point ---
+
+    def execute(self, send, url=''):
+        """
+        Calls send() (which performs one HTTP request and returns a response) under pacing,
+        retrying transient failures. Returns the last response; re-raises the last network error
+        if every attempt failed without a response.
+        """
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            self._acquire_slot()
+            try:
+                with self._cond:
+                    self.stats['requests'] += 1
+                response = send()
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                response = None
+                error = e
+            finally:
+                self._release_slot()
+
+            if response is not None:
+                self._update_from_headers(response.headers)
+
+                if self._is_rate_limited(response):
+                    retry_after = self._retry_after(response.headers)
+                    if response.headers.get('X-RateLimit-Remaining') == '0' and retry_after is None:
+                        # Primary limit: for the core budget _update_from_headers already paused everyone until
+                        # the reset (or, with a token pool, the retry goes out with another token); other
+                        # budgets (e.g. search) only delay this request, see below.
+                        pass
+                    else:
+                        self._on_secondary_limit(retry_after if retry_after is not None
+                                                 else SECONDARY_RATE_LIMIT_DEFAULT_WAIT)
+                elif response.status_code in RETRYABLE_STATUS_CODES:
+                    pass
+                else:
+                    self._on_success()
+                    return response
+
+            if attempt >= self.max_retries:
+                self.stats['failures'] += 1
+                if response is not None:
+                    logger.error(f"Giving up on {url} after {attempt + 1} attempts (status {response.status_code})")
+                    return response
+                logger.error(f"Giving up on {url} after {attempt + 1} attempts: {error}")
+                raise error
+
+            delay = self._backoff(attempt)
+            if response is not None:
+                retry_after = self._retry_after(response.headers)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                elif (response.headers.get('X-RateLimit-Remaining') == '0'
+                      and not self._is_core_resource(response.headers)):
+                    try:
+                        delay = max(delay, int(response.headers.get('X-RateLimit-Reset', 0)) - time.time() + 1)
+                    except ValueError:
+                        pass
+            self.stats['retries'] += 1
+            logger.info(f"Retrying {url} in {delay:.1f}s (attempt {attempt + 2}/{self.max_retries + 1})")
+            time.sleep(delay)
+            attempt += 1
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler():
+    """Returns the process-wide RequestScheduler shared by all GitHub API calls."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler()
+    return _scheduler
@@ -0,0 +1,81 @@
+import os
+import json
+import threading
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+SYNC_MANIFEST_VERSION = 1
+
+
+class SyncManifest:
+    """
+    Per-repository record of what an incremental fetch has already stored.
+
+    Keeps the last seen updated_at of every enriched PR and a high-water mark: the newest updated_at
+    of a run in which every listed PR was enriched successfully. PRs are listed sorted by 'updated'
+    descending, so a later run can stop paginating once it reaches PRs older than the watermark and
+    only re-enrich PRs whose updated_at changed.
+    """
+
+    def __init__(self, path, owner, repo, pr_state):
+        self.path = path
+        self.owner = owner
+        self.repo = repo
+        self.pr_state = pr_state
+        self.watermark = None
+        self.prs = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable sync manifest {self.path}: {e}")
+            return
+        if data.get('version') != SYNC_MANIFEST_VERSION or data.get('repo') != f"{self.owner}/{self.repo}":
+            logger.warning(f"Ignoring sync manifest {self.path}: written for a different repo or format.")
+            return
+        self.prs = {int(number): updated_at for number, updated_at in data.get('prs', {}).items()}
+        # The watermark only holds for the PR state it was computed with.
+        if data.get('pr_state') == self.pr_state:
+            self.watermark = data.get('watermark')
+
+    def is_current(self, pr_number, updated_at):
+        """True when the PR was already enriched at exactly this updated_at."""
+        return updated_at is not None and self.prs.get(int(pr_number)) == updated_at
+
+    def record_pr(self, pr_number, updated_at):
+        with self._lock:
+            self.prs[int(pr_number)] = updated_at
+
+    def is_before_watermark(self, updated_at):
+        """True for PRs last updated strictly before the watermark (ISO 8601 UTC strings compare in order)."""
+        return bool(self.watermark and updated_at and updated_at < self.watermark)
+
+    def advance_watermark(self, updated_at):
+        if updated_at and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+
+    def save(self):
+        """Writes the manifest atomically so an interrupted run never leaves a half-written file."""
+        data = {
+            'version': SYNC_MANIFEST_VERSION,
+            'repo': f"{self.owner}/{self.repo}",
+            'pr_state': self.pr_state,
+            'watermark': self.watermark,
+            'saved_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'prs': {str(number): updated_at for number, updated_at in sorted(self.prs.items())},
+        }
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except IOError as e:
+            logger.warning(f"Could not save sync manifest {self.path}: {e}")
@@ -0,0 +1,129 @@
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated PATs or app installation tokens; GITHUB_BOT_ACCESS_TOKEN, when set, joins the pool as well.
+GITHUB_TOKEN_POOL_ENV = 'GITHUB_BOT_ACCESS_TOKENS'
+GITHUB_DEFAULT_RATE_LIMIT = 5000  # Assumed budget of a token GitHub has not reported on yet
+
+
+def rate_limit_resource(url):
+    """The rate-limit budget a request draws on, judging by its URL."""
+    if '/search/' in url:
+        return 'search'
+    if url.rstrip('/').endswith('/graphql'):
+        return 'graphql'
+    return 'core'
+
+
+class TokenPool:
+    """
+    Spreads GitHub API requests over several tokens, each with its own rate-limit budget.
+
+    The remaining budget, limit and reset time of every token are tracked per resource (core, search, graphql)
+    from the X-RateLimit-* headers of its responses, and decremented locally for requests still in flight.
+    acquire() hands out the token with the most headroom; a token whose budget is used up is taken out of
+    rotation until its reset time, so throughput grows with the number of tokens.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = list(dict.fromkeys(t for t in tokens if t))
+        if not self.tokens:
+            raise ValueError("TokenPool needs at least one token")
+        self._lock = threading.Lock()
+        self._budgets = {}  # (token, resource) -> {'remaining', 'limit', 'reset'}
+        self.stats = {token: 0 for token in self.tokens}
+
+    def _budget(self, token, resource):
+        budget = self._budgets.get((token, resource))
+        if budget is None:
+            budget = {'remaining': None, 'limit': None, 'reset': None}
+            self._budgets[(token, resource)] = budget
+        if budget['reset'] is not None and budget['reset'] <= time.time():
+            # The window has rolled over; the next response reports the fresh budget.
+            budget.update(remaining=None, reset=None)
+        return budget
+
+    def _headroom(self, budget):
+        if budget['remaining'] is None:
+            return budget['limit'] or GITHUB_DEFAULT_RATE_LIMIT
+        return budget['remaining']
+
+    def acquire(self, resource='core'):
+        """
+        Returns the token with the most remaining budget for resource. When every token is exhausted the one
+        that resets first is returned; the caller's rate-limit handling then waits for that reset.
+        """
+        with self._lock:
+            budgets = {token: self._budget(token, resource) for token in self.tokens}
+            available = [token for token in self.tokens if self._headroom(budgets[token]) > 0]
+            if available:
+                token = max(available, key=lambda t: self._headroom(budgets[t]))
+                if budgets[token]['remaining'] is not None:
+                    budgets[token]['remaining'] -= 1
+            else:
+                token = min(self.tokens, key=lambda t: budgets[t]['reset'] or 0)
+            self.stats[token] += 1
+            return token
+
+    def update(self, token, headers):
+        """Records the budget a response reported for the token it was sent with."""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if token not in self.stats or remaining is None or reset is None:
+            return
+        try:
+            remaining, reset = int(remaining), int(reset)
+            limit = int(headers['X-RateLimit-Limit']) if headers.get('X-RateLimit-Limit') else None
+        except ValueError:
+            return
+        resource = headers.get('X-RateLimit-Resource', 'core')
+        with self._lock:
+            budget = self._budget(token, resource)
+            if budget['remaining'] is not None and budget['reset'] == reset:
+                # Responses can arrive out of order; within a window the budget only goes down.
+                remaining = min(remaining, budget['remaining'])
+            budget.update(remaining=remaining, limit=limit or budget['limit'], reset=reset)
+        if remaining <= 0:
+            logger.info(f"Token ...{token[-4:]} exhausted its {resource} budget; out of rotation until "
+                        f"{time.strftime('%H:%M:%S', time.localtime(reset))}")
+
+    def budget(self, resource='core'):
+        """
+        Returns (remaining, limit, reset) summed over all tokens: the budget left in the pool, its total size
+        and, for pacing, the earliest reset among the tokens (None while any token's budget is unknown).
+        """
+        with self._lock:
+            budgets = [self._budget(token, resource) for token in self.tokens]
+            remaining = sum(self._headroom(budget) for budget in budgets)
+            limit = sum(budget['limit'] or GITHUB_DEFAULT_RATE_LIMIT for budget in budgets)
+            resets = [budget['reset'] for budget in budgets]
+            reset = min(resets) if all(r is not None for r in resets) else None
+        return remaining, limit, reset
+
+
+_token_pool = None
+_token_pool_lock = threading.Lock()
+
+
+def get_token_pool():
+    """
+    Returns the shared TokenPool built from GITHUB_BOT_ACCESS_TOKENS (plus GITHUB_BOT_ACCESS_TOKEN),
+    or None when no pool is configured and requests keep the token their headers carry.
+    """
+    global _token_pool
+    pool_tokens = [t.strip() for t in os.environ.get(GITHUB_TOKEN_POOL_ENV, '').split(',') if t.strip()]
+    if not pool_tokens:
+        return None
+    if _token_pool is None:
+        with _token_pool_lock:
+            if _token_pool is None:
+                single_token = os.environ.get('GITHUB_BOT_ACCESS_TOKEN')
+                if single_token == 'YOUR_GITHUB_TOKEN':  # The placeholder from the sample configuration
+                    single_token = None
+                _token_pool = TokenPool([single_token, *pool_tokens])
+                logger.info(f"Using a pool of {len(_token_pool.tokens)} GitHub tokens")
+    return _token_pool
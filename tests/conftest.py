@@ -0,0 +1,70 @@
+"""
+Shared test setup. The fetchers read their configuration from the environment when llm_logic is imported, so the
+mock GitHub address, token and cache locations are set here, before any test module imports it (the same way
+llm_logic.benchmark does). Every test that fetches uses its own synthetic repository name, so the data the tests
+store under the shared working directory never overlaps.
+"""
+import os
+import sys
+import socket
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MOCK_HOST = '127.0.0.1'
+
+
+def _free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+MOCK_PORT = _free_port(MOCK_HOST)
+TEST_WORKDIR = tempfile.mkdtemp(prefix='llm_logic_tests_')
+
+os.environ.update({
+    'GITHUB_API_URL': f"http://{MOCK_HOST}:{MOCK_PORT}",
+    'GITHUB_GRAPHQL_URL': f"http://{MOCK_HOST}:{MOCK_PORT}/graphql",
+    'GITHUB_BOT_ACCESS_TOKEN': 'mock-token',
+    'GITHUB_BOT_ACCESS_TOKENS': '',
+    'GITHUB_MAX_REQUESTS_PER_SECOND': '1000',
+    'GITHUB_BACKOFF_BASE': '0.05',
+    'GITHUB_BACKOFF_MAX': '0.5',
+    'GITHUB_HTTP_CACHE': '0',
+    'GITHUB_HTTP_CACHE_DIR': os.path.join(TEST_WORKDIR, '.github_http_cache'),
+    'GITHUB_GIT_MIRROR_DIR': os.path.join(TEST_WORKDIR, '.git_mirrors'),
+})
+
+
+@pytest.fixture(scope='session', autouse=True)
+def test_workdir():
+    """Runs the session in TEST_WORKDIR, where fetch_github_data creates its github_data_structured directory."""
+    previous = os.getcwd()
+    os.chdir(TEST_WORKDIR)
+    yield TEST_WORKDIR
+    os.chdir(previous)
+
+
+@pytest.fixture
+def mock_github():
+    """
+    Starts MockGitHubServer instances on the port the fetchers were configured with:
+    mock_github(repo_model, **server_kwargs) returns the running server, which is stopped after the test.
+    """
+    from llm_logic.mock_github import MockGitHubServer
+    from llm_logic.http_client import close_http_client
+
+    servers = []
+
+    def start(repo_model, **kwargs):
+        server = MockGitHubServer(repo_model, host=MOCK_HOST, port=MOCK_PORT, **kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+    close_http_client()  # Pooled keep-alive connections point at the stopped server
@@ -0,0 +1,78 @@
+import os
+import json
+import sqlite3
+
+from llm_logic.change_catalog import CHANGE_CATALOG_VERSION, ChangeCatalog
+from llm_logic.change_summary import build_change_summary, filter_changes
+
+METADATA = {
+    'platform': 'github', 'request_type': 'pr', 'request_id': 7, 'title': 'Fix widgets', 'state': 'closed',
+    'author_login': 'alice', 'merged_at': '2024-03-01T12:00:00Z', 'body': 'Fixes the widgets.',
+    'changed_files_manifest': [{'filename': 'src/widget.py', 'status': 'modified', 'additions': 1, 'deletions': 1}],
+    'reviews': [{'user': 'bob', 'state': 'APPROVED', 'submitted_at': '2024-03-01T11:00:00Z'}],
+}
+
+
+def test_put_and_get_change(tmp_path):
+    catalog = ChangeCatalog(str(tmp_path / 'catalog.sqlite3'))
+
+    catalog.put_change('acme/widgets', METADATA)
+
+    assert catalog.get_change('pr', 7, repo='acme/widgets') == METADATA
+    assert catalog.get_change_by_directory('pr_7') == METADATA
+    assert catalog.get_change('pr', 8) is None
+
+
+def test_records_load_details_on_first_access(tmp_path):
+    catalog = ChangeCatalog(str(tmp_path / 'catalog.sqlite3'))
+    catalog.put_change('acme/widgets', METADATA)
+
+    record = catalog.get_change('pr', 7)
+
+    assert record.summary.author_login == 'alice' and record.summary.change_date == '2024-03-01T12:00:00Z'
+    assert record['title'] == 'Fix widgets' and 'reviews' in record
+    assert not record.details_loaded
+    assert record['reviews'] == METADATA['reviews']
+    assert record.details_loaded
+
+
+def test_query_changes_reads_summaries_only(tmp_path):
+    catalog = ChangeCatalog(str(tmp_path / 'catalog.sqlite3'))
+    catalog.put_change('acme/widgets', METADATA)
+    catalog.put_change('acme/widgets', dict(METADATA, request_id=8, author_login='bob',
+                                            merged_at='2024-03-31T18:00:00Z'))
+    catalog.put_change('acme/widgets', {'request_type': 'merge_commit', 'request_id': 'abcdef1234',
+                                        'sha': 'abcdef1234', 'message': 'Merge branch fixes\n\nDetails',
+                                        'api_author_login': 'carol', 'api_committer_login': 'alice',
+                                        'committer_date': '2024-04-01T00:00:00Z'})
+
+    assert [r.summary.change_id for r in catalog.query_changes(logins='alice')] == ['abcdef1234', '7']
+    assert [r.summary.change_id for r in catalog.query_changes(since='2024-03-02', until='2024-03-31')] == ['8']
+    records = catalog.query_changes(repo='acme/widgets')
+    frame = build_change_summary(records, 'acme/widgets')
+    assert sorted(frame['title']) == ['Fix widgets', 'Fix widgets', 'Merge branch fixes']
+    assert list(filter_changes(frame, logins='alice', until='2024-03-31')['change_id']) == ['7']
+    assert not any(record.details_loaded for record in records)
+
+
+def test_catalog_of_another_version_is_rebuilt(tmp_path):
+    # A version 1 catalog kept every scalar field in the header; it is rebuilt from the changes' metadata.json.
+    os.makedirs(tmp_path / 'pr_7')
+    with open(tmp_path / 'pr_7' / 'metadata.json', 'w', encoding='utf-8') as f:
+        json.dump(METADATA, f)
+    db_path = str(tmp_path / 'catalog.sqlite3')
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("CREATE TABLE changes (repo TEXT, change_type TEXT, change_id TEXT, directory TEXT, "
+                     "header TEXT NOT NULL, PRIMARY KEY (repo, change_type, change_id))")
+        conn.executemany("INSERT INTO changes VALUES (?, ?, ?, ?, ?)",
+                         [('acme/widgets', 'pr', '7', 'pr_7', json.dumps(METADATA)),
+                          ('acme/widgets', 'pr', '9', 'pr_9', '{}')])
+        conn.execute("PRAGMA user_version = 1")
+    conn.close()
+
+    catalog = ChangeCatalog(db_path)
+
+    assert catalog._connection().execute("PRAGMA user_version").fetchone()[0] == CHANGE_CATALOG_VERSION
+    assert catalog.get_change('pr', 7, repo='acme/widgets') == METADATA
+    assert catalog.count() == 1  # pr_9 has no metadata.json to restore it from
@@ -0,0 +1,44 @@
+import os
+from datetime import date
+
+import pandas as pd
+
+from llm_logic.change_summary import build_change_summary, filter_changes, load_change_summary, write_change_summary
+
+CHANGES = [
+    {'request_type': 'pr', 'request_id': 1, 'author_login': 'alice', 'merged_at': '2024-03-01T00:00:00Z'},
+    {'request_type': 'pr', 'request_id': 2, 'author_login': 'alice', 'merged_at': '2024-03-31T18:45:00Z'},
+    {'request_type': 'pr', 'request_id': 3, 'author_login': 'bob', 'merged_at': '2024-03-15T09:00:00Z'},
+    {'request_type': 'merge_commit', 'sha': 'abcdef1234', 'api_author_login': 'carol',
+     'api_committer_login': 'alice', 'committer_date': '2024-04-01T00:00:00Z'},
+]
+
+
+def _selected_ids(**filters):
+    return sorted(filter_changes(build_change_summary(CHANGES, 'acme/widgets'), **filters)['change_id'])
+
+
+def test_date_only_until_covers_the_whole_day():
+    assert _selected_ids(since='2024-03-01', until='2024-03-31') == ['1', '2', '3']
+    assert _selected_ids(since=date(2024, 3, 1), until=date(2024, 3, 31)) == ['1', '2', '3']
+    assert _selected_ids(since='2024-03-01', until='2024-03-31T12:00:00Z') == ['1', '3']
+
+
+def test_logins_match_any_role():
+    assert _selected_ids(logins='alice') == ['1', '2', 'abcdef1234']
+    assert _selected_ids(logins=['bob', 'carol'], until='2024-03-31') == ['3']
+
+
+def test_failed_write_removes_the_previous_summary(tmp_path, monkeypatch):
+    path = str(tmp_path / 'github_changes_summary.parquet')
+    with open(path, 'wb') as f:
+        f.write(b'summary of an earlier run')
+
+    def fail(self, *args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', fail)
+
+    assert not write_change_summary(path, build_change_summary(CHANGES, 'acme/widgets'))
+    assert not os.path.exists(path)
+    assert load_change_summary(path) is None
@@ -0,0 +1,27 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_logic.ci_cache import CIResultCache, check_runs_final
+
+
+def test_concurrent_lookups_fetch_once_and_drop_their_locks(tmp_path):
+    cache = CIResultCache(cache_dir=str(tmp_path))
+    fetches = []
+    release = threading.Event()
+
+    def fetch():
+        fetches.append(1)
+        release.wait(5)
+        return [{'status': 'completed', 'conclusion': 'success'}], True
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        lookups = [executor.submit(cache.get_or_fetch, 'acme', 'widgets', 'abc123', 'check_runs', fetch,
+                                   check_runs_final) for _ in range(4)]
+        release.set()
+        results = [lookup.result() for lookup in lookups]
+
+    assert len(fetches) == 1
+    assert all(result == results[0] for result in results)
+    for sha in ('def456', 'fed789'):
+        cache.get_or_fetch('acme', 'widgets', sha, 'statuses', lambda: ([], False), check_runs_final)
+    assert cache._key_locks == {}
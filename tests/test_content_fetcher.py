@@ -0,0 +1,20 @@
+from llm_logic.blob_store import git_blob_sha
+from llm_logic.content_fetcher import github_get_path_blob_shas
+from llm_logic.mock_github import SyntheticRepo
+
+
+def test_path_blob_shas_list_only_touched_directories(mock_github):
+    repo_model = SyntheticRepo('acme', 'widgets-trees', pr_count=8, files_per_pr=2, lines_per_file=5)
+    server = mock_github(repo_model)
+    pr = repo_model.pr(3)
+    snapshot = repo_model.snapshots[pr['base_sha']]
+    paths = sorted(snapshot) + ['src/no_such_file.py', 'no_such_directory/file.py']
+
+    blob_shas, complete = github_get_path_blob_shas('acme', 'widgets-trees', pr['base_sha'], paths, headers={})
+
+    assert complete
+    assert blob_shas == {path: git_blob_sha(content) for path, content in snapshot.items()}
+    # The root, src/ and the one module directory the files are in; a second lookup is served from memory.
+    assert server.route_counts['tree'] == 3
+    github_get_path_blob_shas('acme', 'widgets-trees', pr['base_sha'], paths, headers={})
+    assert server.route_counts['tree'] == 3
@@ -0,0 +1,61 @@
+import pytest
+
+from llm_logic.content_policy import ContentPolicy, EMPTY_BLOB_SHA
+
+
+@pytest.fixture
+def policy():
+    return ContentPolicy()
+
+
+@pytest.mark.parametrize('header', [
+    "// Code generated by protoc-gen-go. DO NOT EDIT.\npackage api\n",
+    "# @generated by tools/codegen\nVALUES = {}\n",
+    "/*\n * Auto-generated from schema.json, edit the schema instead.\n */\n",
+    "# autogenerated file\nx = 1\n",
+])
+def test_generator_headers_are_detected(policy, header):
+    assert policy.skip_reason_for_content(header) == 'generated'
+
+
+@pytest.mark.parametrize('content', [
+    "def save(path):\n    # DO NOT EDIT the file while it is open in another process\n    pass\n",
+    "API_DOCS = 'Docs are auto-generated from the docstrings below'\n",
+    "# Keeps the auto-generated ids stable across runs\nids = {}\n",
+])
+def test_ordinary_mentions_are_not_generated(policy, content):
+    assert policy.skip_reason_for_content(content) is None
+
+
+def test_build_directories_are_anchored_at_the_root(policy):
+    assert policy.skip_reason('build/output.js') == 'path'
+    assert policy.skip_reason('dist/app/main.js') == 'path'
+    assert policy.skip_reason('third_party/zlib/inflate.c') == 'path'
+    assert policy.skip_reason('src/build/steps.py') is None
+    assert policy.skip_reason('tools/dist/release.py') is None
+    assert policy.skip_reason('app/node_modules/left-pad/index.js') == 'path'
+
+
+def test_size_is_measured_in_encoded_bytes():
+    policy = ContentPolicy(max_bytes=100)
+    assert policy.skip_reason_for_content("я" * 60) == 'size'  # 60 characters, 120 bytes
+    assert policy.skip_reason_for_content("a" * 100) is None
+    assert policy.skip_reason_for_content("a" * 101) == 'size'
+
+
+def test_empty_added_file_is_not_binary(policy):
+    empty = {'filename': 'pkg/__init__.py', 'status': 'added', 'additions': 0, 'deletions': 0, 'changes': 0,
+             'patch': None, 'sha': EMPTY_BLOB_SHA}
+    assert policy.skip_reason('pkg/__init__.py', empty) is None
+    assert policy.skip_reason('pkg/__init__.py', dict(empty, sha=None)) is None
+    binary = dict(empty, filename='assets/logo.bin2', sha='4b825dc642cb6eb9a060e54bf8d69288fbee4904')
+    assert policy.skip_reason('assets/logo.bin2', binary) == 'binary'
+
+
+def test_binary_file_without_patch_key(policy):
+    # The REST files endpoints leave 'patch' out of binary entries altogether.
+    entry = {'filename': 'assets/logo.png2', 'status': 'added', 'additions': 0, 'deletions': 0, 'changes': 0,
+             'sha': '4b825dc642cb6eb9a060e54bf8d69288fbee4904'}
+    assert policy.skip_reason('assets/logo.png2', entry) == 'binary'
+    assert policy.skip_reason('assets/logo.png2', dict(entry, status='modified')) == 'binary'
+    assert policy.skip_reason('src/app.py', dict(entry, filename='src/app.py', additions=3, changes=3)) is None
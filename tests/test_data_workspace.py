@@ -0,0 +1,65 @@
+import os
+import json
+import time
+
+from llm_logic.blob_store import BLOB_STORE_DIRNAME, BlobStore
+from llm_logic.data_workspace import DataWorkspace, migrate_legacy_layout, repository_dir
+
+
+def _store_change(change_dir, metadata):
+    os.makedirs(change_dir, exist_ok=True)
+    with open(os.path.join(change_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+
+
+def test_recent_unreferenced_blobs_are_not_collected(tmp_path):
+    data_root = str(tmp_path)
+    data_dir = repository_dir(data_root, 'github.com', 'acme', 'widgets')
+    blobs = BlobStore(os.path.join(data_dir, BLOB_STORE_DIRNAME))
+    referenced, old, recent = (blobs.put(content) for content in ("kept\n", "orphaned\n", "in flight\n"))
+    _store_change(os.path.join(data_dir, 'pr_1'), {'request_type': 'pr', 'request_id': 1,
+                                                   'changed_files_manifest': [{'head_blob_sha': referenced}]})
+    fetch_started = time.time() - 60
+    os.utime(blobs._path(old), (fetch_started - 60, fetch_started - 60))
+    # 'recent' belongs to a change of the current fetch whose metadata.json has not been written yet.
+
+    DataWorkspace(data_root)._collect_blobs(os.path.relpath(data_dir, data_root), 'acme/widgets', fetch_started)
+
+    assert blobs.get(referenced) == "kept\n"
+    assert blobs.get(old) is None
+    assert blobs.get(recent) == "in flight\n"
+
+
+def test_legacy_changes_move_to_their_repository(tmp_path):
+    data_root = str(tmp_path)
+    pr = {'request_type': 'pr', 'request_id': 1, 'html_url': 'https://github.com/Acme/Widgets/pull/1'}
+    commit = {'request_type': 'merge_commit', 'sha': 'abcdef1234',
+              'html_url': 'https://ghe.example.com/acme/widgets/commit/abcdef1234'}
+    _store_change(os.path.join(data_root, 'pr_1'), pr)
+    _store_change(os.path.join(data_root, 'commit_abcdef1'), commit)
+    _store_change(os.path.join(data_root, 'pr_2'), {'request_type': 'pr', 'request_id': 2})
+
+    assert migrate_legacy_layout(data_root) == 2
+
+    assert os.path.exists(os.path.join(repository_dir(data_root, 'github.com', 'Acme', 'Widgets'), 'pr_1',
+                                       'metadata.json'))
+    assert os.path.exists(os.path.join(repository_dir(data_root, 'ghe.example.com', 'acme', 'widgets'),
+                                       'commit_abcdef1', 'metadata.json'))
+    assert sorted(os.listdir(data_root)) == ['ghe.example.com', 'github.com', 'pr_2']
+    assert migrate_legacy_layout(data_root) == 0
+
+
+def test_usage_counts_catalog_and_summaries(tmp_path):
+    data_root = str(tmp_path)
+    data_dir = repository_dir(data_root, 'github.com', 'acme', 'widgets')
+    _store_change(os.path.join(data_dir, 'pr_1'), {'request_type': 'pr', 'request_id': 1})
+    workspace = DataWorkspace(data_root)
+    workspace.record_use(data_dir, 'acme/widgets', [{'request_type': 'pr', 'request_id': 1}])
+    before = workspace.usage()
+
+    for name, size in (('catalog.sqlite3', 4096), ('catalog.sqlite3-wal', 1024),
+                       ('github_changes_summary.parquet', 2048)):
+        with open(os.path.join(data_dir, name), 'wb') as f:
+            f.write(b'\0' * size)
+
+    assert workspace.usage() == before + 4096 + 1024 + 2048
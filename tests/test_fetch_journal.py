@@ -0,0 +1,43 @@
+from llm_logic.fetch_journal import FetchJournal
+
+JOB_PARAMS = {'pr_state': 'closed', 'branch': 'master'}
+
+
+def _journal(path):
+    return FetchJournal(str(path), 'acme', 'widgets', JOB_PARAMS)
+
+
+def test_resume_after_torn_line(tmp_path):
+    path = tmp_path / 'fetch_journal.jsonl'
+    journal = _journal(path).start()
+    journal.record('pr:1', True, '2025-01-01T00:00:00Z')
+    journal.record('pr:2', True, '2025-01-02T00:00:00Z')
+    journal.finish(complete=False)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "unit", "unit": "pr:3", "sta')  # The process died in the middle of this write
+
+    resumed = _journal(path).start()
+    assert resumed.resumed
+    assert resumed.is_done('pr:1') and resumed.is_done('pr:2') and not resumed.is_done('pr:3')
+    resumed.record('pr:3', True, '2025-01-03T00:00:00Z')
+    resumed.record('commit:abc', False)
+    resumed.finish(complete=False)
+
+    resumed_again = _journal(path).start()
+    assert resumed_again.resumed
+    assert all(resumed_again.is_done(unit) for unit in ('pr:1', 'pr:2', 'pr:3'))
+    assert resumed_again.is_done('pr:3', '2025-01-03T00:00:00Z')
+    assert resumed_again.units['commit:abc']['status'] == 'failed'
+    resumed_again.finish(complete=False)
+
+
+def test_completed_job_starts_afresh(tmp_path):
+    path = tmp_path / 'fetch_journal.jsonl'
+    journal = _journal(path).start()
+    journal.record('pr:1', True)
+    journal.finish(complete=True)
+
+    next_run = _journal(path).start()
+    assert not next_run.resumed
+    assert not next_run.is_done('pr:1')
+    next_run.finish(complete=False)
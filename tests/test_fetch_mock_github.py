@@ -0,0 +1,173 @@
+import os
+import json
+import shutil
+
+import pytest
+
+from llm_logic import core
+from llm_logic.blob_store import BLOB_STORE_DIRNAME, BlobStore
+from llm_logic.change_archive import get_change_archive, content_member
+from llm_logic.change_catalog import change_directory_name, get_change_catalog
+from llm_logic.content_policy import ContentPolicy
+from llm_logic.http_client import configure_http_client
+from llm_logic.mock_github import SyntheticRepo
+from llm_logic.rate_limit import get_request_scheduler
+
+FETCH_CASES = [(backend, content_mode) for backend in core.FETCH_BACKENDS for content_mode in core.CONTENT_MODES]
+
+
+def _stored_content(data_dir, change_dir, file_meta, side):
+    """A file's stored content on one side ('before_merge' / 'after_merge'), or None if it was not stored."""
+    blob_sha = file_meta.get('base_blob_sha' if side == 'before_merge' else 'head_blob_sha')
+    if blob_sha:
+        return BlobStore(os.path.join(data_dir, BLOB_STORE_DIRNAME)).get(blob_sha)
+    archive = get_change_archive(change_dir)
+    if archive is not None:
+        return archive.get(content_member(side, file_meta['filename']))
+    path = os.path.join(change_dir, side, file_meta['filename'])
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def _assert_change_stored(data_dir, metadata, model_files):
+    change_dir = os.path.join(data_dir, change_directory_name(metadata))
+    with open(os.path.join(change_dir, 'metadata.json'), encoding='utf-8') as f:
+        stored = json.load(f)
+    manifest = {file_meta['filename']: file_meta for file_meta in stored['changed_files_manifest']}
+    assert set(manifest) == {f['filename'] for f in model_files}
+    for model_file in model_files:
+        file_meta = manifest[model_file['filename']]
+        assert _stored_content(data_dir, change_dir, file_meta, 'after_merge') == model_file['after']
+        if model_file['before'] is not None:
+            assert _stored_content(data_dir, change_dir, file_meta, 'before_merge') == model_file['before']
+
+
+def _assert_fetched(repo_model, prs, merge_commits):
+    """Every closed PR and merge commit of the model was returned and stored with its files' contents."""
+    data_dir = core.repo_data_dir(repo_model.owner, repo_model.repo)
+    assert sorted(pr['request_id'] for pr in prs) == sorted(pr['number'] for pr in repo_model.prs)
+    assert sorted(mc['sha'] for mc in merge_commits) == sorted(mc['sha'] for mc in repo_model.merge_commits)
+    for pr in prs:
+        _assert_change_stored(data_dir, pr, repo_model.pr(pr['request_id'])['files'])
+    for merge_commit in merge_commits:
+        _assert_change_stored(data_dir, merge_commit, repo_model.commit_files(merge_commit['sha']))
+
+
+@pytest.mark.parametrize('backend, content_mode', FETCH_CASES)
+def test_fetch_stores_every_change(mock_github, backend, content_mode):
+    repo_model = SyntheticRepo('acme', f"widgets-{backend}-{content_mode}", pr_count=6, files_per_pr=2,
+                               lines_per_file=20)
+    mock_github(repo_model)
+
+    prs, merge_commits = core.fetch_github_data(repo_model.owner, repo_model.repo, pr_state='closed',
+                                                backend=backend, content_mode=content_mode)
+
+    _assert_fetched(repo_model, prs, merge_commits)
+
+
+def test_fetch_over_httpx_backend(mock_github):
+    # The async httpx client is only a transport: pacing, retries and the token pool still come from api_request.
+    pytest.importorskip('httpx')
+    repo_model = SyntheticRepo('acme', 'widgets-httpx', pr_count=4, files_per_pr=2, lines_per_file=10)
+    server = mock_github(repo_model, rate_limit=25, rate_limit_window=2)
+    configure_http_client(backend='httpx')
+    try:
+        prs, merge_commits = core.fetch_github_data(repo_model.owner, repo_model.repo, pr_state='closed')
+    finally:
+        configure_http_client(backend='requests')
+
+    assert server.route_counts.get('rate_limited', 0) > 0
+    _assert_fetched(repo_model, prs, merge_commits)
+
+
+def test_fetch_waits_for_rate_limit_reset(mock_github):
+    # A small budget in a short window: the fetch runs into 403 / X-RateLimit-Remaining: 0 and has to wait for the
+    # reset instead of dropping the requests that were refused.
+    repo_model = SyntheticRepo('acme', 'widgets-rate-limited', pr_count=3, files_per_pr=1, lines_per_file=10)
+    server = mock_github(repo_model, rate_limit=25, rate_limit_window=2)
+
+    prs, merge_commits = core.fetch_github_data(repo_model.owner, repo_model.repo, pr_state='closed',
+                                                content_mode='contents')
+
+    assert server.route_counts.get('rate_limited', 0) > 0
+    _assert_fetched(repo_model, prs, merge_commits)
+
+
+def test_fetch_retries_secondary_rate_limits(mock_github):
+    # Every 9th REST request is answered with 429 and Retry-After; each one is retried after the pause.
+    repo_model = SyntheticRepo('acme', 'widgets-secondary-limit', pr_count=3, files_per_pr=1, lines_per_file=10)
+    server = mock_github(repo_model, secondary_limit_every=9, retry_after=1)
+    scheduler = get_request_scheduler()
+    secondary_limited_before = scheduler.stats['secondary_rate_limited']
+
+    prs, merge_commits = core.fetch_github_data(repo_model.owner, repo_model.repo, pr_state='closed',
+                                                content_mode='contents')
+
+    assert server.route_counts.get('secondary_limit', 0) > 0
+    secondary_limited = scheduler.stats['secondary_rate_limited'] - secondary_limited_before
+    assert secondary_limited == server.route_counts['secondary_limit']
+    _assert_fetched(repo_model, prs, merge_commits)
+
+
+def test_journal_marks_changes_done_once_stored(mock_github, monkeypatch):
+    # metadata.json is written by the artifact writer after enrichment returns; a change whose write fails must
+    # not be marked done, or a resumed run would skip it and never store it.
+    repo_model = SyntheticRepo('acme', 'widgets-journal', pr_count=3, files_per_pr=1, lines_per_file=10)
+    mock_github(repo_model)
+    store_change_metadata = core._store_change_metadata
+
+    def fail_for_pr_2(change_output_dir, *args):
+        if os.path.basename(change_output_dir) == 'pr_2':
+            return False
+        return store_change_metadata(change_output_dir, *args)
+
+    monkeypatch.setattr(core, '_store_change_metadata', fail_for_pr_2)
+    core.fetch_github_data(repo_model.owner, repo_model.repo, pr_state='closed', content_mode='contents')
+
+    data_dir = core.repo_data_dir(repo_model.owner, repo_model.repo)
+    journal_path = os.path.join(data_dir, core.FETCH_JOURNAL_FILE_TEMPLATE.format(owner=repo_model.owner,
+                                                                                  repo=repo_model.repo))
+    with open(journal_path, encoding='utf-8') as f:
+        statuses = {entry['unit']: entry['status'] for entry in map(json.loads, f) if entry['event'] == 'unit'}
+    assert statuses['pr:2'] == 'failed'
+    assert all(status == 'done' for unit, status in statuses.items() if unit != 'pr:2')
+    assert not os.path.exists(os.path.join(data_dir, 'pr_2', 'metadata.json'))
+
+
+def test_journal_records_refetched_evicted_prs(mock_github):
+    # An incremental run re-enriches older PRs whose stored data was evicted since; the journal must cover them too.
+    repo_model = SyntheticRepo('acme', 'widgets-journal-evicted', pr_count=3, files_per_pr=1, lines_per_file=10)
+    mock_github(repo_model)
+    core.fetch_github_data(repo_model.owner, repo_model.repo, pr_state='closed', incremental=True)
+    data_dir = core.repo_data_dir(repo_model.owner, repo_model.repo)
+    # Evict the oldest PR the way the data quota does; the next listing stops at the watermark before reaching it.
+    oldest = min(repo_model.prs, key=lambda pr: pr['updated_at'])['number']
+    shutil.rmtree(os.path.join(data_dir, f"pr_{oldest}"))
+    get_change_catalog(data_dir).delete_change(f"{repo_model.owner}/{repo_model.repo}", 'pr', oldest)
+
+    prs, _ = core.fetch_github_data(repo_model.owner, repo_model.repo, pr_state='closed', incremental=True)
+
+    assert oldest in [pr['request_id'] for pr in prs]
+    journal_path = os.path.join(data_dir, core.FETCH_JOURNAL_FILE_TEMPLATE.format(owner=repo_model.owner,
+                                                                                  repo=repo_model.repo))
+    with open(journal_path, encoding='utf-8') as f:
+        statuses = {entry['unit']: entry['status'] for entry in map(json.loads, f) if entry['event'] == 'unit'}
+    assert statuses[f"pr:{oldest}"] == 'done'
+
+
+def test_content_policy_applies_to_reused_blobs(mock_github, tmp_path, monkeypatch):
+    # Contents already in the blob store are not downloaded again, but must still pass the current policy.
+    repo_model = SyntheticRepo('acme', 'widgets-reused-policy', pr_count=1, files_per_pr=2, lines_per_file=20)
+    mock_github(repo_model)
+    prs, _ = core.fetch_github_data(repo_model.owner, repo_model.repo, pr_state='closed', content_mode='contents')
+    pr = prs[0]
+    files = [dict(file_meta, sha=file_meta['head_blob_sha'], base_sha=file_meta['base_blob_sha'])
+             for file_meta in pr['changed_files_manifest']]
+    monkeypatch.setattr(core, 'get_content_policy', lambda: ContentPolicy(max_bytes=64))
+
+    manifest = core.github_save_change_files(repo_model.owner, repo_model.repo, files, pr['base_commit_sha'],
+                                             pr['head_commit_sha'], {}, str(tmp_path), 'reused PR')
+
+    assert [file_meta.get('skipped') for file_meta in manifest] == ['size'] * len(files)
@@ -0,0 +1,102 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from llm_logic.git_mirror import GitMirror
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="git is not installed")
+
+BEFORE = {
+    'README.md': "# Widgets\n",
+    'src/keep.py': "value = 1\n",
+    'src/remove_me.py': "obsolete = True\n",
+    'src/old_name.py': "".join(f"line_{i} = {i}\n" for i in range(20)),
+    'docs/notes with spaces.txt': "first draft\n",
+}
+
+
+def _git(cwd, *args):
+    result = subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com',
+                             '-c', 'init.defaultBranch=master', *args],
+                            cwd=cwd, capture_output=True, check=True)
+    return result.stdout.decode('utf-8').strip()
+
+
+def _write(root, files):
+    for path, content in files.items():
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """A bare repository with two commits that add, delete, rename and modify files, some with spaces."""
+    work = str(tmp_path / 'work')
+    os.makedirs(work)
+    _git(work, 'init', '--quiet')
+    _write(work, BEFORE)
+    _git(work, 'add', '-A')
+    _git(work, 'commit', '--quiet', '-m', 'Initial commit')
+    base_sha = _git(work, 'rev-parse', 'HEAD')
+
+    _git(work, 'rm', '--quiet', 'src/remove_me.py')
+    _git(work, 'mv', 'src/old_name.py', 'src/new_name.py')
+    _write(work, {'src/keep.py': "value = 2\n", 'src/added file.py': "added = True\n",
+                  'docs/notes with spaces.txt': "second draft\n"})
+    _git(work, 'add', '-A')
+    _git(work, 'commit', '--quiet', '-m', 'Second commit')
+    head_sha = _git(work, 'rev-parse', 'HEAD')
+
+    remote = str(tmp_path / 'remote.git')
+    _git(str(tmp_path), 'clone', '--quiet', '--bare', work, remote)
+    mirror = GitMirror(remote, str(tmp_path / 'mirrors' / 'remote.git'))
+    mirror.sync()
+    return mirror, base_sha, head_sha
+
+
+def test_changed_files(repository):
+    mirror, base_sha, head_sha = repository
+
+    files = {f['filename']: f for f in mirror.changed_files(base_sha, head_sha)}
+
+    assert files['src/added file.py']['status'] == 'added'
+    assert files['src/added file.py']['base_sha'] is None
+    assert files['src/remove_me.py']['status'] == 'removed'
+    assert files['src/new_name.py']['status'] == 'renamed'
+    assert files['src/new_name.py']['previous_filename'] == 'src/old_name.py'
+    assert files['src/keep.py']['status'] == 'modified'
+    assert (files['src/keep.py']['additions'], files['src/keep.py']['deletions']) == (1, 1)
+    assert files['docs/notes with spaces.txt']['status'] == 'modified'
+    assert '+second draft' in files['docs/notes with spaces.txt']['patch']
+
+
+def test_read_files_on_both_sides(repository):
+    mirror, base_sha, head_sha = repository
+    paths = ['src/keep.py', 'src/added file.py', 'src/remove_me.py', 'src/old_name.py', 'src/new_name.py',
+             'docs/notes with spaces.txt']
+
+    before = mirror.read_files(base_sha, paths)
+    after = mirror.read_files(head_sha, paths)
+
+    assert before == {'src/keep.py': "value = 1\n", 'src/added file.py': "",
+                      'src/remove_me.py': "obsolete = True\n", 'src/old_name.py': BEFORE['src/old_name.py'],
+                      'src/new_name.py': "", 'docs/notes with spaces.txt': "first draft\n"}
+    assert after == {'src/keep.py': "value = 2\n", 'src/added file.py': "added = True\n",
+                     'src/remove_me.py': "", 'src/old_name.py': "", 'src/new_name.py': BEFORE['src/old_name.py'],
+                     'docs/notes with spaces.txt': "second draft\n"}
+
+
+def test_read_files_with_missing_paths(repository):
+    mirror, base_sha, head_sha = repository
+    # Missing paths with spaces make git's reply '<sha>:<path> missing' contain extra spaces; the replies
+    # after them must still line up with their paths.
+    paths = ['docs/a b.txt', 'docs/notes with spaces.txt', 'a b c missing', 'src/keep.py', 'src']
+
+    contents = mirror.read_files(head_sha, paths)
+
+    assert contents == {'docs/a b.txt': "", 'docs/notes with spaces.txt': "second draft\n",
+                        'a b c missing': "", 'src/keep.py': "value = 2\n", 'src': ""}
@@ -0,0 +1,68 @@
+import time
+
+from llm_logic.rate_limit import RequestScheduler
+
+
+class _Response:
+    def __init__(self, status_code, headers=None, text=''):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+
+def _scheduler():
+    return RequestScheduler(max_retries=3, max_rate=1000, backoff_base=0.0, backoff_max=0.0)
+
+
+def _send_in_turn(*responses):
+    pending = list(responses)
+    return lambda: pending.pop(0)
+
+
+def test_retry_after_is_honoured_on_429():
+    scheduler = _scheduler()
+    started = time.monotonic()
+
+    response = scheduler.execute(_send_in_turn(_Response(429, {'Retry-After': '0.5'}), _Response(200)))
+
+    assert response.status_code == 200
+    assert time.monotonic() - started >= 0.5
+    assert scheduler.stats['secondary_rate_limited'] == 1
+    assert scheduler.stats['retries'] == 1
+
+
+def test_retry_after_is_honoured_on_403():
+    scheduler = _scheduler()
+    started = time.monotonic()
+
+    response = scheduler.execute(_send_in_turn(
+        _Response(403, {'Retry-After': '0.3'}, 'You have exceeded a secondary rate limit'), _Response(200)))
+
+    assert response.status_code == 200
+    assert time.monotonic() - started >= 0.3
+    assert scheduler.stats['secondary_rate_limited'] == 1
+
+
+def test_exhausted_core_budget_pauses_until_reset():
+    scheduler = _scheduler()
+    reset = int(time.time()) + 1
+    exhausted = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Limit': '60', 'X-RateLimit-Reset': str(reset),
+                 'X-RateLimit-Resource': 'core'}
+
+    response = scheduler.execute(_send_in_turn(_Response(403, exhausted, 'API rate limit exceeded'),
+                                               _Response(200)))
+
+    assert response.status_code == 200
+    assert time.time() >= reset
+    assert scheduler.stats['rate_limited'] == 1
+    assert scheduler.stats['secondary_rate_limited'] == 0
+
+
+def test_plain_403_is_not_retried():
+    scheduler = _scheduler()
+
+    response = scheduler.execute(_send_in_turn(_Response(403, text='Resource not accessible by integration'),
+                                               _Response(200)))
+
+    assert response.status_code == 403
+    assert scheduler.stats['retries'] == 0